@@ -0,0 +1,743 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Benchmarks of the trajectory error computation.
+#
+# Run from this directory:
+#     python benchmark.py prepared
+# Each benchmark prints one line per measure. Times are the best of several
+# repetitions, in seconds. The inputs are built by the seeded generators of
+# synthetic.py, so the runs are reproducible.
+#
+# The regression gate times a fixed set of cases and compares them with a
+# baseline saved on the same machine, before a change:
+#     python benchmark.py --save-baseline benchmark_baseline.json
+#     ... change the code ...
+#     python benchmark.py --check benchmark_baseline.json
+# The check exits with status 1 when a case got slower than --max-ratio times
+# its baseline, in time or in peak memory.
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import oop_solution as oop
+import oracles
+import predicates
+import solution as sl
+import result_cache
+import synthetic
+import trajstore
+
+
+def best_time(function, repeat=5):
+    """
+    Measure the execution time of a function.
+    arg1 function : a function without arguments.
+    arg2 repeat : an int, the number of measures.
+    return : a float, the shortest of the measured times, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _route(n_points, seed=0):
+    """
+    Build a theoretical route made of straight corridors (see synthetic.corridors).
+    arg1 n_points : an int, the number of points of the route.
+    arg2 seed : an int, the seed of the random generator.
+    return : a list of tuples (x,y).
+    """
+    return [tuple(point) for point in synthetic.corridors(n_points, seed).tolist()]
+
+
+def _run(route, n_points, noise=0.1, seed=0):
+    """
+    Build an experimental run along a route (see synthetic.trace).
+    arg1 route : a list of tuples (x,y), the theoretical route.
+    arg2 n_points : an int, the number of points of the run.
+    arg3 noise : a float, the standard deviation of the noise.
+    arg4 seed : an int, the seed of the random generator.
+    return : an array of shape (n_points,2).
+    """
+    return synthetic.trace(route, n_points, noise=noise, seed=seed)
+
+
+def bench_prepared(route_points=2000, run_points=2000, runs=20):
+    """
+    Compare the cost of one run when the route is given as a list of tuples to
+    each call (to trajectory_error and to the array engine), and when it is
+    prepared once with PreparedPath.
+    arg1 route_points : an int, the number of points of the route.
+    arg2 run_points : an int, the number of points of each run.
+    arg3 runs : an int, the number of runs scored against the route.
+    """
+    route = _route(route_points)
+    all_runs = [_run(route, run_points, seed=k) for k in range(runs)]
+    all_runs_as_tuples = [[tuple(point) for point in run] for run in all_runs]
+
+    def raw():
+        for run in all_runs_as_tuples:
+            sl.trajectory_error(route, run)
+
+    def raw_vectorized():
+        for run in all_runs:
+            sl.trajectory_error_vectorized(route, run)
+
+    def prepared():
+        path = sl.PreparedPath(route)
+        for run in all_runs:
+            sl.trajectory_error(path, run)
+
+    raw_time = best_time(raw, repeat=1)
+    raw_vectorized_time = best_time(raw_vectorized, repeat=3)
+    prepared_time = best_time(prepared, repeat=3)
+    print("route of %d points, %d runs of %d points" % (route_points, runs, run_points))
+    print("raw route, trajectory_error            : %.6f s per run" % (raw_time / runs))
+    print("raw route, trajectory_error_vectorized : %.6f s per run" % (raw_vectorized_time / runs))
+    print("prepared route, trajectory_error       : %.6f s per run" % (prepared_time / runs))
+
+
+def bench_many(route_points=500, run_points=20000, runs=64):
+    """
+    Measure how trajectory_error_many scales with the number of worker processes.
+    arg1 route_points : an int, the number of points of the route.
+    arg2 run_points : an int, the number of points of each run.
+    arg3 runs : an int, the number of pairs scored.
+    """
+    route = _route(route_points)
+    pairs = [(route, _run(route, run_points, seed=k)) for k in range(runs)]
+    print("%d pairs, route of %d points, runs of %d points" % (runs, route_points, run_points))
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        elapsed = best_time(lambda: sl.trajectory_error_many(pairs, workers=workers), repeat=3)
+        print("%2d workers : %.3f s, %.0f pairs/s" % (workers, elapsed, runs / elapsed))
+        workers *= 2
+
+
+class _DictPoint:
+    """
+    A point with a __dict__, as the Point of oop_solution used to be, to compare with.
+    """
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def _allocated(build):
+    """
+    Measure the memory held by the result of a function.
+    arg1 build : a function without arguments.
+    return : an int, the number of bytes allocated and still held after the call.
+    """
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def bench_geometry(n_points=200000):
+    """
+    Compare the memory and the iteration time of a path stored as Points with a
+    __dict__, as slotted Points, and as a Polyline (iterated as Points, and
+    through its array view).
+    arg1 n_points : an int, the number of points of the path.
+    """
+    coordinates = np.random.default_rng(0).uniform(0, 100, size=(n_points, 2)).tolist()
+    builders = [
+        ("dict Points   ", lambda: [_DictPoint(x, y) for x, y in coordinates]),
+        ("slotted Points", lambda: [oop.Point(x, y) for x, y in coordinates]),
+        ("Polyline      ", lambda: oop.Polyline(np.array(coordinates))),
+    ]
+    print("path of %d points" % n_points)
+    for name, build in builders:
+        size = _allocated(build)
+        path = build()
+        elapsed = best_time(lambda: sum(point.x for point in path), repeat=3)
+        print("%s : %6.1f bytes per point, %.3f s per iteration" % (name, size / n_points, elapsed))
+    # a Polyline builds the Points when they are read, its array view avoids it:
+    path = oop.Polyline(np.array(coordinates))
+    elapsed = best_time(lambda: path.as_array()[:,0].sum(), repeat=3)
+    print("Polyline array :                    %.3f s per iteration" % elapsed)
+
+
+def _recomputed_belongs(segment, point):
+    """
+    point_belongs_to_segment as it was before the segments cached their geometry:
+    the direction and the length are computed again at each call.
+    arg1 segment : a Segment.
+    arg2 point : a Point.
+    return : a bool.
+    """
+    p1, p2 = segment.p1, segment.p2
+    cross_product = (point.y - p1.y) * (p2.x - p1.x) - (point.x - p1.x) * (p2.y - p1.y)
+    if abs(cross_product) > 0.0000000001:
+        return False
+    dot_product = (point.x - p1.x)*(p2.x - p1.x) + (point.y - p1.y)*(p2.y - p1.y)
+    return 0 <= dot_product <= p1.distance(p2)**2
+
+
+def _recomputed_line(segment):
+    """
+    The slope and the intercept of a segment, computed again at each call.
+    arg1 segment : a non vertical Segment.
+    return : a, b, two floats, such that the line is y = a*x + b.
+    """
+    a = (segment.p1.y - segment.p2.y) / (segment.p1.x - segment.p2.x)
+    return a, segment.p1.y - a * segment.p1.x
+
+
+def bench_segment(n_queries=200000):
+    """
+    Compare many queries on one segment (belonging, length, line equation),
+    with the cached geometry of Segment and with the geometry computed at each call.
+    arg1 n_queries : an int, the number of queries of each kind.
+    """
+    segment = oop.Segment(oop.Point(0.5, 1.0), oop.Point(4.0, 3.5))
+    points = [oop.Point(0.5 + 3.5*t, 1.0 + 2.5*t) for t in np.linspace(-0.5, 1.5, n_queries).tolist()]
+
+    def recomputed():
+        for point in points:
+            _recomputed_belongs(segment, point)
+            segment.p1.distance(segment.p2)
+            _recomputed_line(segment)
+
+    def cached():
+        for point in points:
+            segment.point_belongs_to_segment(point)
+            segment.length()
+            (segment.slope, segment.intercept)
+
+    recomputed_time = best_time(recomputed, repeat=3)
+    cached_time = best_time(cached, repeat=3)
+    print("%d queries on one segment" % n_queries)
+    print("geometry computed at each call : %.3f s" % recomputed_time)
+    print("cached geometry                : %.3f s" % cached_time)
+
+
+_PREDICATES = ("cross_sign", "orient2d", "intersection_parameter")
+
+
+def _predicate_calls(module, function):
+    """
+    Count the calls of the predicates made by a function, through the names
+    imported by a module, and how many of them needed the exact arithmetic.
+    arg1 module : a module importing the predicates, solution or oop_solution.
+    arg2 function : a function without arguments.
+    return : calls, exact_calls. Two ints.
+    """
+    replaced = {name: getattr(module, name) for name in _PREDICATES}
+    calls = [0]
+
+    def counting(predicate):
+        def counted(*args):
+            calls[0] += 1
+            return predicate(*args)
+        return counted
+
+    exact_calls = predicates.exact_calls
+    try:
+        for name, predicate in replaced.items():
+            setattr(module, name, counting(predicate))
+        function()
+    finally:
+        for name, predicate in replaced.items():
+            setattr(module, name, predicate)
+    return calls[0], predicates.exact_calls - exact_calls
+
+
+def bench_predicates(n_points=2000):
+    """
+    Count the calls of the predicates of predicates.py made by trajectory_error
+    and Trajectory.trajectory_error, and how many of them were not decided by the
+    fast float filter, on the synthetic scenarios and on nearly parallel segments.
+    arg1 n_points : an int, the number of points of the paths.
+    """
+    print("%-16s %-16s %10s %18s" % ("case", "function", "calls", "exact calls"))
+
+    def report(case, name, calls, exact_calls):
+        print("%-16s %-16s %10d %8d (%6.3f%%)" % (case, name, calls, exact_calls,
+                                                  100 * exact_calls / max(calls, 1)))
+
+    for case in synthetic.SCENARIOS:
+        route, run = synthetic.scenario(case, n_points)
+        route, run = _tuples(route), _tuples(run)
+        report(case, "trajectory_error",
+               *_predicate_calls(sl, lambda: sl.trajectory_error(route, run)))
+        route_points = [oop.Point(x, y) for x, y in route]
+        run_points = [oop.Point(x, y) for x, y in run]
+        report(case, "Trajectory",
+               *_predicate_calls(oop, lambda: oop.Trajectory(route_points, run_points).trajectory_error()))
+
+    # segments through a point computed on another line, at angles down to 1e-16 radian:
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(-100, 100, size=(n_points, 2))
+    directions = rng.uniform(0, 2 * np.pi, size=n_points)
+    angles = 10.0 ** rng.uniform(-16, -1, size=n_points)
+    segments = []
+    for (x, y), direction, angle in zip(starts.tolist(), directions.tolist(), angles.tolist()):
+        dx, dy = np.cos(direction), np.sin(direction)
+        cx, cy = x + 0.5 * dx, y + 0.5 * dy
+        ex, ey = np.cos(direction + angle), np.sin(direction + angle)
+        segments.append(((x, y), (x + dx, y + dy), (cx - ex / 2, cy - ey / 2), (cx + ex / 2, cy + ey / 2)))
+    report("nearly parallel", "intersection",
+           *_predicate_calls(sl, lambda: [sl.intersection(*segment) for segment in segments]))
+
+
+def _peak_memory(function):
+    """
+    Measure the peak of the memory allocated by a function.
+    arg1 function : a function without arguments.
+    return : an int, the largest number of bytes allocated at once during the call.
+    """
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def scaling_exponent(sizes, times):
+    """
+    Fit times = c * sizes**k, on a log-log scale.
+    arg1 sizes : a list of ints.
+    arg2 times : a list of floats, the times measured for sizes.
+    return : a float, the exponent k, or nan if there are less than two measures.
+    Times shorter than a millisecond are left out: the overhead of the call dominates them.
+    """
+    kept = [(n, t) for n, t in zip(sizes, times) if t >= 1e-3]
+    if len(kept) < 2:
+        return float("nan")
+    n, t = np.log(np.array(kept)).T
+    return float(np.polyfit(n, t, 1)[0])
+
+
+def bench_dense(n_points=20000, densities=(1, 3, 10, 30, 100)):
+    """
+    Time trajectory_error on lists of tuples against the array engine, on a
+    PreparedPath and on arrays, from dense routes, with about one point of the
+    trace per theoretical segment, where most runs of steps are one or two steps
+    long, to sparse ones, where the runs are long.
+    arg1 n_points : an int, the number of points of the trace.
+    arg2 densities : a list of ints, the numbers of points of the trace per theoretical segment.
+    """
+    print("%8s %12s %12s %12s" % ("density", "tuples s", "prepared s", "arrays s"))
+    for density in densities:
+        route = synthetic.corridors(max(2, n_points // density))
+        run = synthetic.trace(route, n_points)
+        route_tuples, run_tuples = _tuples(route), _tuples(run)
+        prepared = sl.PreparedPath(route)
+        print("%8d %12.4f %12.4f %12.4f"
+              % (density, best_time(lambda: sl.trajectory_error(route_tuples, run_tuples), repeat=3),
+                 best_time(lambda: sl.trajectory_error(prepared, run_tuples), repeat=3),
+                 best_time(lambda: sl.trajectory_error_vectorized(route, run), repeat=3)))
+
+
+def bench_scaling(max_points=10**6, time_limit=30.0):
+    """
+    Time trajectory_error and Trajectory.trajectory_error on the scenarios of
+    synthetic.py, from 10 points to max_points points, and fit how the time
+    grows with the number of points (1 for a linear sweep, 2 for a quadratic one).
+    arg1 max_points : an int, the largest number of points of the traces.
+    arg2 time_limit : a float, in seconds. The larger sizes are skipped for an
+    implementation when they would likely take longer than time_limit.
+    """
+    implementations = [
+        ("solution", lambda route, run: (lambda: sl.trajectory_error(route, run)),
+         lambda path: [tuple(point) for point in path.tolist()]),
+        ("oop_solution", lambda route, run: (lambda: oop.Trajectory(route, run).trajectory_error()),
+         lambda path: [oop.Point(x, y) for x, y in path.tolist()]),
+    ]
+    sizes = [10**k for k in range(1, int(round(np.log10(max_points))) + 1)]
+    print("%-10s %-13s %8s %10s %12s %10s" % ("scenario", "function", "points", "seconds", "points/s", "peak KiB"))
+    for name in synthetic.SCENARIOS:
+        for label, call, convert in implementations:
+            measured_sizes, measured_times = [], []
+            for n_points in sizes:
+                if measured_times and measured_times[-1] * n_points / measured_sizes[-1] > time_limit:
+                    print("%-10s %-13s %8d    skipped" % (name, label, n_points))
+                    continue
+                route, run = synthetic.scenario(name, n_points)
+                function = call(convert(route), convert(run))
+                elapsed = best_time(function, repeat=3 if n_points <= 10**4 else 1)
+                peak = _peak_memory(function)
+                measured_sizes.append(n_points)
+                measured_times.append(elapsed)
+                print("%-10s %-13s %8d %10.4f %12.0f %10.2f"
+                      % (name, label, n_points, elapsed, n_points / elapsed, peak / 2**10))
+            print("%-10s %-13s scaling exponent %.2f"
+                  % (name, label, scaling_exponent(measured_sizes, measured_times)))
+
+
+def bench_backtracking(max_points=10**6, turns_per_point=0.02):
+    """
+    Time trajectory_error_backtracking on traces of back_and_forth, which double
+    back once every 1/turns_per_point points, and fit how the time grows with
+    the number of points. The error is printed next to the one of a trace going
+    straight along the same route: both are close when each part of the route
+    is counted once.
+    arg1 max_points : an int, the largest number of points of the traces.
+    arg2 turns_per_point : a float, the number of turns for each point of the trace.
+    """
+    sizes = [10**k for k in range(3, int(round(np.log10(max_points))) + 1)]
+    route = synthetic.corridors(200)
+    times = []
+    print("%8s %8s %10s %12s %12s %12s" % ("points", "turns", "seconds", "points/s", "error", "straight"))
+    for n_points in sizes:
+        turns = int(n_points * turns_per_point)
+        run = synthetic.back_and_forth(route, n_points, turns)
+        elapsed = best_time(lambda: sl.trajectory_error_backtracking(route, run),
+                            repeat=3 if n_points <= 10**4 else 1)
+        times.append(elapsed)
+        print("%8d %8d %10.4f %12.0f %12.6f %12.6f"
+              % (n_points, turns, elapsed, n_points / elapsed, sl.trajectory_error_backtracking(route, run),
+                 sl.trajectory_error_backtracking(route, synthetic.trace(route, n_points))))
+    print("scaling exponent %.2f" % scaling_exponent(sizes, times))
+
+
+def bench_parallel(n_points=2 * 10**6):
+    """
+    Time trajectory_error_parallel on one long trace, with more and more worker
+    processes, against trajectory_error_shoelace in one process. The difference
+    of the errors is the rounding of the sums of the chunks.
+    arg1 n_points : an int, the number of points of the trace.
+    """
+    route = synthetic.corridors(200)
+    run = synthetic.trace(route, n_points)
+    expected = sl.trajectory_error_shoelace(route, run)
+    serial = best_time(lambda: sl.trajectory_error_shoelace(route, run), repeat=3)
+    print("%8s %10s %10s %12s" % ("workers", "seconds", "speedup", "difference"))
+    print("%8s %10.4f %10.2f %12.2e" % ("serial", serial, 1.0, 0.0))
+    cores = os.cpu_count() or 1
+    for workers in sorted({1, 2, 4, cores}):
+        elapsed = best_time(lambda: sl.trajectory_error_parallel(route, run, workers), repeat=3)
+        print("%8d %10.4f %10.2f %12.2e" % (workers, elapsed, serial / elapsed,
+                                            sl.trajectory_error_parallel(route, run, workers) - expected))
+    print("%d cores" % cores)
+
+
+def bench_cache(sizes=(10**3, 10**4, 10**5, 10**6)):
+    """
+    Time trajectory_error on a pair of arrays, against the same query through a
+    ResultCache: the hash of the coordinates alone, a hit in memory, and a hit
+    on disk, from another cache sharing the directory.
+    arg1 sizes : a list of ints, the numbers of points of the traces.
+    """
+    route = sl.PreparedPath(synthetic.corridors(200))
+    print("%8s %12s %12s %12s %12s" % ("points", "computed s", "key s", "memory s", "disk s"))
+    with tempfile.TemporaryDirectory() as directory:
+        for n_points in sizes:
+            run = synthetic.trace(route, n_points)
+            cache = result_cache.ResultCache(directory=directory)
+            cache.trajectory_error(route, run)
+            computed = best_time(lambda: sl.trajectory_error(route, run), repeat=3)
+            key = best_time(lambda: cache.key("trajectory_error", route, run))
+            memory = best_time(lambda: cache.trajectory_error(route, run))
+            disk = best_time(lambda: result_cache.ResultCache(directory=directory).trajectory_error(route, run))
+            print("%8d %12.6f %12.6f %12.6f %12.6f" % (n_points, computed, key, memory, disk))
+
+
+def bench_columns(n_points=10**6):
+    """
+    Measure the conversion of the columns of an oracle, as parse_oracle reads
+    them, to the input of the functions: lists of tuples for trajectory_error,
+    lists of Points or a Polyline for Trajectory, or Columns for both, which
+    use the columns as they are. Then time trajectory_error on each input.
+    arg1 n_points : an int, the number of points of the trace.
+    """
+    route = synthetic.corridors(200)
+    run = synthetic.trace(route, n_points)
+    xs, ys = run[:,0].copy(), run[:,1].copy() # the columns of an oracle
+    conversions = [
+        ("tuples", lambda: list(zip(xs.tolist(), ys.tolist()))),
+        ("Points", lambda: [oop.Point(x, y) for x, y in zip(xs.tolist(), ys.tolist())]),
+        ("Polyline", lambda: oop.Polyline(np.stack((xs, ys), axis=1))),
+        ("Columns", lambda: sl.Columns(xs, ys)),
+    ]
+    route_columns = sl.Columns(route[:,0], route[:,1])
+    scores = {
+        "tuples": lambda path: sl.trajectory_error(_tuples(route), path),
+        "Points": lambda path: oop.Trajectory([oop.Point(x, y) for x, y in route.tolist()], path).trajectory_error(),
+        "Polyline": lambda path: oop.Trajectory(oop.Polyline(route), path).trajectory_error(),
+        "Columns": lambda path: sl.trajectory_error(route_columns, path),
+    }
+    print("%-10s %12s %12s %12s" % ("input", "convert s", "peak MiB", "score s"))
+    for label, convert in conversions:
+        elapsed = best_time(convert, repeat=3)
+        peak = _peak_memory(convert)
+        path = convert()
+        print("%-10s %12.4f %12.1f %12.4f"
+              % (label, elapsed, peak / 2**20, best_time(lambda: scores[label](path), repeat=1)))
+
+
+def bench_incremental(sizes=(10**4, 10**5, 10**6)):
+    """
+    Time the edits of a waypoint in the middle of a segment of a route, updating
+    a SweepResult, against the sweep of the edited route from its start. A
+    corner of the route is not moved: the trace follows it closely, and the
+    sweep of trajectory_error loses the trace after a corner moved even a little.
+    arg1 sizes : a list of ints, the numbers of points of the traces.
+    """
+    route = synthetic.corridors(200)
+    k = len(route) // 2 + 1 # the waypoint, inserted between the points k-1 and k of the route
+    waypoint = tuple((route[k-1] + route[k]) / 2 + 0.1)
+    moved = tuple((route[k-1] + route[k]) / 2 + 0.2)
+    print("%8s %12s %12s %12s %12s" % ("points", "sweep s", "insert s", "move s", "delete s"))
+    for n_points in sizes:
+        run = synthetic.trace(route, n_points)
+        result = sl.sweep_result(route, run)
+        edited = result.insert_vertex(k, waypoint)
+        print("%8d %12.6f %12.6f %12.6f %12.6f"
+              % (n_points, best_time(lambda: sl.trajectory_error_vectorized(route, run), repeat=3),
+                 best_time(lambda: result.insert_vertex(k, waypoint)),
+                 best_time(lambda: edited.move_vertex(k, moved)),
+                 best_time(lambda: edited.delete_vertex(k))))
+
+
+def _write_long_trace(path, route, n_points, pieces):
+    """
+    Write a trace along a route to a trajectory file, piece by piece, without
+    holding it in memory: the route is cut in pieces of equal lengths, and each
+    piece gets a trace of synthetic.trace.
+    arg1 path : a str, the name of the file.
+    arg2 route : an array of shape (N,2), the theoretical route.
+    arg3 n_points : an int, the number of points of the trace, a multiple of pieces.
+    arg4 pieces : an int, the number of pieces.
+    return : a StoredTrajectory of the file.
+    """
+    cumulative = np.concatenate(([0], np.cumsum(np.hypot(*np.diff(route, axis=0).T))))
+    stored = trajstore.create_trajectory(path, n_points)
+    size = n_points // pieces
+    for k in range(pieces):
+        start, stop = cumulative[-1] * k / pieces, cumulative[-1] * (k + 1) / pieces
+        inner = (cumulative > start) & (cumulative < stop)
+        s = np.concatenate(([start], cumulative[inner], [stop]))
+        piece = np.stack((np.interp(s, cumulative, route[:,0]), np.interp(s, cumulative, route[:,1])), axis=1)
+        points = synthetic.trace(piece, size, seed=k)
+        stored.write(k * size, points[:,0], points[:,1])
+    return trajstore.open_trajectory(path)
+
+
+def bench_store(n_points=5 * 10**7):
+    """
+    Write a long trace to a trajectory file, and time trajectory_error and
+    path_length reading it, window by window. The peak resident memory of the
+    process stays far below the size of the file.
+    arg1 n_points : an int, the number of points of the trace, a multiple of 1000.
+    """
+    route = synthetic.corridors(200)
+    print("%10s %10s %10s %12s %12s" % ("points", "file MiB", "seconds", "points/s", "peak RSS MiB"))
+    with tempfile.TemporaryDirectory() as directory:
+        stored = _write_long_trace(os.path.join(directory, "run.traj"), route, n_points, 1000)
+        size = os.path.getsize(stored.path) / 2**20
+        print("%10d %10.0f %10s %12s %12.0f  %s" % (n_points, size, "", "",
+                                                  resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10, "written"))
+        for label, function in (("trajectory_error", lambda: sl.trajectory_error(route, stored)),
+                                ("path_length", lambda: sl.path_length(stored))):
+            elapsed = best_time(function, repeat=1)
+            # ru_maxrss is in KiB on Linux:
+            print("%10d %10.0f %10.2f %12.0f %12.0f  %s"
+                  % (n_points, size, elapsed, n_points / elapsed,
+                     resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10, label))
+
+
+BASELINE_VERSION = 1
+
+
+def _tuples(path):
+    """
+    arg1 path : an array of shape (N,2).
+    return : a list of tuples (x,y), as the functions of solution.py expect them.
+    """
+    return [tuple(point) for point in path.tolist()]
+
+
+def regression_cases(oracle_directory=oracles.DEFAULT_DIRECTORY):
+    """
+    Build the cases of the regression gate: the trajectory error of generated
+    pairs of two sizes (a sweep turned quadratic slows down ten times more on
+    the larger one), the helpers of the sweep, and the oracles if they are there.
+    arg1 oracle_directory : a string, the directory of the oracles.
+    return : a list of (name, function), with functions without arguments.
+    """
+    cases = []
+    for name in ("corridors", "crossings", "dwells"):
+        for n_points in (1000, 10000):
+            route, run = synthetic.scenario(name, n_points)
+            route_tuples, run_tuples = _tuples(route), _tuples(run)
+            route_points = [oop.Point(x, y) for x, y in route_tuples]
+            run_points = [oop.Point(x, y) for x, y in run_tuples]
+            cases.append(("trajectory_error/%s/%d" % (name, n_points),
+                          lambda th=route_tuples, exp=run_tuples: sl.trajectory_error(th, exp)))
+            # a route prepared once must not cost more per run than the tuples:
+            cases.append(("trajectory_error/prepared/%s/%d" % (name, n_points),
+                          lambda th=sl.PreparedPath(route), exp=run_tuples: sl.trajectory_error(th, exp)))
+            cases.append(("Trajectory.trajectory_error/%s/%d" % (name, n_points),
+                          lambda th=route_points, exp=run_points: oop.Trajectory(th, exp).trajectory_error()))
+
+    # a dense route, one point of the trace per theoretical segment, where the runs of steps are short:
+    route = synthetic.corridors(10000)
+    run = synthetic.trace(route, 10000)
+    prepared = sl.PreparedPath(route)
+    cases.append(("trajectory_error_vectorized/dense/10000", lambda: sl.trajectory_error_vectorized(route, run)))
+    cases.append(("trajectory_error/prepared/dense/10000",
+                  lambda run=_tuples(run): sl.trajectory_error(prepared, run)))
+
+    route, run = synthetic.scenario("corridors", 10000)
+    route, run = _tuples(route), _tuples(run)
+    # each segment of the run against the segment of the route it follows:
+    follows = [k * (len(route) - 1) // (len(run) - 1) for k in range(len(run) - 1)]
+    segments = [(route[i], route[i + 1], run[k], run[k + 1]) for k, i in enumerate(follows)]
+    cases.append(("path_length/corridors/10000", lambda: sl.path_length(run)))
+    cases.append(("intersection/corridors/10000",
+                  lambda: [sl.intersection(*segment) for segment in segments]))
+    cases.append(("ortogonal_projection/corridors/10000",
+                  lambda: [sl.ortogonal_projection(x_1, x_2, y_1) for x_1, x_2, y_1, _ in segments]))
+
+    if os.path.isdir(oracle_directory):
+        for oracle in oracles.load_oracles(oracle_directory):
+            cases.append(("trajectory_error/oracle/%s" % oracle.name,
+                          lambda th=_tuples(oracle.theoretical), exp=_tuples(oracle.experimental):
+                          sl.trajectory_error(th, exp)))
+    return cases
+
+
+def measure(function, repeat=5):
+    """
+    Measure the time and the memory of a function.
+    arg1 function : a function without arguments.
+    arg2 repeat : an int, the number of measures of the time.
+    return : a dict {"seconds": the shortest time of a call, "peak_bytes": the peak of
+    the memory allocated during a call}.
+    """
+    timer = timeit.Timer(function)
+    number = timer.autorange()[0] # enough calls to last 0.2 s
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {"seconds": seconds, "peak_bytes": _peak_memory(function)}
+
+
+def run_cases(cases):
+    """
+    Measure the cases of the regression gate.
+    arg1 cases : a list of (name, function), see regression_cases.
+    return : a dict {name: measure}.
+    """
+    return {name: measure(function) for name, function in cases}
+
+
+def save_baseline(path, results):
+    """
+    Save the measures of the cases as a baseline.
+    arg1 path : a string, the path to the JSON file.
+    arg2 results : a dict {name: measure}, see run_cases.
+    """
+    baseline = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "cases": results,
+    }
+    with open(path, mode='w') as output:
+        json.dump(baseline, output, indent=2, sort_keys=True)
+
+
+def compare_with_baseline(path, results, max_ratio=1.5, memory_slack=64 * 1024):
+    """
+    Compare the measures of the cases with a baseline.
+    arg1 path : a string, the path to the JSON file of the baseline.
+    arg2 results : a dict {name: measure}, see run_cases.
+    arg3 max_ratio : a float, a case regresses when it takes more than max_ratio
+    times the time, or the peak memory, of its baseline.
+    arg4 memory_slack : an int, a number of bytes added to the allowed peak memory,
+    so that small cases are not failed for a few allocations.
+    return : a list of strings, the names of the cases which regressed.
+    """
+    with open(path) as baseline:
+        baseline = json.load(baseline)
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError("baseline %s has version %r, this benchmark writes version %d: save a new one"
+                         % (path, baseline.get("version"), BASELINE_VERSION))
+    regressions = []
+    print("%-50s %10s %10s %7s %7s" % ("case", "seconds", "baseline", "time", "memory"))
+    for name, result in sorted(results.items()):
+        if name not in baseline["cases"]:
+            print("%-50s %10.6f %10s" % (name, result["seconds"], "new"))
+            continue
+        reference = baseline["cases"][name]
+        time_ratio = result["seconds"] / reference["seconds"]
+        memory_ratio = result["peak_bytes"] / max(reference["peak_bytes"], 1)
+        regressed = time_ratio > max_ratio\
+                    or result["peak_bytes"] > max_ratio * reference["peak_bytes"] + memory_slack
+        if regressed:
+            regressions.append(name)
+        print("%-50s %10.6f %10.6f %6.2fx %6.2fx%s" % (name, result["seconds"], reference["seconds"],
+                                                      time_ratio, memory_ratio, "  REGRESSION" if regressed else ""))
+    return regressions
+
+
+BENCHMARKS = {
+    "backtracking": bench_backtracking,
+    "cache": bench_cache,
+    "columns": bench_columns,
+    "dense": bench_dense,
+    "geometry": bench_geometry,
+    "incremental": bench_incremental,
+    "many": bench_many,
+    "parallel": bench_parallel,
+    "predicates": bench_predicates,
+    "prepared": bench_prepared,
+    "scaling": bench_scaling,
+    "segment": bench_segment,
+    "store": bench_store,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the trajectory error computation.")
+    parser.add_argument("names", nargs="*", metavar="name",
+                        help="the benchmarks to run, among %s. All of them by default."
+                             % ", ".join(sorted(BENCHMARKS)))
+    parser.add_argument("--save-baseline", metavar="PATH",
+                        help="measure the cases of the regression gate and save them as a baseline")
+    parser.add_argument("--check", metavar="PATH",
+                        help="measure the cases of the regression gate and compare them with a baseline")
+    parser.add_argument("--max-ratio", type=float, default=1.5,
+                        help="the slowdown allowed by --check (default: %(default)s)")
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark %r" % name)
+    if args.save_baseline or args.check:
+        results = run_cases(regression_cases())
+        if args.save_baseline:
+            save_baseline(args.save_baseline, results)
+            print("%d cases saved to %s" % (len(results), args.save_baseline))
+        if args.check:
+            regressions = compare_with_baseline(args.check, results, args.max_ratio)
+            print("%d cases, %d regressions" % (len(results), len(regressions)))
+            return 1 if regressions else 0
+        return 0
+    for name in args.names or sorted(BENCHMARKS):
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
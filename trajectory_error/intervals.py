@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# A set of disjoint intervals of the real line, for the backtracking sweep of
+# trajectory_error: the arc lengths of the theoretical path already covered by
+# the experimental path.
+#
+# The intervals are the nodes of a treap, a binary search tree balanced by random
+# priorities: its depth is O(log n) on average, whatever the order in which the
+# intervals are added. The intervals being disjoint, they are sorted by their
+# starts and by their ends alike. Adding an interval splits the tree around the
+# intervals it meets, merges them into one node, and joins the three trees back:
+# O(log n) operations, plus the intervals merged, each of which is merged once
+# only. A query walks down to the first interval met, in O(log n), then along
+# the intervals met.
+
+import random
+
+
+class _Node:
+    """
+    An interval of an IntervalSet, and the subtree of the intervals around it.
+    """
+    __slots__ = ("start", "end", "priority", "left", "right")
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+
+
+def _split_ending_before(node, start):
+    """
+    arg1 node : a _Node or None, the root of a tree.
+    arg2 start : a float.
+    return : before, after. The trees of the intervals ending before start, and
+    of the others.
+    """
+    if node is None:
+        return None, None
+    if node.end < start:
+        node.right, after = _split_ending_before(node.right, start)
+        return node, after
+    before, node.left = _split_ending_before(node.left, start)
+    return before, node
+
+
+def _split_starting_after(node, end):
+    """
+    arg1 node : a _Node or None, the root of a tree.
+    arg2 end : a float.
+    return : before, after. The trees of the intervals starting at end or before,
+    and of the others.
+    """
+    if node is None:
+        return None, None
+    if node.start <= end:
+        node.right, after = _split_starting_after(node.right, end)
+        return node, after
+    before, node.left = _split_starting_after(node.left, end)
+    return before, node
+
+
+def _join(before, after):
+    """
+    arg1,2 before, after : two _Nodes or None, the roots of two trees, the
+    intervals of before all preceding those of after.
+    return : a _Node or None, the root of the tree of all the intervals.
+    """
+    if before is None:
+        return after
+    if after is None:
+        return before
+    if before.priority > after.priority:
+        before.right = _join(before.right, after)
+        return before
+    after.left = _join(before, after.left)
+    return after
+
+
+def _walk(node):
+    """
+    arg1 node : a _Node or None, the root of a tree.
+    return : an iterator on the tuples (start, end) of the tree, in increasing order.
+    """
+    stack = []
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        yield node.start, node.end
+        node = node.right
+
+
+class IntervalSet:
+    """
+    A set of disjoint closed intervals [start, end].
+
+    >>> covered = IntervalSet()
+    >>> covered.add(0, 5), covered.add(7, 8), covered.add(3, 10)
+    ([], [], [(3, 5), (7, 8)])
+    >>> list(covered), covered.length()
+    ([(0, 10)], 10)
+    """
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return _walk(self._root)
+
+    def __repr__(self):
+        return "IntervalSet(%r)" % list(self)
+
+    def overlaps(self, start, end):
+        """
+        Find the parts of an interval which are in the set.
+        arg1,2 start, end : two floats, start <= end.
+        return : a list of tuples (start, end), the parts of the interval covered
+        by the set, in increasing order. Parts of null length are left out.
+        """
+        # the ancestors of the first interval ending at start or after, which follow it:
+        stack = []
+        node = self._root
+        while node is not None:
+            if node.end < start:
+                node = node.right
+            else:
+                stack.append(node)
+                node = node.left
+        parts = []
+        while stack:
+            node = stack.pop()
+            if node.start > end:
+                break
+            part = (max(start, node.start), min(end, node.end))
+            if part[0] < part[1]:
+                parts.append(part)
+            node = node.right
+            while node is not None:
+                stack.append(node)
+                node = node.left
+        return parts
+
+    def add(self, start, end):
+        """
+        Add an interval to the set, merging it with the intervals it meets.
+        arg1,2 start, end : two floats, start <= end.
+        return : a list of tuples (start, end), the parts of the interval which
+        were already in the set, as given by overlaps.
+        """
+        before, rest = _split_ending_before(self._root, start)
+        meeting, after = _split_starting_after(rest, end)
+        met = list(_walk(meeting))
+        parts = []
+        for part in met:
+            part = (max(start, part[0]), min(end, part[1]))
+            if part[0] < part[1]:
+                parts.append(part)
+        if met:
+            start = min(start, met[0][0])
+            end = max(end, met[-1][1])
+        self._root = _join(_join(before, _Node(start, end)), after)
+        self._size += 1 - len(met)
+        return parts
+
+    def length(self):
+        """
+        return : a float, the total length of the intervals.
+        """
+        return sum(end - start for start, end in self)
@@ -7,10 +7,14 @@
 # In[1]:
 
 
+from array import array
 from math import sqrt
 import doctest
+import time
 import numpy as np
-import numpy.linalg as lin
+
+from predicates import cross_sign, intersection_parameter, nearly_aligned, orient2d
+from solution import Columns, PreparedPath, _as_columns, _is_buffer, trajectory_error_vectorized
 
 # In[2]:
 
@@ -20,16 +24,32 @@ class Point:
     """
     Represents points in the plane, with two attributes :
     x representing the abscissa and y representing the ordinate.
+    Points are immutable, hashable, and have no __dict__ to keep them small.
     """
     
+    __slots__ = ("x", "y")
+    
     def __init__(self, x,y):
         """
         Constructor.
         arg1 x : the abscissa of the point
         arg2 y : the ordinate of the point
         """
-        self.x = x
-        self.y = y
+        _set_x(self, x)
+        _set_y(self, y)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Point objects are immutable")
+    
+    def __reduce__(self):
+        # pickle and copy build the Point again, instead of setting its slots:
+        return (Point, (self.x, self.y))
+    
+    def __repr__(self):
+        return "Point(%r, %r)" % (self.x, self.y)
+    
+    def __hash__(self):
+        return hash((self.x, self.y))
     
     def distance(self,point):
         """
@@ -53,6 +73,10 @@ class Point:
         """
         return(self.x == other.x and self.y == other.y)
 
+# the slots are written directly, as __setattr__ forbids it:
+_set_x = Point.x.__set__
+_set_y = Point.y.__set__
+
 doctest.testmod()
 
 # In[3]:
@@ -63,23 +87,92 @@ class Segment:
     """
     Represents a segment in the plane.
     Attributes : p1 and p2, of class Point, representing the two extremities of the segment.
+    Segments are immutable, like Points, so their derived geometry (direction,
+    length, slope, bounding box...) is computed once and cached: the direction
+    and the squared length when the segment is built, the others on first use.
     """
     
+    __slots__ = ("p1", "p2", "direction", "squared_length",
+                 "_length", "_slope", "_intercept", "_bounding_box")
+    
     def __init__(self,p1,p2):
         """
         Constructor.
         arg1 p1 : the first point of the segment.
         arg2 p2 : the second point of the segment.
         """
-        self.p1 = p1
-        self.p2 = p2
+        _set_p1(self, p1)
+        _set_p2(self, p2)
+        dx = p2.x - p1.x
+        dy = p2.y - p1.y
+        _set_direction(self, (dx, dy))
+        _set_squared_length(self, dx*dx + dy*dy)
+        _set_length(self, None)
+        _set_slope(self, None)
+        _set_intercept(self, None)
+        _set_bounding_box(self, None)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Segment objects are immutable")
+    
+    def __reduce__(self):
+        # pickle and copy build the Segment again, its cache is computed again:
+        return (Segment, (self.p1, self.p2))
+    
+    def __repr__(self):
+        return "Segment(%r, %r)" % (self.p1, self.p2)
+    
+    @property
+    def normal(self):
+        """
+        The direction rotated by a quarter turn, counterclockwise: a tuple (-dy, dx).
+        """
+        dx, dy = self.direction
+        return (-dy, dx)
+    
+    @property
+    def is_vertical(self):
+        """
+        True iff the two extremities have the same abscissa.
+        """
+        return self.direction[0] == 0
+    
+    @property
+    def slope(self):
+        """
+        The slope a of the line y = a*x + b containing the segment, None for a vertical segment.
+        """
+        if self._slope is None and not self.is_vertical:
+            _set_slope(self, self.direction[1] / self.direction[0])
+        return self._slope
+    
+    @property
+    def intercept(self):
+        """
+        The intercept b of the line y = a*x + b containing the segment, None for a vertical segment.
+        """
+        if self._intercept is None and not self.is_vertical:
+            _set_intercept(self, self.p1.y - self.slope * self.p1.x)
+        return self._intercept
+    
+    @property
+    def bounding_box(self):
+        """
+        A tuple (xmin, ymin, xmax, ymax), the smallest rectangle containing the segment.
+        """
+        if self._bounding_box is None:
+            _set_bounding_box(self, (min(self.p1.x, self.p2.x), min(self.p1.y, self.p2.y),
+                                     max(self.p1.x, self.p2.x), max(self.p1.y, self.p2.y)))
+        return self._bounding_box
         
     def length(self):
         """
         Compute the length of a segment.
         return : a float, the length of the segment.
         """
-        return((self.p1).distance(self.p2))
+        if self._length is None:
+            _set_length(self, sqrt(self.squared_length))
+        return self._length
     
     def path_length(path):
         """
@@ -100,25 +193,21 @@ class Segment:
         """
         # A necessary condition is that the segment and point are aligned.
         # Otherwise point can't be in the segment.
-        # compute the cross product of the points : if it is 0, it means they are not aligned.
-        # Given the calculation performed, if the result is a float we consider that
-        # if it is smaller than 10**(-10), it is zero up to machine error.
-        cross_product = (point.y - self.p1.y) * (self.p2.x - self.p1.x)\
-                       - (point.x - self.p1.x) * (self.p2.y - self.p1.y)
-        if (isinstance(cross_product, int) and abs(cross_product) != 0)\
-        or (isinstance(cross_product,float) and abs(cross_product) > 0.0000000001):
+        # point is often an orthogonal projection, computed with floats, so it is
+        # only aligned up to the rounding of its coordinates (see predicates.py).
+        p1, p2 = self.p1, self.p2
+        if not nearly_aligned(p1.x, p1.y, p2.x, p2.y, point.x, point.y):
             return False
 
         # Now, the case when the points are aligned : we compute the dot product
         # between (point - self.p1) and (self.p2 and self.p1).
-        dot_product = (point.x - self.p1.x)*(self.p2.x - self.p1.x)\
-                     + (point.y - self.p1.y)*(self.p2.y - self.p1.y)
+        dx, dy = self.direction
+        dot_product = (point.x - p1.x)*dx + (point.y - p1.y)*dy
         if dot_product < 0:
             # Then point is beyond self.p1, not between the two points.
             return False
 
-        squared_segment_length = self.length()**2
-        if dot_product > squared_segment_length:
+        if dot_product > self.squared_length:
             # Then point is beyond self.p2, not between the two points.
             return False
 
@@ -129,48 +218,35 @@ class Segment:
         Compute the intersection of two segments, if any.
         arg1 other : a Segment, the one with which we want to compute the intersection
         return intersect : a Point, the intersection of the two segments.
-        Remark : if the intersection is not in the two segments, return None.
+        Remark : if the intersection is in none of the two segments, return None.
+        The tests are made with the exact predicates of predicates.py, as in solution.intersection.
+        
+        >>> Segment(Point(0,0), Point(2,2)).intersection(Segment(Point(0,2), Point(2,0)))
+        Point(1.0, 1.0)
         """
-        # First case : the two lines are vertical
-        if (self.p1.x == self.p2.x and other.p1.x  == other.p1.y) :
-            intersect = None
-
-        # Second case : only the first line is vertical
-        elif self.p1.x == self.p2.x :
-            a = (other.p1.y-other.p2.y)/(other.p1.x-other.p1.y)
-            b = other.p2.y - a * other.p1.y
-            intersect = Point(self.p1.x,a*self.p1.x + b)
-
-        # Third case : only the second line is vertical
-        elif other.p1.x  == other.p1.y :
-            a = (self.p1.y-self.p2.y)/(self.p1.x-self.p2.x)
-            b = self.p2.y - a * self.p2.x
-            intersect = Point(other.p1.x,a*other.p1.x + b)
-
-        # Last case : general case
-        else :
-            a_x = (self.p1.y - self.p2.y)/(self.p1.x - self.p2.x)
-            b_x = self.p1.y - a_x * self.p1.x
-            a_y = (other.p1.y - other.p2.y)/(other.p1.x - other.p1.y)
-            b_y = other.p1.y - a_y * other.p1.x
-
-            if a_x == a_y :
-                # Case where the lines are parallel
-                intersect = None
-
-            else :
-                #The equations are
-                #y = a_x*x + b_x
-                #y = a_y*x + b_y
-                # The solution is the inverted matrix
-                intersect = Point( (b_y-b_x)/(a_x-a_y),\
-                              (b_y * a_x - b_x * a_y)/(a_x - a_y) )
-        # If a point is found, check if it belongs to the segments and not only the lines (self.p1.x<intersect[0]<self.p2.x or...)
-        if intersect :
-            if not self.point_belongs_to_segment(intersect):
-                intersect = None
-
-        return(intersect)
+        p1, p2, q1, q2 = self.p1, self.p2, other.p1, other.p2
+        # Parallel lines, or a segment reduced to a point: no intersection.
+        if cross_sign(p1.x, p1.y, p2.x, p2.y, q1.x, q1.y, q2.x, q2.y) == 0:
+            return None
+
+        # The intersection of the lines belongs to other iff its extremities are not
+        # strictly on the same side of the line of self, and conversely.
+        side_q1 = orient2d(p1.x, p1.y, p2.x, p2.y, q1.x, q1.y)
+        side_q2 = orient2d(p1.x, p1.y, p2.x, p2.y, q2.x, q2.y)
+        side_p1 = orient2d(q1.x, q1.y, q2.x, q2.y, p1.x, p1.y)
+        side_p2 = orient2d(q1.x, q1.y, q2.x, q2.y, p2.x, p2.y)
+        if side_q1 * side_q2 > 0 and side_p1 * side_p2 > 0:
+            return None
+
+        # An extremity on the other line is the intersection, exactly.
+        for side, point in ((side_q1, q1), (side_q2, q2), (side_p1, p1), (side_p2, p2)):
+            if side == 0:
+                return point
+
+        # Otherwise the intersection is p1 + t * self.direction.
+        t = intersection_parameter(p1.x, p1.y, p2.x, p2.y, q1.x, q1.y, q2.x, q2.y)
+        dx, dy = self.direction
+        return Point(p1.x + t*dx, p1.y + t*dy)
     
     def orthogonal_projection(self,point):
         """
@@ -181,36 +257,39 @@ class Segment:
         if self.point_belongs_to_segment(point):
             new_point = point
 
-        # Now we want to find the equation of the line containing the segment.
-        # We have to tackle the case of the vertical line first, because then
-        # we can't find a slope. Then we can tackle the other case,
-        # with a slope and intercept.
-
-        elif self.p1.x == self.p2.x :
-            # First case : the line containing the segment is vertical
-            new_point = Point(self.p1.x,point.y)
-
         else :
-        # Second case : the line containing the segment is not vertical,
-        # so we look for its slope and intercept.
-            a = (self.p2.y - self.p1.y)/(self.p2.x - self.p1.x)
-            b = self.p1.y - a * self.p1.x
-            # Now we know the line containing the segment has the equation y = a * x + b
-            # So a normal vector to this line is (a,-1)
-            # This vector is directing the normal line passing by the point y
-            # and its equation is - x - a * y + c = 0 :
-            # let's find c!
-            c = point.x + a * point.y
-            # Now the intersection point is the point (x,y) which verifies :
-            # a*x - y = -b
-            # -x - a*y = -c
-            # We find it by inverting the matrix.
-            mat = np.array([[a,-1],[-1,-a]])
-            point_vector = np.dot(lin.inv(mat), np.array([-b,-c]))
-            new_point = Point(point_vector[0],point_vector[1])
+            # The line containing the segment is self.p1 + t * d, with d = self.p2 - self.p1.
+            # The projection of point is the point of the line such that
+            # point - (self.p1 + t * d) is orthogonal to d, that is t = (point - self.p1).d / d.d
+            # This works for vertical lines as well, no slope is needed.
+            dx, dy = self.direction
+            if self.squared_length == 0:
+                # the segment is a point, which is its own projection
+                new_point = self.p1
+            else:
+                t = ((point.x - self.p1.x)*dx + (point.y - self.p1.y)*dy) / self.squared_length
+                new_point = Point(self.p1.x + t*dx, self.p1.y + t*dy)
 
         return new_point
     
+    def orthogonal_projections(self, points):
+        """
+        Compute the orthogonal projections of many points on the line containing the segment.
+        arg1 points : a list of Points, or an array of shape (N,2).
+        return : an array of shape (N,2), the orthogonal projections of the points.
+        Remark : if the segment is a point, every point is projected on it.
+        """
+        if len(points) and isinstance(points[0], Point):
+            points = [(point.x, point.y) for point in points]
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        start = np.array([self.p1.x, self.p1.y], dtype=float)
+        direction = np.array([self.p2.x, self.p2.y], dtype=float) - start
+        squared_segment_length = direction.dot(direction)
+        if squared_segment_length == 0:
+            return np.repeat(start[None,:], len(points), axis=0)
+        t = (points - start).dot(direction) / squared_segment_length
+        return start + t[:,None] * direction
+    
     def compute_area(self, other):               
         """ 
         Compute the area of the quadrilateral formed by the two segments self and other.
@@ -239,6 +318,15 @@ class Segment:
 
         return area
     
+_set_p1 = Segment.p1.__set__
+_set_p2 = Segment.p2.__set__
+_set_direction = Segment.direction.__set__
+_set_squared_length = Segment.squared_length.__set__
+_set_length = Segment._length.__set__
+_set_slope = Segment._slope.__set__
+_set_intercept = Segment._intercept.__set__
+_set_bounding_box = Segment._bounding_box.__set__
+
 
 # In[4]:
 
@@ -282,90 +370,283 @@ class Trajectory:
     def __init__(self,theo,expe):
         """
         Constructor.
-        arg1 theo : a list of Points, theoretical path
-        arg2 expe : a list of Points, experimental path, the real one         
+        arg1 theo : a list of Points or a Polyline, theoretical path, or a PreparedPath (see Trajectory.prepare)
+        arg2 expe : a list of Points or a Polyline, experimental path, the real one         
+        Both paths can also be given as Columns (see solution.py), the abscissas and
+        the ordinates in two sequences or buffers, or as one buffer: an array or a
+        memoryview of shape (N,2), or an array('d') of interleaved coordinates,
+        without a Point per point.
         """
         self.theo = theo
         self.expe = expe
     
-    def trajectory_error(self):
+    @staticmethod
+    def prepare(theo):
+        """
+        Prepare a theoretical path once, to compare it with many experimental paths.
+        arg1 theo : a list of Points, a Polyline, Columns or a buffer, theoretical path
+        return : a PreparedPath, to give to the constructor in place of the list of Points.
+        """
+        return PreparedPath(_coordinates(theo))
+    
+    @staticmethod
+    def drop_repeated_points(points, tolerance=0):
+        """
+        Collapse the runs of repeated Points of an experimental path, as
+        drop_repeated_points of solution.py does for tuples: each run is replaced by its first Point.
+        arg1 points : a list of Points or a Polyline, experimental path
+        arg2 tolerance : a float. With 0, only the Points equal to the previous one are
+        dropped. Otherwise the Points closer than tolerance to the first Point of their
+        run are dropped too; the last Point is always kept.
+        return : a list of Points, or a Polyline if points is one.
+        
+        >>> Trajectory.drop_repeated_points([Point(0,0), Point(1,1), Point(1,1), Point(2,0)])
+        [Point(0, 0), Point(1, 1), Point(2, 0)]
+        """
+        last = len(points) - 1
+        kept = []
+        for k, point in enumerate(points):
+            # the last Point of kept is the first Point of the current run:
+            if not kept or (point != kept[-1] and (k == last or kept[-1].distance(point) >= tolerance)):
+                kept.append(point)
+        if isinstance(points, Polyline):
+            return Polyline.from_points(kept)
+        return kept
+    
+    def trajectory_error(self, stats=None):
         """
         Compute the error between the theoretical and the experimental trajectories,
         in the format decided, that is, the area between the two paths divided by
         the length of the theoretical path.
-        arg1 coord_th : a list of Points. The path which should be followed.
-        arg2 coord_exp: a list of Points. The points received from the "indoors-gps"
+        When either path is a PreparedPath, Columns, a buffer or a Polyline, whose
+        coordinates are already in an array, the array engine of solution.py is used.
+        arg1 stats : None, or a SweepStats (see solution.py) to fill with the counters of the sweep.
+        A PreparedPath and Columns are then swept step by step, as lists of Points.
         return: error, the total area difference betweeen the theoretical trajectory
         and the experimental one, divided by the length of the theoretical path.
         """
+        theo, expe = self.theo, self.expe
+        # a buffer is read as two columns, without a Point per point:
+        if _is_buffer(theo):
+            theo = Columns(*_as_columns(theo))
+        if _is_buffer(expe):
+            expe = Columns(*_as_columns(expe))
+        if isinstance(theo, (PreparedPath, Columns, Polyline)) or isinstance(expe, (Columns, Polyline)):
+            if stats is None:
+                # the segments are already computed, or the coordinates already
+                # in arrays, use the array engine:
+                return trajectory_error_vectorized(theo if isinstance(theo, PreparedPath) else _coordinates(theo),
+                                                   _coordinates(expe))
+            if isinstance(theo, (PreparedPath, Columns)):
+                theo = [Point(x, y) for x, y in theo]
+            if isinstance(expe, Columns):
+                expe = [Point(x, y) for x, y in expe]
+        
+        # the helpers of the sweep, wrapped to be counted if asked:
+        intersection = Segment.intersection
+        orthogonal_projection = Segment.orthogonal_projection
+        compute_area = Segment.compute_area
+        if stats is not None:
+            intersection = stats.timed("intersection", intersection)
+            # the names of solution.py, so that both engines fill the same keys:
+            orthogonal_projection = stats.timed("ortogonal_projection", orthogonal_projection)
+            compute_area = stats.timed("compute_area", compute_area)
+            start = time.perf_counter()
+        
         # initialize values:
         area = 0 # the total area between the theoretical and experimental paths
-        distance = Segment.path_length(self.theo) # total theoretical path length
+        distance = Segment.path_length(theo) # total theoretical path length
         j = 0 # iterator over the experimental path
         i = 0 # iterator over the theoretical path
 
         # start iterations:
-        while (i+1 < len(self.theo) and j+1 < len(self.expe)):     
-            # we work on a subsegment [coord_th[i], coord_th[i+1]]        
+        while (i+1 < len(theo) and j+1 < len(expe)):     
+            if theo[i] == theo[i+1]:
+                # a theoretical segment of null length has no direction to project on:
+                # it is left at once, as if the repeated Point were dropped, as in a PreparedPath.
+                i += 1 # advance along the theoretical path
+                if stats is not None:
+                    stats.count("advance")
+                continue
+            # we work on a subsegment [coord_th[i], coord_th[i+1]], built once for the step
+            splitting_segment = Segment(theo[i], theo[i+1])
+            experimental_segment = Segment(expe[j], expe[j+1])
             # search for an intersection:
-            intersect_point = Segment(self.theo[i], self.theo[i+1]).intersection(Segment(self.expe[j], self.expe[j+1]))
+            intersect_point = intersection(splitting_segment, experimental_segment)
             # compute orthogonal projections:
-            splitting_segment = Segment(self.theo[i], self.theo[i+1])
-            ort_proj1 =  splitting_segment.orthogonal_projection(self.expe[j])
-            ort_proj2 =  splitting_segment.orthogonal_projection(self.expe[j+1])
+            ort_proj1 =  orthogonal_projection(splitting_segment, expe[j])
+            ort_proj2 =  orthogonal_projection(splitting_segment, expe[j+1])
 
             if intersect_point:
 
-                if intersect_point == self.theo[i+1] == self.expe[j]:
+                if intersect_point == theo[i+1] == expe[j]:
                     # we're outside of the subsegment
+                    branch = "advance"
                     i += 1 # advance along the theoretical path                 
 
                 elif splitting_segment.point_belongs_to_segment(ort_proj1)\
                 and splitting_segment.point_belongs_to_segment(ort_proj2):
                     # Before the intersection:
                     # the points form the right triangle -> coord_exp[j], its projection, intersection
-                    base = Segment(ort_proj1,intersect_point).length()
-                    height =  Segment(self.expe[j], ort_proj1).length()
+                    base = ort_proj1.distance(intersect_point)
+                    height =  expe[j].distance(ort_proj1)
                     area += Triangle.area_right_triangle(base, height)
 
                     # After the intersection:
                     # the points form the right triangle -> intersect_point, coord_exp[j+1], its projection
-                    base = Segment(intersect_point, ort_proj2).length()
-                    height =  Segment(self.expe[j+1], ort_proj2).length()
+                    base = intersect_point.distance(ort_proj2)
+                    height =  expe[j+1].distance(ort_proj2)
                     area += Triangle.area_right_triangle(base, height)
 
+                    branch = "cross_on"
                     j += 1 # advance along the experimental path 
 
                 else:
                     # Before the intersection:
                     # the points form the right triangle -> expe[j], its projection, intersect_point
-                    base = Segment(self.expe[j], intersect_point).length()
-                    height = Segment(self.theo[i],\
-                                     Segment(self.expe[j],intersect_point).orthogonal_projection(self.theo[i])).length()
+                    base = expe[j].distance(intersect_point)
+                    height = theo[i].distance(\
+                                     orthogonal_projection(Segment(expe[j],intersect_point), theo[i]))
                     area += Triangle.area_right_triangle(base, height)
 
                     # After the intersection:
                     # the points form the right triangle -> intersect_point, coord_exp[j+1], its projection
-                    base = Segment(intersect_point, self.expe[j+1]).length()
-                    height = Segment(self.theo[i+1],\
-                                    Segment(self.expe[j+1],intersect_point).orthogonal_projection(self.theo[i+1])).length()
+                    base = intersect_point.distance(expe[j+1])
+                    height = theo[i+1].distance(\
+                                    orthogonal_projection(Segment(expe[j+1],intersect_point), theo[i+1]))
                     area += Triangle.area_right_triangle(base, height)
 
+                    branch = "cross_off"
                     j += 1 # advance along the experimental path 
 
-            elif Segment(self.theo[i],self.theo[i+1]).point_belongs_to_segment(ort_proj1)\
-            and Segment(self.theo[i],self.theo[i+1]).point_belongs_to_segment(ort_proj2):     
+            elif splitting_segment.point_belongs_to_segment(ort_proj1)\
+            and splitting_segment.point_belongs_to_segment(ort_proj2)\
+            or expe[j] == expe[j+1]:
+                # an experimental segment of null length, a repeated Point, is consumed
+                # wherever its projection is, with an area of 0: as if it were dropped.
 
-                area += Segment(ort_proj1, ort_proj2).compute_area(Segment(self.expe[j], self.expe[j+1]))
+                area += compute_area(Segment(ort_proj1, ort_proj2), experimental_segment)
+                branch = "quad"
                 j += 1 # advance along the experimental path  
 
             else:
                 # we're outside of the subsegment
+                branch = "advance"
                 i += 1 # advance along the theoretical path
+            
+            if stats is not None:
+                stats.count(branch)
 
+        if stats is not None:
+            stats.seconds["total"] += time.perf_counter() - start
         return area / distance
     
 
+# In[6]:
+
+
+class Polyline:
+    
+    """
+    A sequence of Points stored in one contiguous buffer of floats (x0, y0, x1, y1, ...),
+    instead of one object per point. It behaves like a list of Points: the Points are
+    built when they are accessed, and can be used wherever a list of Points is expected.
+    Attribute : coordinates, an array('d') of the interleaved coordinates.
+    """
+    
+    __slots__ = ("coordinates",)
+    
+    def __init__(self, coordinates=()):
+        """
+        Constructor.
+        arg1 coordinates : an iterable of floats (x0, y0, x1, y1, ...), or an array of shape (N,2).
+        """
+        if isinstance(coordinates, np.ndarray):
+            coordinates = np.ascontiguousarray(coordinates, dtype=float).ravel()
+        self.coordinates = array('d', coordinates)
+        if len(self.coordinates) % 2:
+            raise ValueError("a Polyline needs an even number of coordinates")
+    
+    @classmethod
+    def from_points(cls, points):
+        """
+        arg1 points : a list of Points.
+        return : a Polyline with the same points.
+        """
+        coordinates = array('d')
+        for point in points:
+            coordinates.append(point.x)
+            coordinates.append(point.y)
+        return cls(coordinates)
+    
+    def __len__(self):
+        return len(self.coordinates) // 2
+    
+    def __getitem__(self, i):
+        """
+        arg1 i : an int, or a slice.
+        return : the Point of index i, or a Polyline of the points of the slice.
+        """
+        if isinstance(i, slice):
+            return Polyline(self.as_array()[i])
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("Polyline index out of range")
+        return Point(self.coordinates[2*i], self.coordinates[2*i+1])
+    
+    def __iter__(self):
+        coordinates = self.coordinates
+        for k in range(0, len(coordinates), 2):
+            yield Point(coordinates[k], coordinates[k+1])
+    
+    def append(self, point):
+        """
+        Add a Point at the end of the polyline.
+        arg1 point : a Point.
+        """
+        self.coordinates.append(point.x)
+        self.coordinates.append(point.y)
+    
+    def segment(self, i):
+        """
+        arg1 i : an int.
+        return : the Segment between the points i and i+1.
+        """
+        return Segment(self[i], self[i+1])
+    
+    def as_array(self):
+        """
+        The view exports the buffer of coordinates: while it, or an array made
+        from it without a copy, is alive, append raises BufferError, as the
+        buffer cannot be resized. Release it first, or keep a copy instead
+        (a PreparedPath copies the coordinates it is given).
+        return : an array of shape (N,2), sharing its memory with the polyline.
+        """
+        return np.frombuffer(self.coordinates, dtype=float).reshape(-1, 2)
+    
+    def length(self):
+        """
+        return : a float, the total length of the path made of the points.
+        """
+        return float(np.hypot(*np.diff(self.as_array(), axis=0).T).sum())
+
+
+def _coordinates(points):
+    """
+    Convert Points to an array of coordinates.
+    arg1 points : a list of Points, a Polyline, Columns or a buffer (see Trajectory).
+    return : an array of shape (N,2), or the Columns, which the array engine reads as they are.
+    """
+    if isinstance(points, Columns):
+        return points
+    if _is_buffer(points):
+        return Columns(*_as_columns(points))
+    if isinstance(points, Polyline):
+        return points.as_array()
+    return np.array([(point.x, point.y) for point in points], dtype=float).reshape(-1, 2)
+
+
 # In[ ]:
 
 
@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Loading of the oracles of https://github.com/rouvoy/indoor-location-oracles
+#
+# An oracle is a text file of six lines: the abscissas and the ordinates of the
+# theoretical path, the abscissas and the ordinates of the experimental path
+# (comma-separated), the expected result of trajectory_error, and the error
+# allowed on it.
+#
+# Parsing thousands of files with float() takes longer than scoring them, so
+# load_oracles keeps a cache of the parsed arrays in one .npz file per directory
+# of oracles, in CACHE_DIRECTORY: never next to the oracles, which are a git
+# submodule that must stay clean. The entries are keyed by a hash of the content
+# of the files: a file which did not change is read back from the cache, without
+# being parsed.
+#
+# The module is also the regression runner of the oracles: it scores every
+# oracle of a directory with trajectory_error on a process pool, and writes a
+# JSON or JUnit report with the result, the wall time and the number of points
+# of each oracle. Run from this directory:
+#     python oracles.py [directory] --json report.json --junit report.xml
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import solution as sl
+
+Oracle = namedtuple("Oracle", ["name", "theoretical", "experimental", "expected", "tolerance"])
+Oracle.__doc__ = """
+An oracle test.
+name : a string, the name of the file.
+theoretical, experimental : two arrays of shape (N,2), the paths.
+expected : a float, the expected result of trajectory_error.
+tolerance : a float, the error allowed on the result.
+"""
+
+OracleResult = namedtuple("OracleResult", ["name", "passed", "result", "expected", "tolerance",
+                                           "seconds", "theoretical_points", "experimental_points",
+                                           "exception"])
+OracleResult.__doc__ = """
+The result of one oracle of run_oracles.
+name : a string, the name of the oracle.
+passed : a bool, True iff the result is within the tolerance of the expected value.
+result : a float, the result of trajectory_error, or None if it failed.
+expected, tolerance : two floats, from the oracle.
+seconds : a float, the wall time of trajectory_error.
+theoretical_points, experimental_points : two ints, the sizes of the paths.
+exception : None, or a string describing the exception raised by trajectory_error.
+"""
+
+# the cache of load_oracles, ignored by git:
+CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".oracles-cache")
+
+# the oracles are the git submodule indoor-location-oracles, at the root of the repository:
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 "indoor-location-oracles", "Oracles")
+
+
+def parse_oracle(text, name=""):
+    """
+    Parse the content of an oracle file.
+    arg1 text : a string, the content of the file.
+    arg2 name : a string, the name of the oracle, used in the error messages.
+    return : an Oracle.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) < 6:
+        raise ValueError("oracle %r has %d lines, 6 expected" % (name, len(lines)))
+    # numpy converts the strings to floats, without a Python loop:
+    axes = [np.array(line.split(","), dtype=float) for line in lines[:4]]
+    for x, y in (axes[:2], axes[2:]):
+        if len(x) != len(y):
+            raise ValueError("oracle %r has %d abscissas and %d ordinates" % (name, len(x), len(y)))
+    return Oracle(name, np.stack(axes[:2], axis=1), np.stack(axes[2:], axis=1),
+                  float(lines[4]), float(lines[5]))
+
+
+def read_oracle(path):
+    """
+    Read an oracle file.
+    arg1 path : a string, the path to the file.
+    return : an Oracle.
+    """
+    with open(path, mode='r') as oracle:
+        return parse_oracle(oracle.read(), os.path.basename(path))
+
+
+def _content_hash(content):
+    """
+    arg1 content : a bytes, the content of a file.
+    return : a string, the hexadecimal digest of the content.
+    """
+    return hashlib.sha1(content).hexdigest()
+
+
+def _cache_path(cache_directory, directory, pattern):
+    """
+    arg1 cache_directory : a string, the directory of the caches.
+    arg2 directory : a string, the directory of the oracles.
+    arg3 pattern : a string, the pattern of the names of the oracle files.
+    return : a string, the path to the .npz cache of these oracles.
+    """
+    key = _content_hash(("%s\n%s" % (os.path.abspath(directory), pattern)).encode())
+    return os.path.join(cache_directory, "%s.npz" % key)
+
+
+def _read_cache(path):
+    """
+    Read the cache of load_oracles.
+    arg1 path : a string, the path to the .npz file.
+    return : a dict {hash: (theoretical, experimental, expected, tolerance)}, empty if there is no usable cache.
+    """
+    try:
+        with np.load(path) as cache:
+            hashes = cache["hashes"]
+            theoretical = np.split(cache["theoretical"], cache["theoretical_ends"][:-1])
+            experimental = np.split(cache["experimental"], cache["experimental_ends"][:-1])
+            expected, tolerance = cache["expected"], cache["tolerance"]
+    except (OSError, KeyError, ValueError):
+        return {}
+    return {str(key): (th, ex, float(e), float(t))
+            for key, th, ex, e, t in zip(hashes, theoretical, experimental, expected, tolerance)}
+
+
+def _write_cache(path, entries):
+    """
+    Write the cache of load_oracles. The file is replaced at once, so that a
+    run interrupted while writing does not leave a broken cache.
+    arg1 path : a string, the path to the .npz file.
+    arg2 entries : a dict {hash: (theoretical, experimental, expected, tolerance)}.
+    return : a bool, False if the cache could not be written.
+    """
+    values = list(entries.values())
+    theoretical = [value[0] for value in values]
+    experimental = [value[1] for value in values]
+    temporary = path + ".tmp.npz"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(temporary,
+                 hashes=np.array(list(entries), dtype=str),
+                 theoretical=np.concatenate(theoretical) if values else np.zeros((0,2)),
+                 theoretical_ends=np.cumsum([len(th) for th in theoretical], dtype=int),
+                 experimental=np.concatenate(experimental) if values else np.zeros((0,2)),
+                 experimental_ends=np.cumsum([len(ex) for ex in experimental], dtype=int),
+                 expected=np.array([value[2] for value in values], dtype=float),
+                 tolerance=np.array([value[3] for value in values], dtype=float))
+        os.replace(temporary, path)
+    except OSError:
+        # the cache only saves time: without it (read-only or full disk), the oracles are parsed
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def oracle_files(directory, pattern="*.txt"):
+    """
+    List the oracle files of a directory.
+    arg1 directory : a string, the directory of the oracles.
+    arg2 pattern : a string, the pattern of the names of the oracle files.
+    return : a sorted list of strings, the paths to the files.
+    """
+    return sorted(glob.glob(os.path.join(glob.escape(directory), pattern)))
+
+
+def load_oracles(directory, pattern="*.txt", cache=True, cache_directory=None):
+    """
+    Read all the oracles of a directory.
+    arg1 directory : a string, the directory of the oracles.
+    arg2 pattern : a string, the pattern of the names of the oracle files.
+    arg3 cache : a bool, use (and update) the cache of the parsed oracles.
+    A cache which cannot be written is ignored.
+    arg4 cache_directory : a string, the directory of the cache, out of the directory
+    of the oracles. None uses CACHE_DIRECTORY.
+    return : a list of Oracles, sorted by name.
+    """
+    if cache_directory is None:
+        cache_directory = CACHE_DIRECTORY
+    cache_path = _cache_path(cache_directory, directory, pattern)
+    cached = _read_cache(cache_path) if cache else {}
+    cached_keys = set(cached)
+    entries = {}
+    oracles = []
+    for path in oracle_files(directory, pattern):
+        name = os.path.basename(path)
+        with open(path, mode='rb') as oracle:
+            content = oracle.read()
+        key = _content_hash(content)
+        if key not in cached:
+            parsed = parse_oracle(content.decode(), name)
+            cached[key] = parsed[1:]
+        entries[key] = cached[key]
+        oracles.append(Oracle(name, *cached[key]))
+    # rewrite the cache when an oracle was added, changed or removed:
+    if cache and entries.keys() != cached_keys:
+        _write_cache(cache_path, entries)
+    return oracles
+
+
+def run_oracle(oracle):
+    """
+    Score one oracle with trajectory_error. This runs in the worker processes.
+    arg1 oracle : an Oracle.
+    return : an OracleResult.
+    """
+    # trajectory_error works on lists of tuples of Python floats:
+    theoretical = [tuple(point) for point in oracle.theoretical.tolist()]
+    experimental = [tuple(point) for point in oracle.experimental.tolist()]
+    start = time.perf_counter()
+    try:
+        result, exception = float(sl.trajectory_error(theoretical, experimental)), None
+    except Exception as error:
+        result, exception = None, "%s: %s" % (type(error).__name__, error)
+    seconds = time.perf_counter() - start
+    passed = result is not None\
+             and oracle.expected - oracle.tolerance < result < oracle.expected + oracle.tolerance
+    return OracleResult(oracle.name, passed, result, oracle.expected, oracle.tolerance, seconds,
+                        len(theoretical), len(experimental), exception)
+
+
+def run_oracles(oracles, workers=None):
+    """
+    Score many oracles with trajectory_error, in parallel.
+    arg1 oracles : a list of Oracles.
+    arg2 workers : an int, the number of worker processes. None uses every core,
+    and 0 or 1 score the oracles in the current process.
+    return : a list of OracleResults, in the order of oracles.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        return [run_oracle(oracle) for oracle in oracles]
+    # the largest oracles are sent first, so that no worker ends with a long one alone:
+    order = sorted(range(len(oracles)),
+                   key=lambda k: -len(oracles[k].theoretical) * len(oracles[k].experimental))
+    results = [None] * len(oracles)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for index, result in zip(order, executor.map(run_oracle, [oracles[k] for k in order])):
+            results[index] = result
+    return results
+
+
+def write_json_report(results, path):
+    """
+    Write the results of run_oracles as JSON.
+    arg1 results : a list of OracleResults.
+    arg2 path : a string, the path to the report.
+    """
+    report = {
+        "tests": len(results),
+        "failures": sum(not result.passed for result in results),
+        "seconds": sum(result.seconds for result in results),
+        "oracles": [result._asdict() for result in results],
+    }
+    with open(path, mode='w') as output:
+        json.dump(report, output, indent=2)
+
+
+def write_junit_report(results, path):
+    """
+    Write the results of run_oracles in the JUnit XML format, one testcase per oracle.
+    arg1 results : a list of OracleResults.
+    arg2 path : a string, the path to the report.
+    """
+    suite = ET.Element("testsuite", name="oracles", tests=str(len(results)),
+                       failures=str(sum(not result.passed and result.exception is None for result in results)),
+                       errors=str(sum(result.exception is not None for result in results)),
+                       time="%.6f" % sum(result.seconds for result in results))
+    for result in results:
+        case = ET.SubElement(suite, "testcase", classname="oracles", name=result.name,
+                             time="%.6f" % result.seconds)
+        properties = ET.SubElement(case, "properties")
+        for name in ("theoretical_points", "experimental_points"):
+            ET.SubElement(properties, "property", name=name, value=str(getattr(result, name)))
+        if result.exception is not None:
+            ET.SubElement(case, "error", message=result.exception)
+        elif not result.passed:
+            ET.SubElement(case, "failure", message="%r is not within %r of %r"
+                          % (result.result, result.tolerance, result.expected))
+    ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the oracle tests of trajectory_error.")
+    parser.add_argument("directory", nargs="?", default=DEFAULT_DIRECTORY,
+                        help="the directory of the oracles (default: %(default)s)")
+    parser.add_argument("--pattern", default="*.txt", help="the pattern of the oracle files")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="the number of worker processes, every core by default")
+    parser.add_argument("--json", metavar="PATH", help="write a JSON report")
+    parser.add_argument("--junit", metavar="PATH", help="write a JUnit XML report")
+    parser.add_argument("--slowest", type=int, default=5, metavar="N",
+                        help="print the N slowest oracles")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the cache of parsed oracles")
+    args = parser.parse_args(argv)
+
+    oracles = load_oracles(args.directory, args.pattern, cache=not args.no_cache)
+    if not oracles:
+        parser.error("no oracle in %s" % args.directory)
+    results = run_oracles(oracles, workers=args.workers)
+    if args.json:
+        write_json_report(results, args.json)
+    if args.junit:
+        write_junit_report(results, args.junit)
+
+    for result in results:
+        if not result.passed:
+            print("FAILED %s: %s" % (result.name, result.exception or "%r, expected %r +- %r"
+                                     % (result.result, result.expected, result.tolerance)))
+    for result in sorted(results, key=lambda result: -result.seconds)[:args.slowest]:
+        print("%.3f s %s (%d x %d points)" % (result.seconds, result.name,
+                                             result.theoretical_points, result.experimental_points))
+    failures = sum(not result.passed for result in results)
+    print("%d oracles, %d passed, %d failed" % (len(results), len(results) - failures, failures))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
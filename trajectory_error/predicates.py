@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Robust geometric predicates.
+#
+# The sign of a cross product (b-a) x (d-c) computed with floats may be wrong
+# when it is close to 0: each subtraction and product is rounded. Following
+# Shewchuk ("Adaptive Precision Floating-Point Arithmetic and Fast Robust
+# Geometric Predicates", 1997), the rounding error of
+#     left - right, with left = (bx-ax)*(dy-cy) and right = (by-ay)*(dx-cx),
+# is at most (3 + 16*eps)*eps*(|left| + |right|), eps = 2**-53. When the float
+# result is larger than this bound, its sign is the exact one, which is the case
+# of nearly all calls. Otherwise the cross product is computed again with
+# fractions.Fraction, exactly: every float is a fraction.
+#
+# The intersection of two lines is a + t*(b-a), with t a ratio of two cross
+# products. When they are nearly parallel, the cancellation in the cross products
+# leaves few correct digits in t: intersection_parameter computes it again with
+# fractions when the bound above allows a relative error larger than 2**-30.
+#
+# A point computed on a line, as an orthogonal projection, is usually not
+# exactly on it: nearly_aligned accepts it within the rounding error of its
+# computation, which is relative to the coordinates, where an absolute threshold
+# is too large for small paths and too small for large ones.
+#
+# The predicates take coordinates, so that they can be called with the tuples of
+# solution.py as with the Points of oop_solution.py. They are exact for ints and
+# floats, as long as the products do not underflow.
+
+from fractions import Fraction
+
+EPSILON = 2.0 ** -53 # the relative rounding error of a float operation
+_CROSS_BOUND = (3.0 + 16.0 * EPSILON) * EPSILON
+_PARAMETER_ERROR = 2.0 ** -30 # the largest relative error of intersection_parameter
+_ALIGNED_BOUND = 8.0 * EPSILON # the rounding of a point computed on a line, see nearly_aligned
+
+exact_calls = 0 # number of calls which needed the exact arithmetic, see benchmark.py
+
+
+def cross_sign(ax, ay, bx, by, cx, cy, dx, dy):
+    """
+    Compute the exact sign of the cross product (b-a) x (d-c).
+    arg1,2 ax, ay : the coordinates of a.
+    arg3,4 bx, by : the coordinates of b.
+    arg5,6 cx, cy : the coordinates of c.
+    arg7,8 dx, dy : the coordinates of d.
+    return : an int, 1 if d-c turns counterclockwise from b-a, -1 if clockwise,
+    0 if they are parallel (or one of them is null).
+
+    >>> cross_sign(0, 0, 1, 0, 0, 0, 0, 1), cross_sign(0, 0, 1, 1, 5, 5, 7, 7)
+    (1, 0)
+    """
+    left = (bx - ax) * (dy - cy)
+    right = (by - ay) * (dx - cx)
+    det = left - right
+    # when the products have different signs, or one is 0, the sign is sure:
+    if left > 0:
+        if right <= 0:
+            return 1 if det > 0 else (-1 if det < 0 else 0)
+        total = left + right
+    elif left < 0:
+        if right >= 0:
+            return 1 if det > 0 else (-1 if det < 0 else 0)
+        total = -left - right
+    else:
+        return 1 if det > 0 else (-1 if det < 0 else 0)
+    bound = _CROSS_BOUND * total
+    if det >= bound:
+        return 1
+    if -det >= bound:
+        return -1
+    return _exact_cross_sign(ax, ay, bx, by, cx, cy, dx, dy)
+
+
+def _exact_cross_sign(ax, ay, bx, by, cx, cy, dx, dy):
+    """
+    Compute the sign of the cross product (b-a) x (d-c) with fractions, see cross_sign.
+    """
+    global exact_calls
+    exact_calls += 1
+    ax, ay, bx, by, cx, cy, dx, dy = map(Fraction, (ax, ay, bx, by, cx, cy, dx, dy))
+    det = (bx - ax) * (dy - cy) - (by - ay) * (dx - cx)
+    return 1 if det > 0 else (-1 if det < 0 else 0)
+
+
+def orient2d(ax, ay, bx, by, cx, cy):
+    """
+    Compute the exact orientation of three points.
+    arg1,2 ax, ay : the coordinates of a.
+    arg3,4 bx, by : the coordinates of b.
+    arg5,6 cx, cy : the coordinates of c.
+    return : an int, 1 if c is on the left of the line going from a to b, -1 if it
+    is on the right, 0 if the three points are aligned.
+
+    >>> orient2d(0, 0, 1, 0, 0.5, 1e-300), orient2d(0.1, 0.1, 0.2, 0.2, 0.3, 0.3)
+    (1, 0)
+
+    Here the cross product computed with floats is positive, which is wrong:
+    >>> orient2d(0.5000000000000053, 0.5000000000000046, 12.0, 12.0, 24.0, 24.0)
+    -1
+    """
+    return cross_sign(ax, ay, bx, by, ax, ay, cx, cy)
+
+
+def intersection_parameter(ax, ay, bx, by, cx, cy, dx, dy):
+    """
+    Compute the position of the intersection of the lines (a, b) and (c, d) on (a, b).
+    arg1,2,3,4 ax, ay, bx, by : the coordinates of two points of the first line.
+    arg5,6,7,8 cx, cy, dx, dy : the coordinates of two points of the second line.
+    return : a float t, the intersection is a + t*(b-a), with a relative error
+    below 2**-30. The lines must not be parallel (see cross_sign).
+
+    >>> intersection_parameter(0, 0, 2, 2, 0, 2, 2, 0)
+    0.5
+    >>> intersection_parameter(0, 0, 3, 1, 0, 1e-17, 3, 0.9999999999999999)
+    0.08262939802436257
+    """
+    ex, ey = dx - cx, dy - cy
+    left, right = (cx - ax) * ey, (cy - ay) * ex
+    numerator = left - right
+    numerator_error = _CROSS_BOUND * (abs(left) + abs(right))
+    left, right = (bx - ax) * ey, (by - ay) * ex
+    denominator = left - right
+    denominator_error = _CROSS_BOUND * (abs(left) + abs(right))
+    if numerator_error <= _PARAMETER_ERROR * abs(numerator)\
+    and denominator_error <= _PARAMETER_ERROR * abs(denominator):
+        return numerator / denominator
+    global exact_calls
+    exact_calls += 1
+    ax, ay, bx, by, cx, cy, dx, dy = map(Fraction, (ax, ay, bx, by, cx, cy, dx, dy))
+    ex, ey = dx - cx, dy - cy
+    return float(((cx - ax) * ey - (cy - ay) * ex) / ((bx - ax) * ey - (by - ay) * ex))
+
+
+def nearly_aligned(ax, ay, bx, by, cx, cy):
+    """
+    Check if a point is on a line, up to the rounding error of a point computed
+    on the line, as a + t*(b-a). Exactly aligned points are always accepted.
+    arg1,2,3,4 ax, ay, bx, by : the coordinates of two points of the line.
+    arg5,6 cx, cy : the coordinates of the point.
+    return : a bool.
+
+    >>> nearly_aligned(0, 0, 3, 1, 0.1*3, 0.1), nearly_aligned(0, 0, 3, 1, 0.3, 0.1001)
+    (True, False)
+    """
+    dx, dy = bx - ax, by - ay
+    cross_product = (cy - ay) * dx - (cx - ax) * dy
+    # the error on c is within a few units of the last place of its coordinates,
+    # which is also larger than the rounding of the cross product itself:
+    bound = _ALIGNED_BOUND * (abs(cx) + abs(cy) + abs(ax) + abs(ay)) * (abs(dx) + abs(dy))
+    return abs(cross_product) <= bound
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# A cache of the results of trajectory_error.
+#
+# The same pair of paths is often scored again: a dashboard refreshed, a report
+# exported twice, the oracles run again after an unrelated change. A
+# ResultCache keeps the errors computed, keyed by a hash of the coordinates of
+# both paths: the same paths give the same key whatever their container (a list
+# of tuples, an array, Columns, a PreparedPath, a StoredTrajectory or a list of
+# Points), and a path changed by a single bit gives another one. The coordinates
+# are hashed as two columns of float64 with BLAKE2b, which reads about a
+# gigabyte per second: the hash of a path costs far less than its sweep.
+#
+# The engines of trajectory_error round differently, and the one used depends
+# on the container of the paths: the cache computes every result with the
+# array engine, trajectory_error_vectorized, so that the same coordinates give
+# the same result, whichever call computed it first.
+#
+# The entries are kept in memory, the least recently used one is evicted when
+# there are more than max_entries. With a directory, they are also written to
+# disk, one small file per entry, replaced at once as the cache of oracles.py
+# is; an entry missing from memory is looked for there before it is computed.
+# When there are more than max_disk_entries files, the least recently used
+# ones are removed, by their modification time, which a hit updates.
+
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+import oop_solution as oop
+import solution as sl
+from trajstore import StoredTrajectory
+
+SUFFIX = ".result" # the suffix of the files of the entries on disk
+
+
+def _path(coords):
+    """
+    Give a path in a container of the array engine.
+    arg1 coords : a path, as given to trajectory_error, a list of Points or a Polyline.
+    return : the path, or an array of shape (N,2) for Points.
+    """
+    if isinstance(coords, (sl.PreparedPath, sl.Columns, StoredTrajectory)) or sl._is_buffer(coords):
+        return coords
+    if isinstance(coords, oop.Polyline) or (len(coords) and isinstance(coords[0], oop.Point)):
+        return oop._coordinates(coords)
+    return coords
+
+
+def _columns(coords):
+    """
+    Give the coordinates of a path as windows of columns, without copying them.
+    arg1 coords : a path, as given to trajectory_error, or a list of Points.
+    return : an iterable of (xs, ys), consecutive windows sharing their extremities.
+    """
+    coords = _path(coords)
+    if isinstance(coords, StoredTrajectory):
+        return coords.windows()
+    if isinstance(coords, (sl.PreparedPath, sl.Columns)):
+        return [(coords.x, coords.y)]
+    xs, ys = sl._as_columns(coords) if len(coords) else ([], [])
+    return [(xs, ys)] if len(xs) else []
+
+
+def path_digest(coords):
+    """
+    Hash the coordinates of a path.
+    arg1 coords : a path, as given to trajectory_error, or a list of Points.
+    return : a bytes, the digest of the abscissas and of the ordinates, as float64.
+    """
+    hashes = [hashlib.blake2b(digest_size=16), hashlib.blake2b(digest_size=16)]
+    last = None
+    for window in _columns(coords):
+        for hash_, column in zip(hashes, window):
+            # the windows share their extremities: the last point is hashed at the end.
+            hash_.update(np.ascontiguousarray(column[:-1], dtype=float))
+        last = window
+    if last is not None:
+        for hash_, column in zip(hashes, last):
+            hash_.update(np.ascontiguousarray(column[-1:], dtype=float))
+    return hashes[0].digest() + hashes[1].digest()
+
+
+class ResultCache:
+    """
+    A cache of the results of trajectory_error, in memory and optionally on disk.
+    Attributes :
+    max_entries : an int, the number of entries kept in memory.
+    directory : a str, the directory of the entries on disk, or None.
+    max_disk_entries : an int, the number of entries kept on disk.
+    hits, disk_hits, misses : three ints, the number of results found in memory,
+    found on disk, and computed.
+    evictions, disk_evictions : two ints, the number of entries removed from
+    memory, and from disk.
+
+    >>> cache = ResultCache()
+    >>> float(cache.trajectory_error([(0,0),(0,2)], [(0,0),(1,1),(0,2)]))
+    0.5
+    >>> float(cache.trajectory_error(sl.Columns([0,0], [0,2]), np.array([(0,0),(1,1),(0,2)])))
+    0.5
+    >>> cache.hits, cache.misses
+    (1, 1)
+    """
+
+    def __init__(self, max_entries=4096, directory=None, max_disk_entries=1 << 16):
+        """
+        Constructor.
+        arg1 max_entries : an int, the number of entries kept in memory.
+        arg2 directory : None, or a str, the directory of the entries on disk, created if needed.
+        It can be shared by several processes.
+        arg3 max_disk_entries : an int, the number of entries kept on disk.
+        """
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict() # {key: error}, from the least recently used
+        self.hits = self.disk_hits = self.misses = 0
+        self.evictions = self.disk_evictions = 0
+        self._disk_entries = 0 # the number of files, counted when evicting
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_entries = len(self._disk_files())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return "ResultCache(%d entries, hits=%d, disk_hits=%d, misses=%d)"\
+               % (len(self._entries), self.hits, self.disk_hits, self.misses)
+
+    def as_dict(self):
+        """
+        return : a dict of the counters, which can be written as JSON to a metrics sink.
+        """
+        return {"entries": len(self._entries), "hits": self.hits, "disk_hits": self.disk_hits,
+                "misses": self.misses, "evictions": self.evictions, "disk_evictions": self.disk_evictions}
+
+    def key(self, name, coord_th, coord_exp):
+        """
+        Compute the key of a result.
+        arg1 name : a str, the name of the function computing the result.
+        arg2,3 coord_th, coord_exp : the paths, as given to the function.
+        return : a str, the hexadecimal key.
+        """
+        hash_ = hashlib.blake2b(name.encode(), digest_size=20)
+        hash_.update(path_digest(coord_th))
+        hash_.update(path_digest(coord_exp))
+        return hash_.hexdigest()
+
+    def get(self, key, compute):
+        """
+        Find a result in the cache, or compute it and add it.
+        arg1 key : a str, as returned by key.
+        arg2 compute : a function without arguments, computing the result, a float.
+        return : a float, the result.
+        """
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        error = self._read(key)
+        if error is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            error = float(compute())
+            self._write(key, error)
+        self._entries[key] = error
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return error
+
+    def trajectory_error(self, coord_th, coord_exp):
+        """
+        Compute trajectory_error(coord_th, coord_exp) of solution.py, through the cache,
+        with the array engine whatever the containers of the paths.
+        arg1,2 coord_th, coord_exp : the paths, as given to trajectory_error.
+        return : a float, the error.
+        """
+        return self.get(self.key("trajectory_error", coord_th, coord_exp),
+                        lambda: float(sl.trajectory_error_vectorized(_path(coord_th), _path(coord_exp))))
+
+    def trajectory_error_of(self, trajectory):
+        """
+        Compute trajectory.trajectory_error(), through the cache, with the array
+        engine whatever the containers of the paths.
+        arg1 trajectory : a Trajectory of oop_solution.py.
+        return : a float, the error.
+        """
+        return self.get(self.key("Trajectory.trajectory_error", trajectory.theo, trajectory.expe),
+                        lambda: float(sl.trajectory_error_vectorized(_path(trajectory.theo), _path(trajectory.expe))))
+
+    def clear(self):
+        """
+        Remove the entries from memory and from disk. The counters are kept.
+        """
+        self._entries.clear()
+        if self.directory is not None:
+            for name in self._disk_files():
+                self._remove(name)
+            self._disk_entries = 0
+
+    def _disk_files(self):
+        """
+        return : a list of str, the names of the files of the entries on disk.
+        """
+        return [name for name in os.listdir(self.directory) if name.endswith(SUFFIX)]
+
+    def _remove(self, name):
+        """
+        Remove a file of the disk tier, which another process may have removed already.
+        arg1 name : a str, the name of the file.
+        """
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def _read(self, key):
+        """
+        Read an entry from disk, and mark it as recently used.
+        arg1 key : a str.
+        return : a float, or None if there is no such entry.
+        """
+        if self.directory is None:
+            return None
+        path = os.path.join(self.directory, key + SUFFIX)
+        try:
+            with open(path) as file:
+                error = float(file.read())
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return error
+
+    def _write(self, key, error):
+        """
+        Write an entry to disk, replacing the file at once, and evict the least
+        recently used entries when there are too many. They are evicted down to
+        three quarters of max_disk_entries, so that the directory is listed once
+        every max_disk_entries/4 writes only.
+        arg1 key : a str.
+        arg2 error : a float.
+        """
+        if self.directory is None:
+            return
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "w") as file:
+            file.write(repr(error))
+        os.replace(temporary, os.path.join(self.directory, key + SUFFIX))
+        self._disk_entries += 1
+        if self._disk_entries <= self.max_disk_entries:
+            return
+        names = self._disk_files()
+        times = []
+        for name in names:
+            try:
+                times.append(os.stat(os.path.join(self.directory, name)).st_mtime_ns)
+            except FileNotFoundError:
+                times.append(-1) # removed by another process meanwhile
+        removed = []
+        for _, name in sorted(zip(times, names))[:max(len(names) - self.max_disk_entries * 3 // 4, 0)]:
+            self._remove(name)
+            removed.append(name)
+        self.disk_evictions += len(removed)
+        self._disk_entries = len(names) - len(removed)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Simplification of experimental paths before scoring them.
+#
+# A positioning system sends fixes at a high rate, and most of them are nearly
+# aligned with their neighbours: they make the traces larger without changing
+# the area found by the sweep of trajectory_error. Removing the point k of a
+# path replaces the segments [k-1, k] and [k, k+1] by [k-1, k+1], which moves
+# the path over the triangle (k-1, k, k+1). As in Visvalingam's algorithm,
+# simplify removes the points of smallest triangles, and it stops when the sum
+# of the triangles removed would exceed the budget given.
+#
+# The area found by the sweep only changes by the triangle when the sweep does
+# not change around the point: both segments are consumed on the same
+# theoretical segment i, as quadrilaterals (_QUAD), after a segment also
+# consumed on i, and the point projects between its neighbours. The merged
+# segment is then a quadrilateral on i too, and the two trapezia become one,
+# minus the triangle. So the sweep is first run once with the array engine, to
+# know the step consuming each segment, and only such points are removed.
+# Near the vertices of the route, where the sweep changes of theoretical
+# segment, the points are kept.
+#
+# simplify thus costs a whole sweep of the trace, more than scoring it once:
+# it does not make a single call to trajectory_error faster. It pays off when
+# the simplified trace is kept, to be stored or scored again, against the same
+# route, with a bound on the error moved by the points removed.
+#
+# The triangles are computed with NumPy, in rounds: a round removes points of
+# even rank among the remaining ones, the next round points of odd rank, so that
+# the two neighbours of a removed point are kept, and its triangle is the one
+# actually removed. Long paths are simplified by chunks of a fixed number of
+# points, whose extremities are kept, so that the temporary arrays do not grow
+# with the path.
+
+from collections import namedtuple
+
+import numpy as np
+
+import solution as sl
+
+CHUNK_SIZE = 1 << 16 # points simplified at once
+
+Simplification = namedtuple("Simplification", ["points", "removed", "area"])
+Simplification.__doc__ = """
+The result of simplify.
+points : an array of shape (N,2), the points kept, in their order.
+removed : an int, the number of points removed.
+area : a float, the sum of the areas of the triangles removed, at most the
+epsilon given. The area found by trajectory_error changes by at most this much.
+"""
+
+
+def triangle_areas(xs, ys):
+    """
+    Compute the areas of the triangles formed by each point and its neighbours.
+    arg1,2 xs, ys : two arrays of floats, the coordinates of a path.
+    return : an array of len(xs)-2 floats, the area of the triangle (k-1, k, k+1)
+    for each point k which is not an extremity.
+    """
+    return np.abs((xs[1:-1] - xs[:-2]) * (ys[2:] - ys[:-2])
+                  - (ys[1:-1] - ys[:-2]) * (xs[2:] - xs[:-2])) / 2
+
+
+def _removable(path, xs, ys, segments, branches, before, alive):
+    """
+    Find the points whose removal changes the area of the sweep by their triangle only.
+    arg1 path : a PreparedPath, the theoretical path.
+    arg2,3 xs, ys : two arrays of floats, the coordinates of the experimental path.
+    arg4,5 segments, branches : two arrays of ints, the theoretical segment and the
+    branch of the step consuming each experimental segment, -1 if none does.
+    arg6 before : an int, the theoretical segment where the sweep starts with the
+    segment of alive[0].
+    arg7 alive : an array of ints, indices of consecutive points kept so far.
+    return : an array of len(alive)-2 booleans, for the points alive[1:-1].
+    """
+    previous, point, following = alive[:-2], alive[1:-1], alive[2:]
+    i = segments[previous]
+    start = np.concatenate(([before], segments[alive[:-3]]))
+    removable = (i >= 0) & (i == segments[point]) & (i == start)\
+              & (branches[previous] == sl._QUAD) & (branches[point] == sl._QUAD)
+    # the point projects between its neighbours:
+    i = np.where(removable, i, 0)
+    dx, dy = path.x[i+1] - path.x[i], path.y[i+1] - path.y[i]
+    t_previous, t_point, t_following = ((xs[k] - path.x[i])*dx + (ys[k] - path.y[i])*dy
+                                        for k in (previous, point, following))
+    removable &= (t_previous - t_point) * (t_point - t_following) >= 0
+    # the merged segment is consumed as a quadrilateral too:
+    merged_x = np.stack((xs[previous], xs[following]), axis=1).ravel()
+    merged_y = np.stack((ys[previous], ys[following]), axis=1).ravel()
+    branch, _ = sl._classify_steps(path, merged_x, merged_y, i, np.arange(0, len(merged_x), 2),
+                                   with_area=False)
+    return removable & (branch == sl._QUAD)
+
+
+def _simplify_chunk(path, xs, ys, segments, branches, before, start, stop, budget, keep):
+    """
+    Simplify a part of a path, keeping its extremities.
+    arg1 path : a PreparedPath, the theoretical path.
+    arg2,3 xs, ys : two arrays of floats, the coordinates of the experimental path.
+    arg4,5 segments, branches : two arrays of ints, the steps of the sweep, as in _removable.
+    arg6 before : an int, the theoretical segment where the sweep starts with the segment of start.
+    arg7,8 start, stop : two ints, the part of the path is from start to stop excluded.
+    arg9 budget : a float, the largest sum of the areas of the triangles removed.
+    arg10 keep : an array of booleans, True for the points kept, updated.
+    return : the sum of the areas of the triangles removed.
+    """
+    alive = np.arange(start, stop) # indices of the points kept so far
+    area = 0.0
+    parity, idle = 0, 0 # the rank of the points tried, and the rounds without any removal
+    while idle < 2 and len(alive) > 2:
+        areas = triangle_areas(xs[alive], ys[alive])
+        removable = _removable(path, xs, ys, segments, branches, before, alive)
+        # the points of the given parity, smallest triangles first, within the budget:
+        ranks = np.arange(1 + parity, len(alive) - 1, 2)
+        ranks = ranks[removable[ranks - 1]]
+        ranks = ranks[np.argsort(areas[ranks - 1], kind='stable')]
+        taken = np.searchsorted(np.cumsum(areas[ranks - 1]), budget - area, side='right')
+        if taken:
+            area += areas[ranks[:taken] - 1].sum()
+            keep[alive[ranks[:taken]]] = False
+            alive = alive[keep[alive]]
+            idle = 0
+        else:
+            idle += 1
+        parity = 1 - parity
+    return area
+
+
+def simplify(coord_th, coord_exp, epsilon, chunk_size=CHUNK_SIZE):
+    """
+    Remove points of an experimental path, changing the area found by the sweep
+    of trajectory_error by at most epsilon, so its result by at most
+    epsilon / path_length(coord_th). The extremities of the path are kept.
+    The path is swept once, with the array engine, to find the points which can
+    be removed: this takes longer than scoring it.
+    arg1 coord_th : an array of shape (N,2), a list of tuples (x,y) or a PreparedPath.
+    The path which should be followed.
+    arg2 coord_exp : an array of shape (M,2), or a list of tuples (x,y). The points received from the "indoors-gps"
+    arg3 epsilon : a float, the largest change of the area allowed. The budget
+    is shared between the chunks in proportion of their points.
+    arg4 chunk_size : an int, the number of points simplified at once.
+    return : a Simplification.
+
+    >>> result = simplify([(0,0),(4,0)], [(0,1),(1,1.01),(2,1),(3,2),(4,1)], 0.1)
+    >>> result.points.tolist(), result.removed
+    ([[0.0, 1.0], [2.0, 1.0], [3.0, 2.0], [4.0, 1.0]], 1)
+    """
+    if not isinstance(coord_th, sl.PreparedPath):
+        coord_th = sl.PreparedPath(coord_th)
+    points = np.asarray(coord_exp, dtype=float).reshape(-1, 2)
+    xs, ys = np.ascontiguousarray(points[:,0]), np.ascontiguousarray(points[:,1])
+    n = len(points)
+    # the step consuming each experimental segment:
+    segments = np.full(max(n - 1, 0), -1, dtype=np.intp)
+    branches = np.full(max(n - 1, 0), -1, dtype=np.intp)
+    sl._sweep_area(coord_th, xs, ys, steps=(segments, branches))
+
+    keep = np.ones(n, dtype=bool)
+    area = 0.0
+    before = 0 # the sweep starts on the theoretical segment 0
+    # the chunks share their extremities, which are kept:
+    for start in range(0, max(n - 1, 0), chunk_size - 1):
+        stop = min(start + chunk_size, n)
+        budget = epsilon * (stop - 1) / max(n - 1, 1) - area
+        area += _simplify_chunk(coord_th, xs, ys, segments, branches, before, start, stop, budget, keep)
+        # the segment before the first point of the next chunk:
+        before = segments[start + np.flatnonzero(keep[start:stop-1])[-1]]
+    return Simplification(points[keep], int(n - keep.sum()), area)
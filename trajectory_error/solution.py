@@ -37,22 +37,139 @@
 
 #imports
 
+import bisect
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 import numpy as np
-import numpy.linalg as lin
+
+from intervals import IntervalSet
+from predicates import cross_sign, intersection_parameter, nearly_aligned, orient2d
+from spatial_index import SegmentGrid
+from trajstore import StoredTrajectory
 
 # In[2]:
 
 
-def trajectory_error(coord_th,coord_exp):
+# branches of the sweep, as taken by trajectory_error:
+_ADVANCE = 0 # leave the experimental segment to the next theoretical segment
+_CROSS_ON = 1 # intersection, both projections in the theoretical segment
+_CROSS_OFF = 2 # intersection, a projection outside the theoretical segment
+_QUAD = 3 # no intersection, both projections in the theoretical segment
+BRANCH_NAMES = ("advance", "cross_on", "cross_off", "quad") # indexed by the branches
+
+
+class SweepStats:
+    """
+    Counters and timers of the sweep of trajectory_error, filled when it is given
+    as its stats argument. The same object can be given to several calls, the
+    counts add up. Trajectory.trajectory_error of oop_solution fills it the same way.
+    Attributes :
+    iterations : an int, the number of steps of the sweep.
+    branches : a dict {name: number of steps}, with the names of BRANCH_NAMES:
+    "cross_on" (intersection, both projections in the theoretical segment),
+    "cross_off" (intersection, a projection outside of it), "quad" (no intersection,
+    both projections in the theoretical segment), "advance" (next theoretical segment).
+    calls : a dict {helper name: number of calls made by the sweep}, for the helpers
+    "intersection", "ortogonal_projection" and "compute_area", named as in this
+    module by both engines (Segment.orthogonal_projection counts as "ortogonal_projection").
+    seconds : a dict {helper name: time spent in the helper, in seconds},
+    and "total", the time of the whole sweeps.
+    
+    >>> stats = SweepStats()
+    >>> float(trajectory_error([(0,0),(0,2)], [(0,0),(1,1),(0,2)], stats=stats))
+    0.5
+    >>> stats.iterations, stats.branches["cross_on"], stats.calls["intersection"]
+    (2, 2, 2)
+    """
+    
+    def __init__(self):
+        self.iterations = 0
+        self.branches = dict.fromkeys(BRANCH_NAMES, 0)
+        self.calls = {}
+        self.seconds = {"total": 0.0}
+    
+    def __repr__(self):
+        return "SweepStats(iterations=%d, branches=%r, calls=%r)" % (self.iterations, self.branches, self.calls)
+    
+    def count(self, branch):
+        """
+        Count a step of the sweep.
+        arg1 branch : a string, the name of the branch taken by the step.
+        """
+        self.iterations += 1
+        self.branches[branch] += 1
+    
+    def timed(self, name, function):
+        """
+        Wrap a helper of the sweep, to count its calls and the time spent in it.
+        arg1 name : a string, the name of the helper in calls and seconds.
+        arg2 function : the helper.
+        return : a function, taking the same arguments as function.
+        """
+        self.calls.setdefault(name, 0)
+        self.seconds.setdefault(name, 0.0)
+        def timed_function(*args):
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self.seconds[name] += time.perf_counter() - start
+                self.calls[name] += 1
+        return timed_function
+    
+    def as_dict(self):
+        """
+        return : a dict of the counters, which can be written as JSON to a metrics sink.
+        """
+        return {"iterations": self.iterations, "branches": dict(self.branches),
+                "calls": dict(self.calls), "seconds": dict(self.seconds)}
+
+
+def trajectory_error(coord_th,coord_exp,stats=None):
     """
     Compute the error between the theoretical and the experimental trajectories,
     in the format decided, that is, the area between the two paths divided by
     the length of the theoretical path.
+    Consecutive duplicates of the theoretical path are ignored, by every engine.
     arg1 coord_th : a list of tuples (x,y). The path which should be followed.
+    It can also be a PreparedPath, then the array engine trajectory_error_vectorized is used.
     arg2 coord_exp: a list of tuples (x,y). The points received from the "indoors-gps"
+    It can also be a trajstore.StoredTrajectory, which is swept by the array engine
+    window by window.
+    When either path is given as Columns, or as a buffer (an array or a memoryview of
+    shape (N,2), an array('d') of interleaved coordinates, see _as_columns), the
+    array engine is used too, without building a tuple per point.
+    arg3 stats : None, or a SweepStats to fill with the counters of the sweep.
+    A PreparedPath is then swept step by step, as a list of tuples, and the
+    buffers as Columns.
     return: error, the total area difference betweeen the theoretical trajectory
     and the experimental one, divided by the length of coord_th.
     """
+    # a buffer is read as two columns, without a tuple per point:
+    if _is_buffer(coord_th):
+        coord_th = Columns(*_as_columns(coord_th))
+    if _is_buffer(coord_exp):
+        coord_exp = Columns(*_as_columns(coord_exp))
+    if isinstance(coord_th, PreparedPath):
+        if stats is None:
+            # the segments are already computed, use them:
+            return trajectory_error_vectorized(coord_th, coord_exp)
+        coord_th = list(coord_th)
+    if stats is None and (isinstance(coord_exp, (StoredTrajectory, Columns))
+                          or isinstance(coord_th, Columns)):
+        return trajectory_error_vectorized(coord_th, coord_exp)
+    
+    step = _sweep_step
+    if stats is not None:
+        step = _make_sweep_step(stats.timed("intersection", intersection),
+                                stats.timed("ortogonal_projection", ortogonal_projection),
+                                stats.timed("compute_area", compute_area))
+        start = time.perf_counter()
+    
     # initialize values:
     area = 0 # the total area between the theoretical and experimental paths
     distance = path_length(coord_th) # total theoretical path length
@@ -61,19 +178,63 @@ def trajectory_error(coord_th,coord_exp):
     
     # start iterations:
     while (i+1 < len(coord_th) and j+1 < len(coord_exp)):     
+        step_area, branch = step(coord_th, coord_exp, i, j)
+        if stats is not None:
+            stats.count(BRANCH_NAMES[branch])
+        area += step_area
+        if branch == _ADVANCE:
+            i += 1 # advance along the theoretical path
+        else:
+            j += 1 # advance along the experimental path
+            
+        # the sweep only moves forward along coord_th: for an experimental path
+        # which doubles back, see trajectory_error_backtracking.
+
+    if stats is not None:
+        stats.seconds["total"] += time.perf_counter() - start
+    return area / distance
+
+
+def _make_sweep_step(intersection, ortogonal_projection, compute_area):
+    """
+    Build the function performing one step of the sweep of trajectory_error,
+    calling the given helpers. _sweep_step is built with the functions of this
+    module; trajectory_error(stats=...) builds one with counting wrappers, so
+    that the sweep pays nothing for the instrumentation when it is not used.
+    arg1,2,3 intersection, ortogonal_projection, compute_area : the helpers.
+    return : a function sweep_step(coord_th, coord_exp, i, j), described below.
+    """
+    def sweep_step(coord_th, coord_exp, i, j):
+        """
+        Perform one step of the sweep of trajectory_error, on the theoretical
+        segment [coord_th[i], coord_th[i+1]] and the experimental segment
+        [coord_exp[j], coord_exp[j+1]].
+        arg1 coord_th : a list of tuples (x,y). The path which should be followed.
+        arg2 coord_exp: a list of tuples (x,y). The points received from the "indoors-gps"
+        arg3,4 i, j : two ints, the current indices on both paths.
+        return: area, branch. The area to add to the total, and the branch taken:
+        _ADVANCE if the sweep goes on with the next theoretical segment (i+1, the area
+        is then 0), otherwise the experimental segment is done and the sweep goes on
+        with the next one (j+1).
+        """
+        area = 0
+        if coord_th[i] == coord_th[i+1]:
+            # a theoretical segment of null length has no direction to project on:
+            # it is left at once, as if the repeated point were dropped, as in a PreparedPath.
+            return area, _ADVANCE # advance along the theoretical path
         # we work on a subsegment [coord_th[i], coord_th[i+1]]        
         # search for an intersection:
         intersect_point = intersection(coord_th[i], coord_th[i+1], coord_exp[j], coord_exp[j+1]) 
         # compute orthogonal projections:
         ort_proj1 =  ortogonal_projection(coord_th[i], coord_th[i+1], coord_exp[j])
         ort_proj2 =  ortogonal_projection(coord_th[i], coord_th[i+1], coord_exp[j+1])
-                
-        if intersect_point:
             
+        if intersect_point:
+        
             if intersect_point == coord_th[i+1] == coord_exp[j]:
                 # we're outside of the subsegment
-                i += 1 # advance along the theoretical path                 
-                
+                return area, _ADVANCE # advance along the theoretical path                 
+            
             elif point_belongs_to_segment(coord_th[i], coord_th[i+1], ort_proj1)\
             and point_belongs_to_segment(coord_th[i], coord_th[i+1], ort_proj2):
                 # Before the intersection:
@@ -81,15 +242,15 @@ def trajectory_error(coord_th,coord_exp):
                 base = seg_length(ort_proj1, intersect_point)
                 height =  seg_length(coord_exp[j], ort_proj1)
                 area += area_right_triangle(base, height)
-                
+            
                 # After the intersection:
                 # the points form the right triangle -> intersect_point, coord_exp[j+1], its projection
                 base = seg_length(intersect_point, ort_proj2)
                 height =  seg_length(coord_exp[j+1], ort_proj2)
                 area += area_right_triangle(base, height)
-                
-                j += 1 # advance along the experimental path 
             
+                return area, _CROSS_ON # advance along the experimental path 
+        
             else:
                 # Before the intersection:
                 # the points form the right triangle -> coord_exp[j], its projection, intersection
@@ -97,33 +258,29 @@ def trajectory_error(coord_th,coord_exp):
                 height =  seg_length(coord_th[i],\
                                      ortogonal_projection(coord_exp[j], intersect_point, coord_th[i]))
                 area += area_right_triangle(base, height)
-                
+            
                 # After the intersection:
                 # the points form the right triangle -> intersect_point, coord_exp[j+1], its projection
                 base = seg_length(intersect_point, coord_exp[j+1])
                 height =  seg_length(coord_th[i+1],\
                                      ortogonal_projection(coord_exp[j+1], intersect_point, coord_th[i+1]))
                 area += area_right_triangle(base, height)
-                
-                j += 1 # advance along the experimental path 
-                
-        elif point_belongs_to_segment(coord_th[i], coord_th[i+1], ort_proj1)\
-        and point_belongs_to_segment(coord_th[i], coord_th[i+1], ort_proj2):     
             
+                return area, _CROSS_OFF # advance along the experimental path 
+            
+        elif point_belongs_to_segment(coord_th[i], coord_th[i+1], ort_proj1)\
+        and point_belongs_to_segment(coord_th[i], coord_th[i+1], ort_proj2)\
+        or coord_exp[j] == coord_exp[j+1]:
+            # an experimental segment of null length, a repeated point, is consumed
+            # wherever its projection is, with an area of 0: as if it were dropped.
             area += compute_area(ort_proj1, ort_proj2, coord_exp[j], coord_exp[j+1])
-            j += 1 # advance along the experimental path  
-        
+            return area, _QUAD # advance along the experimental path  
+    
         else:
             # we're outside of the subsegment
-            i += 1 # advance along the theoretical path
-            
-        ## TODO check for backtracking:
-        
-        # a) if ort1 or ort2 in in segment [ coord_th[i] , prevOrt1 ] or [ coord_th[i] , prevOrt2 ]
-        
-        # b) identify the area to remove 
+            return area, _ADVANCE # advance along the theoretical path
 
-    return area / distance
+    return sweep_step
 
 
 def seg_length(x_1,x_2):
@@ -140,14 +297,58 @@ def path_length(path):
     """
     Compute the length of a path.
     arg1 path : A table of tuples, each tuple representing the coordinates of a point of the path.
+    It can also be a PreparedPath, whose length is already known, a trajstore.StoredTrajectory,
+    read window by window, Columns, or a buffer (see _as_columns).
     return : leng. A float, 
     """
+    if isinstance(path, PreparedPath):
+        return path.length
+    if _is_buffer(path):
+        path = Columns(*_as_columns(path))
     assert len(path) > 1
+    if isinstance(path, Columns):
+        return float(np.hypot(np.diff(path.x), np.diff(path.y)).sum())
+    if isinstance(path, StoredTrajectory):
+        return float(sum(np.hypot(np.diff(xs), np.diff(ys)).sum() for xs, ys in path.windows()))
     leng = 0
     for i in range(len(path)-1):
         leng += seg_length(path[i],path[i+1])
     return(leng)
 
+
+def drop_repeated_points(coord_exp, tolerance=0):
+    """
+    Collapse the runs of repeated points of an experimental path, as sent while
+    the tracked object stands still: each run is replaced by its first point.
+    A repeated point is an experimental segment of null length, which the sweep of
+    every engine consumes without area and on the same theoretical segment,
+    wherever its projection is: dropping them does not change the error, but
+    saves the steps of the sweep on them.
+    It is applied by trajectory_error_many and TrajectoryErrorAccumulator.
+    arg1 coord_exp : a list of tuples (x,y). The points received from the "indoors-gps"
+    arg2 tolerance : a float. With 0, only the points equal to the previous one are
+    dropped. Otherwise the points closer than tolerance to the first point of their
+    run are dropped too, which changes the error; the last point is always kept.
+    return : a list of tuples (x,y).
+    
+    >>> drop_repeated_points([(0,0),(1,1),(1,1),(1,1),(2,0)])
+    [(0, 0), (1, 1), (2, 0)]
+    >>> drop_repeated_points([(0,0),(1,1),(1.01,1),(1,0.99),(2,0)], tolerance=0.1)
+    [(0, 0), (1, 1), (2, 0)]
+    """
+    coord_exp = list(coord_exp)
+    if tolerance <= 0:
+        return coord_exp[:1] + [q for p, q in zip(coord_exp, coord_exp[1:]) if q != p]
+    squared_tolerance = tolerance * tolerance
+    kept = coord_exp[:1]
+    for point in coord_exp[1:-1]:
+        first = kept[-1] # the first point of the current run
+        if (point[0] - first[0])**2 + (point[1] - first[1])**2 >= squared_tolerance:
+            kept.append(point)
+    if len(coord_exp) > 1 and coord_exp[-1] != kept[-1]:
+        kept.append(coord_exp[-1])
+    return kept
+
 def point_belongs_to_segment(x_1, x_2, y):
     """
     Check if a point belongs to a segment.
@@ -158,23 +359,20 @@ def point_belongs_to_segment(x_1, x_2, y):
     """
     # A necessary condition is that x_1, x_2 and y are aligned.
     # Otherwise y can't be in the segment.
-    # compute the cross product of the points : if it is 0, it means they are not aligned.
-    # Given the calculation performed, if the result is a float we consider that
-    # if it is smaller than 10**(-10), it is zero up to machine error.
-    cross_product = (y[1] - x_1[1]) * (x_2[0] - x_1[0]) - (y[0] - x_1[0]) * (x_2[1] - x_1[1])
-    if (isinstance(cross_product, int) and abs(cross_product) != 0)\
-    or (isinstance(cross_product,float) and abs(cross_product) > 0.0000000001):
+    # y is often an orthogonal projection, computed with floats, so it is only
+    # aligned up to the rounding of its coordinates (see predicates.py).
+    if not nearly_aligned(x_1[0], x_1[1], x_2[0], x_2[1], y[0], y[1]):
         return False
 
     # Now, the case when the points are aligned : we compute the dot product
     # between (y-x_1) and (x_2-x1).
-    dot_product = (y[0] - x_1[0])*(x_2[0] - x_1[0]) + (y[1] - x_1[1])*(x_2[1] - x_1[1])
+    dx, dy = x_2[0] - x_1[0], x_2[1] - x_1[1]
+    dot_product = (y[0] - x_1[0])*dx + (y[1] - x_1[1])*dy
     if dot_product < 0:
         # Then y is beyond x_1, not between the two points.
         return False
 
-    squared_segment_length = seg_length(x_1,x_2)**2
-    if dot_product > squared_segment_length:
+    if dot_product > dx*dx + dy*dy:
         # Then y is beyond x_2, not between the two points.
         return False
 
@@ -186,50 +384,43 @@ def intersection(x_1, x_2, y_1, y_2):
     arg1,2 x_i: A tuple, the coordinates of a point on the theoretical trajectory
     arg3,4 y_i: A tuple, the coordinates of a point on the experimental trajectory
     return: intersect. A tuple, the coordinates of the intersection.
-    Remark : if the intersection is not in the two segments, return None.
+    Remark : if the intersection is in none of the two segments, return None.
+    The tests are made with the exact predicates of predicates.py: the result
+    does not depend on rounding errors, even for nearly parallel segments.
+    
+    >>> intersection((0,0), (2,2), (0,2), (2,0))
+    (1.0, 1.0)
+    >>> intersection((0,0), (1,1e-17), (0,1), (1,1)) is None
+    True
     """
+    # Parallel lines, or a segment reduced to a point: no intersection.
+    if cross_sign(x_1[0], x_1[1], x_2[0], x_2[1], y_1[0], y_1[1], y_2[0], y_2[1]) == 0:
+        return None
 
-    # First case : the two lines are vertical
-    if (x_1[0] == x_2[0] and y_1[0] == y_2[0]) :
-        intersect = None
-    
-    # Second case : only the first line is vertical
-    elif x_1[0] == x_2[0] :
-        a = (y_1[1]-y_2[1])/(y_1[0]-y_2[0])
-        b = y_2[1] - a * y_2[0]
-        intersect = (x_1[0],a*x_1[0] + b)
-    
-    # Third case : only the second line is vertical
-    elif y_1[0]  == y_2[0] :
-        a = (x_1[1]-x_2[1])/(x_1[0]-x_2[0])
-        b = x_2[1] - a * x_2[0]
-        intersect = (y_1[0],a*y_1[0] + b)
-    
-    # Last case : general case
-    else :
-        a_x = (x_1[1] - x_2[1])/(x_1[0] - x_2[0])
-        b_x = x_1[1] - a_x * x_1[0]
-        a_y = (y_1[1] - y_2[1])/(y_1[0] - y_2[0])
-        b_y = y_1[1] - a_y * y_1[0]
-        
-        if a_x == a_y :
-            # Case where the lines are parallel
-            intersect = None
-        
-        else :
-            #The equations are
-            #y = a_x*x + b_x
-            #y = a_y*x + b_y
-            # The solution is the inverted matrix
-            intersect = ( (b_y-b_x)/(a_x-a_y),\
-                          (b_y * a_x - b_x * a_y)/(a_x - a_y) )
-    # If a point is found, check if it belongs to the segments
-    # and not only to the lines.
-    if intersect:
-        if not point_belongs_to_segment(x_1, x_2, intersect) and not point_belongs_to_segment(y_1, y_2, intersect):
-            intersect = None
-    
-    return intersect
+    # The intersection of the lines belongs to [y_1,y_2] iff y_1 and y_2 are not
+    # strictly on the same side of the line (x_1,x_2), and conversely.
+    side_y_1 = orient2d(x_1[0], x_1[1], x_2[0], x_2[1], y_1[0], y_1[1])
+    side_y_2 = orient2d(x_1[0], x_1[1], x_2[0], x_2[1], y_2[0], y_2[1])
+    side_x_1 = orient2d(y_1[0], y_1[1], y_2[0], y_2[1], x_1[0], x_1[1])
+    side_x_2 = orient2d(y_1[0], y_1[1], y_2[0], y_2[1], x_2[0], x_2[1])
+    if side_y_1 * side_y_2 > 0 and side_x_1 * side_x_2 > 0:
+        return None
+
+    # An extremity on the other line is the intersection, exactly.
+    if side_y_1 == 0:
+        return y_1
+    if side_y_2 == 0:
+        return y_2
+    if side_x_1 == 0:
+        return x_1
+    if side_x_2 == 0:
+        return x_2
+
+    # Otherwise the intersection is x_1 + t * (x_2 - x_1), which works for
+    # vertical lines as well, no slope is needed.
+    t = intersection_parameter(x_1[0], x_1[1], x_2[0], x_2[1], y_1[0], y_1[1], y_2[0], y_2[1])
+    dx, dy = x_2[0] - x_1[0], x_2[1] - x_1[1]
+    return (x_1[0] + t*dx, x_1[1] + t*dy)
 
 def ortogonal_projection(x_1, x_2, y):
     """
@@ -243,35 +434,67 @@ def ortogonal_projection(x_1, x_2, y):
     if point_belongs_to_segment(x_1, x_2, y): # y already belongs to the segment [x_1, x_2]
         new_point = y
         
-    # Now we want to find the equation of the line containing x_1 and x_2.
-    # We have to tackle the case of the vertical line first, because then
-    # we can't find a slope. Then we can tackle the other case,
-    # with a slope and intercept.
-    
-    elif x_1[0] == x_2[0] :
-        # First case : the line containing x_1 and x_2 is vertical
-        new_point = (x_1[0],y[1])
-    
     else :
-    # Second case : the line containing x_1 and x_2 is not vertical,
-    # so we look for its slope and intercept.
-        a = (x_2[1]-x_1[1])/(x_2[0]-x_1[0])
-        b = x_1[1] - a * x_1[0]
-        # Now we know the line containing x_1 and x_2 has the equation y = a * x + b
-        # So a normal vector to this line is (a,-1)
-        # This vector is directing the normal line passing by the point y and its equation is - x - a * y + c = 0 :
-        # let's find c!
-        c = y[0] + a*y[1]
-        # Now the intersection point is the point (x,y) which verifies :
-        # a*x - y = -b
-        # -x - a*y = -c
-        # We find it by inverting the matrix.
-        mat = np.array([[a,-1],[-1,-a]])
-        point = np.dot(lin.inv(mat), np.array([-b,-c]))
-        new_point = (point[0],point[1])
+        # The line containing x_1 and x_2 is x_1 + t * d, with d = x_2 - x_1.
+        # The projection of y is the point of the line such that y - (x_1 + t * d)
+        # is orthogonal to d, that is t = (y - x_1).d / d.d
+        # This works for vertical lines as well, no slope is needed.
+        dx = x_2[0] - x_1[0]
+        dy = x_2[1] - x_1[1]
+        squared_segment_length = dx*dx + dy*dy
+        if squared_segment_length == 0:
+            # the segment is a point, which is its own projection
+            new_point = x_1
+        else:
+            t = ((y[0] - x_1[0])*dx + (y[1] - x_1[1])*dy) / squared_segment_length
+            new_point = (x_1[0] + t*dx, x_1[1] + t*dy)
         
     return new_point
 
+def ortogonal_projections(x_1, x_2, points, return_parameter=False):
+    """
+    Compute the orthogonal projections of many points on the line made up of x_1 and x_2.
+    
+    arg1,2 x_i: A tuple, the coordinates of a point on the theoretical trajectory
+    arg3 points: An array of shape (N,2), or a list of tuples, the points to project.
+    arg4 return_parameter: A boolean, also return the position t of each projection,
+    such that projection = x_1 + t * (x_2 - x_1). The projection belongs to the segment
+    [x_1,x_2] if and only if 0 <= t <= 1.
+    return: An array of shape (N,2), the projections. (and the array of the t if asked)
+    Remark : if x_1 == x_2, every point is projected on x_1, with t = 0.
+    """
+    return ortogonal_projections_many(np.asarray(x_1, dtype=float), np.asarray(x_2, dtype=float),
+                                      points, return_parameter)
+
+def ortogonal_projections_many(starts, ends, points, return_parameter=False):
+    """
+    Compute the orthogonal projections of points on lines, for many segments at once.
+    The arrays are broadcast against each other, as NumPy does for the arithmetic operations:
+    the k-th point is projected on the k-th segment when the three arrays have the same shape,
+    and starts[:,None], ends[:,None], points[None,:] project every point on every segment.
+    
+    arg1 starts: An array of shape (...,2), the first points of the segments.
+    arg2 ends: An array of shape (...,2), the last points of the segments.
+    arg3 points: An array of shape (...,2), the points to project.
+    arg4 return_parameter: A boolean, also return the positions t of the projections,
+    as for ortogonal_projections.
+    return: An array of shape (...,2), the projections. (and the array of the t if asked)
+    """
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    points = np.asarray(points, dtype=float)
+    direction = ends - starts
+    squared_length = np.einsum('...k,...k->...', direction, direction)
+    dot_product = np.einsum('...k,...k->...', points - starts, direction)
+    # a degenerate segment is a point: the projection is this point (t = 0)
+    degenerate = squared_length == 0
+    t = dot_product / np.where(degenerate, 1, squared_length)
+    t = np.where(degenerate, 0, t)
+    projections = starts + t[...,None] * direction
+    if return_parameter:
+        return projections, t
+    return projections
+
 def area_right_triangle(base, height):
     """
     Compute the area of a right triangle.
@@ -309,3 +532,1481 @@ def compute_area(x_1, x_2, y_1, y_2):
 
     return area
 
+
+# one step of the sweep, on the theoretical segment [coord_th[i], coord_th[i+1]]
+# and the experimental segment [coord_exp[j], coord_exp[j+1]]
+_sweep_step = _make_sweep_step(intersection, ortogonal_projection, compute_area)
+
+
+# In[3]:
+
+
+# Array engine
+#
+# The sweep of trajectory_error always works on one pair of segments: the
+# theoretical segment i and the experimental segment j. Each step either
+# consumes the experimental segment (j += 1) and adds some area, or leaves it
+# for the next theoretical segment (i += 1). The decision and the area only
+# depend on the four points of the pair, so whole runs of steps can be
+# classified at once with NumPy: we walk along j while i is fixed (and along i
+# while j is fixed) in blocks of growing size, and stop each block at the first
+# step that changes direction.
+#
+# Every quantity is expressed in the frame of the theoretical segment: with
+# d = th[i+1] - th[i] and w = point - th[i], the orthogonal projection of a
+# point is th[i] + t*d with t = (w.d)/(d.d), and its signed distance to the
+# line is cross(d,w)/|d|. The right triangles of trajectory_error then have
+# areas which are products of these values, so no square root is needed.
+#
+# Most runs are short when the route is dense, a few experimental points per
+# theoretical segment: a block then costs some thirty NumPy calls for one or
+# two steps. The first _SCALAR_STEPS steps of each run are taken one at a time
+# with _classify_step, the same computation on Python floats, and the blocks
+# only take over the runs which go on longer. The theoretical points are read
+# as Python floats from windows of _WINDOW points converted as the sweep goes:
+# converting the whole path would cost as much as sweeping a dense one.
+
+_SCALAR_STEPS = 32 # steps of a run taken one at a time, before the blocks
+_BLOCK = 16 # size of the first block of a run of steps
+_MAX_BLOCK = 1 << 16 # size of the largest blocks, which bounds the temporary arrays
+_WINDOW = 1024 # theoretical points converted to Python floats at once
+
+
+def _is_buffer(coords):
+    """
+    arg1 coords : a path.
+    return : a bool, True if the path is an object of the buffer protocol: an array,
+    an array('d'), a memoryview...
+    """
+    if isinstance(coords, (np.ndarray, memoryview)):
+        return True
+    try:
+        memoryview(coords)
+    except TypeError:
+        return False
+    return True
+
+
+def _as_columns(coords):
+    """
+    Convert a path to two float arrays, the abscissas and the ordinates.
+    arg1 coords : a list of tuples (x,y), an array or a buffer of shape (N,2),
+    Columns, or a StoredTrajectory, whose columns are returned as they are mapped.
+    A buffer of one dimension, as an array('d'), holds the coordinates interleaved
+    (x0, y0, x1, y1, ...), as a Polyline of oop_solution.py does.
+    return : xs, ys. Two arrays of floats of length N.
+    """
+    if isinstance(coords, (Columns, StoredTrajectory)):
+        return coords.x, coords.y
+    interleaved = _is_buffer(coords)
+    coords = np.asarray(coords, dtype=float)
+    if interleaved and coords.ndim == 1 and len(coords) % 2 == 0:
+        coords = coords.reshape(-1, 2)
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        raise ValueError("a path must be a sequence of (x,y) points, got shape %s"
+                         % (coords.shape,))
+    return coords[:,0], coords[:,1]
+
+
+def _drop_repeated_points(xs, ys):
+    """
+    Remove the consecutive duplicates of a path given as columns.
+    A theoretical segment of null length has no direction to project on.
+    arg1,2 xs, ys : two arrays of floats, the coordinates of the path.
+    return : xs, ys, the coordinates without consecutive duplicates.
+    """
+    keep = np.ones(len(xs), dtype=bool)
+    keep[1:] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+    if keep.all():
+        return xs, ys
+    return xs[keep], ys[keep]
+
+
+class Columns:
+    """
+    A path given as two columns, its abscissas and its ordinates, as the oracle
+    files write it, instead of a list of tuples. Each column can be any sequence
+    of numbers, or an object of the buffer protocol: an array, an array('d') or a
+    memoryview of float64 are used as they are, without a copy. Columns can be
+    given wherever a list of tuples (x,y) is expected, and can still be used as
+    a list of tuples (len, indexing, iteration), as a PreparedPath.
+    Attributes :
+    x, y : two arrays of N floats, the coordinates of the points.
+    
+    >>> from array import array
+    >>> path = Columns(array('d', [0, 1, 2]), [1, 1, 1])
+    >>> len(path), path[1], float(trajectory_error([(0,0),(2,0)], path))
+    (3, (1.0, 1.0), 1.0)
+    """
+    
+    def __init__(self, xs, ys):
+        """
+        Constructor.
+        arg1 xs : a sequence or a buffer of N numbers, the abscissas.
+        arg2 ys : a sequence or a buffer of N numbers, the ordinates.
+        """
+        self.x = np.asarray(xs, dtype=float)
+        self.y = np.asarray(ys, dtype=float)
+        if self.x.ndim != 1 or self.x.shape != self.y.shape:
+            raise ValueError("the columns of a path must be two sequences of the same length, got shapes %s and %s"
+                             % (self.x.shape, self.y.shape))
+    
+    def __len__(self):
+        return len(self.x)
+    
+    def __getitem__(self, i):
+        return (float(self.x[i]), float(self.y[i]))
+    
+    def __iter__(self):
+        return zip(self.x.tolist(), self.y.tolist())
+    
+    def __repr__(self):
+        return "Columns(%d points)" % len(self.x)
+
+
+PathProjection = namedtuple("PathProjection", ["segments", "points", "arc_lengths", "distances"])
+PathProjection.__doc__ = """
+Projections of points on a PreparedPath, one value per point in each array.
+segments : the index of the nearest segment of the path.
+points : an array of shape (N,2), the nearest point of the path.
+arc_lengths : the length of the path from its start to this point.
+distances : the distance from the point to the path.
+"""
+
+PathCrossings = namedtuple("PathCrossings", ["segments", "positions", "path_segments", "path_positions", "points"])
+PathCrossings.__doc__ = """
+Intersections of segments with a PreparedPath, one value per intersection in each array.
+segments : the index of the segment crossing the path.
+positions : the position u of the intersection on this segment, start + u * (end - start).
+path_segments : the index of the segment of the path.
+path_positions : the position t of the intersection on the segment of the path.
+points : an array of shape (K,2), the intersections.
+"""
+
+
+class PreparedPath:
+    """
+    A theoretical path prepared once, to be compared with many experimental paths.
+    It can be given to trajectory_error and path_length in place of the list of tuples,
+    and it can still be used as a list of tuples (len, indexing, iteration).
+    Consecutive duplicates of the path are removed: they have no direction.
+    The coordinates are copied: changing the path given afterwards does not change it.
+    
+    Attributes, for a path of N points after the removal of the duplicates:
+    x, y : two arrays of N floats, the coordinates of the points.
+    squared_lengths : an array of N-1 floats, for each segment.
+    length : a float, the total length of the path.
+    The sweep of trajectory_error reads only these; the others are computed on
+    first use, for the queries and the breakdowns:
+    lengths : an array of N-1 floats, for each segment.
+    cumulative_lengths : an array of N floats, the length of the path up to each point.
+    directions : an array of shape (N-1,2), the unit direction vector of each segment.
+    normals : an array of shape (N-1,2), the unit normal vector of each segment,
+    the direction rotated by a quarter turn counterclockwise.
+    bounding_boxes : an array of shape (N-1,4), (xmin, ymin, xmax, ymax) of each segment.
+    index : a SegmentGrid over the segments, for the queries project and crossings
+    which would otherwise scan the whole path.
+    """
+    
+    def __init__(self, coord_th):
+        """
+        Constructor.
+        arg1 coord_th : a list of tuples (x,y) or an array of shape (N,2), the theoretical path.
+        """
+        xs, ys = _as_columns(coord_th)
+        assert len(xs) > 1
+        # copies, which the path owns: the arrays derived from them would not
+        # follow a change of the caller's buffer, and a view would stop it from growing.
+        self.x, self.y = _drop_repeated_points(np.array(xs, dtype=float), np.array(ys, dtype=float))
+        dx = np.diff(self.x)
+        dy = np.diff(self.y)
+        self.squared_lengths = dx*dx + dy*dy
+        self._geometry = None
+        self.length = float(self.cumulative_lengths[-1])
+        self._index = None
+    
+    def __len__(self):
+        return len(self.x)
+    
+    def __getitem__(self, i):
+        return (self.x[i], self.y[i])
+    
+    def __iter__(self):
+        return zip(self.x, self.y)
+    
+    def _segments(self):
+        """
+        return : lengths, cumulative_lengths, directions, normals, bounding_boxes,
+        the arrays of the attributes, computed on first use.
+        """
+        if self._geometry is None:
+            dx = np.diff(self.x)
+            dy = np.diff(self.y)
+            lengths = np.sqrt(self.squared_lengths)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                directions = np.stack((dx, dy), axis=1) / lengths[:,None]
+            self._geometry = (lengths,
+                              np.concatenate(([0.0], np.cumsum(lengths))),
+                              directions,
+                              np.stack((-directions[:,1], directions[:,0]), axis=1),
+                              np.stack((np.minimum(self.x[:-1], self.x[1:]),
+                                        np.minimum(self.y[:-1], self.y[1:]),
+                                        np.maximum(self.x[:-1], self.x[1:]),
+                                        np.maximum(self.y[:-1], self.y[1:])), axis=1))
+        return self._geometry
+    
+    lengths = property(lambda self: self._segments()[0])
+    cumulative_lengths = property(lambda self: self._segments()[1])
+    directions = property(lambda self: self._segments()[2])
+    normals = property(lambda self: self._segments()[3])
+    bounding_boxes = property(lambda self: self._segments()[4])
+    
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = SegmentGrid(np.stack((self.x[:-1], self.y[:-1]), axis=1),
+                                      np.stack((self.x[1:], self.y[1:]), axis=1))
+        return self._index
+    
+    def project(self, points):
+        """
+        Project points on the nearest segment of the path.
+        arg1 points : an array of shape (N,2), or a list of tuples.
+        return : a PathProjection of the points.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        segments, distances = self.index.nearest_segments(points)
+        starts = self.index.starts[segments]
+        ends = self.index.ends[segments]
+        _, t = ortogonal_projections_many(starts, ends, points, return_parameter=True)
+        # the nearest point of a segment is the projection, moved back into the segment:
+        t = np.clip(t, 0, 1)
+        projections = starts + t[:,None] * (ends - starts)
+        arc_lengths = self.cumulative_lengths[segments] + t * self.lengths[segments]
+        return PathProjection(segments, projections, arc_lengths, distances)
+    
+    def edited(self, start, stop, points):
+        """
+        Build the path where the points start to stop excluded are replaced by others.
+        Only the segments touching the new points are computed, the others are copied,
+        and the length is updated from the lengths of the segments replaced. The
+        copies take a time linear in the size of the path, a memory copy of x, y
+        and squared_lengths: the other attributes are computed again on first use.
+        Consecutive duplicates are not removed: the caller checks squared_lengths.
+        arg1,2 start, stop : two ints, 0 <= start <= stop <= len(self).
+        arg3 points : a list of tuples (x,y), or an array of shape (K,2), the new points.
+        return : a PreparedPath.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        path = PreparedPath.__new__(PreparedPath)
+        path.x = np.concatenate((self.x[:start], points[:,0], self.x[stop:]))
+        path.y = np.concatenate((self.y[:start], points[:,1], self.y[stop:]))
+        assert len(path.x) > 1
+        # the segments first to last excluded of the new path replace the segments
+        # first to replaced excluded of this one:
+        first = max(start - 1, 0)
+        last = min(start + len(points), len(path.x) - 1)
+        replaced = min(stop, len(self.x) - 1)
+        dx = np.diff(path.x[first:last+1])
+        dy = np.diff(path.y[first:last+1])
+        squared_lengths = dx*dx + dy*dy
+        path.squared_lengths = np.concatenate((self.squared_lengths[:first], squared_lengths,
+                                               self.squared_lengths[replaced:]))
+        path.length = self.length + (np.sqrt(squared_lengths).sum()
+                                     - np.sqrt(self.squared_lengths[first:replaced]).sum())
+        path._geometry = None
+        path._index = None
+        return path
+    
+    def crossings(self, starts, ends):
+        """
+        Find the intersections of segments with the path. Collinear overlaps are not reported.
+        arg1 starts : an array of shape (M,2), the first points of the segments.
+        arg2 ends : an array of shape (M,2), the last points of the segments.
+        return : a PathCrossings, sorted by segment and then along each segment.
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        boxes = np.concatenate((np.minimum(starts, ends), np.maximum(starts, ends)), axis=1)
+        segments, path_segments = self.index.segments_in_boxes(boxes)
+        # intersection of a + t*d (the path) and p + u*e (the segments):
+        a = self.index.starts[path_segments]
+        d = self.index.ends[path_segments] - a
+        p = starts[segments]
+        e = ends[segments] - p
+        w = p - a
+        denominator = d[:,0]*e[:,1] - d[:,1]*e[:,0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (w[:,0]*e[:,1] - w[:,1]*e[:,0]) / denominator
+            u = (w[:,0]*d[:,1] - w[:,1]*d[:,0]) / denominator
+        found = (denominator != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+        segments, path_segments, t, u = segments[found], path_segments[found], t[found], u[found]
+        order = np.lexsort((u, segments))
+        segments, path_segments, t, u = segments[order], path_segments[order], t[order], u[order]
+        points = self.index.starts[path_segments] + t[:,None] * (self.index.ends[path_segments]
+                                                                 - self.index.starts[path_segments])
+        return PathCrossings(segments, u, path_segments, t, points)
+
+
+def _classify_steps(path, exp_x, exp_y, i, j, with_area=True):
+    """
+    Classify sweep steps and compute the area they add, for many steps at once.
+    i and j are broadcast against each other: usually one of them is an int and
+    the other an array of consecutive indices.
+    arg1 path : a PreparedPath, the theoretical path.
+    arg2,3 exp_x, exp_y : the coordinates of the experimental path.
+    arg4 i : an int or an array of ints, indices of theoretical segments.
+    arg5 j : an int or an array of ints, indices of experimental segments.
+    arg6 with_area : a boolean, compute the areas. Otherwise only the branches are needed.
+    return : branch, area. Two arrays: the branch taken by each step (_ADVANCE,
+    _CROSS_ON, _CROSS_OFF or _QUAD) and the area it adds to the total (None if
+    with_area is False).
+    """
+    # theoretical segment [a, b] and its direction d:
+    ax, ay = path.x[i], path.y[i]
+    bx, by = path.x[i+1], path.y[i+1]
+    dx, dy = bx - ax, by - ay
+    squared_length = path.squared_lengths[i]
+    # experimental segment [p, q] and its direction e:
+    px, py = exp_x[j], exp_y[j]
+    qx, qy = exp_x[j+1], exp_y[j+1]
+    ex, ey = qx - px, qy - py
+
+    # orthogonal projections of p and q on the line (a,b), as dot products:
+    wpx, wpy = px - ax, py - ay
+    wqx, wqy = qx - ax, qy - ay
+    dot_p = wpx*dx + wpy*dy
+    dot_q = wqx*dx + wqy*dy
+    both_in = (dot_p >= 0) & (dot_p <= squared_length)\
+            & (dot_q >= 0) & (dot_q <= squared_length)
+
+    # intersection of the lines (a,b) and (p,q): a + t*d = p + u*e
+    denominator = dx*ey - dy*ex
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (wpx*ey - wpy*ex) / denominator
+        u = (wpx*dy - wpy*dx) / denominator
+    # like intersection(), keep the point if it belongs to one of the segments:
+    crosses = (denominator != 0)\
+            & (((t >= 0) & (t <= 1)) | ((u >= 0) & (u <= 1)))
+    at_vertex = crosses & (px == bx) & (py == by)
+
+    crosses_inside = crosses & ~at_vertex
+    # a repeated point, an experimental segment of null length, is consumed with an area of 0:
+    quad = ~crosses & (both_in | ((ex == 0) & (ey == 0)))
+    branch = np.where(crosses_inside,
+                      np.where(both_in, _CROSS_ON, _CROSS_OFF),
+                      np.where(quad, _QUAD, _ADVANCE))
+    if not with_area:
+        return branch, None
+
+    # positions of the projections of p and q, and of the intersection:
+    t_p = dot_p / squared_length
+    t_q = dot_q / squared_length
+    with np.errstate(invalid='ignore'):
+        xx, xy = ax + t*dx, ay + t*dy
+    # cross products, proportional to the distances of p and q to the line (a,b):
+    cross_p = dx*wpy - dy*wpx
+    cross_q = dx*wqy - dy*wqx
+    with np.errstate(invalid='ignore'):
+        # right triangles (p, projection of p, intersection) and (intersection, q, projection of q):
+        area_on = (np.abs(t_p - t)*np.abs(cross_p) + np.abs(t_q - t)*np.abs(cross_q)) / 2
+        # triangles (p, intersection, a) and (q, intersection, b):
+        area_off = (np.abs((xx - px)*(ay - py) - (xy - py)*(ax - px))\
+                  + np.abs((xx - qx)*(by - qy) - (xy - qy)*(bx - qx))) / 2
+        # quadrilateral (projection of p, projection of q, p, q):
+        area_quad = np.abs(t_q - t_p)*(np.abs(cross_p) + np.abs(cross_q)) / 2
+    area = np.where(crosses_inside,
+                    np.where(both_in, area_on, area_off),
+                    np.where(quad, area_quad, 0.0))
+    return branch, area
+
+
+def _classify_step(ax, ay, bx, by, squared_length, px, py, qx, qy, with_area=True):
+    """
+    Classify one sweep step and compute the area it adds, as _classify_steps
+    does, on floats: the operations are the same, so are the results.
+    arg1,2,3,4 ax, ay, bx, by : the coordinates of the theoretical segment [a, b].
+    arg5 squared_length : a float, the squared length of [a, b], not 0.
+    arg6,7,8,9 px, py, qx, qy : the coordinates of the experimental segment [p, q].
+    arg10 with_area : a boolean, compute the area. Otherwise only the branch is needed.
+    return : branch, area. The branch taken by the step, and the area it adds
+    (None if with_area is False).
+    """
+    dx, dy = bx - ax, by - ay
+    ex, ey = qx - px, qy - py
+    wpx, wpy = px - ax, py - ay
+    wqx, wqy = qx - ax, qy - ay
+    dot_p = wpx*dx + wpy*dy
+    dot_q = wqx*dx + wqy*dy
+    both_in = 0 <= dot_p <= squared_length and 0 <= dot_q <= squared_length
+    denominator = dx*ey - dy*ex
+    crosses = False
+    if denominator != 0:
+        t = (wpx*ey - wpy*ex) / denominator
+        u = (wpx*dy - wpy*dx) / denominator
+        crosses = 0 <= t <= 1 or 0 <= u <= 1
+    if crosses and not (px == bx and py == by):
+        branch = _CROSS_ON if both_in else _CROSS_OFF
+    elif not crosses and (both_in or (ex == 0 and ey == 0)):
+        # a repeated point, an experimental segment of null length, is consumed with an area of 0
+        branch = _QUAD
+    else:
+        return _ADVANCE, 0.0
+    if not with_area:
+        return branch, None
+
+    t_p = dot_p / squared_length
+    t_q = dot_q / squared_length
+    cross_p = dx*wpy - dy*wpx
+    cross_q = dx*wqy - dy*wqx
+    if branch == _CROSS_ON:
+        return branch, (abs(t_p - t)*abs(cross_p) + abs(t_q - t)*abs(cross_q)) / 2
+    if branch == _CROSS_OFF:
+        xx, xy = ax + t*dx, ay + t*dy
+        return branch, (abs((xx - px)*(ay - py) - (xy - py)*(ax - px))
+                        + abs((xx - qx)*(by - qy) - (xy - qy)*(bx - qx))) / 2
+    return branch, abs(t_q - t_p)*(abs(cross_p) + abs(cross_q)) / 2
+
+
+def trajectory_error_vectorized(coord_th, coord_exp):
+    """
+    Compute the same error as trajectory_error, with batched NumPy operations.
+    The sweep advances over runs of steps instead of one step at a time, so the
+    cost grows linearly with len(coord_th) + len(coord_exp).
+    Consecutive duplicates of the theoretical path are ignored.
+    arg1 coord_th : an array of shape (N,2), a list of tuples (x,y) or a PreparedPath.
+    The path which should be followed.
+    arg2 coord_exp: an array of shape (M,2), or a list of tuples (x,y). The points received from the "indoors-gps"
+    It can also be a trajstore.StoredTrajectory, which is swept window by window.
+    return: error, the total area difference betweeen the theoretical trajectory
+    and the experimental one, divided by the length of coord_th.
+    """
+    if not isinstance(coord_th, PreparedPath):
+        coord_th = PreparedPath(coord_th)
+    if isinstance(coord_exp, StoredTrajectory):
+        return _sweep_windows(coord_th, coord_exp.windows()) / coord_th.length
+    exp_x, exp_y = _as_columns(coord_exp)
+    return _sweep_area(coord_th, exp_x, exp_y) / coord_th.length
+
+
+def _sweep_area(coord_th, exp_x, exp_y, budget=np.inf, steps=None):
+    """
+    Sweep both paths in runs of steps, as trajectory_error_vectorized does.
+    arg1 coord_th : a PreparedPath, the theoretical path.
+    arg2,3 exp_x, exp_y : the coordinates of the experimental path.
+    arg4 budget : a float. The sweep stops as soon as the area reaches it: the
+    area of a step is never negative, so the total cannot go back under it.
+    arg5 steps : None, or two arrays of len(exp_x)-1 ints (segments, branches), filled
+    with the theoretical segment and the branch of the step consuming each experimental
+    segment. The segments left over by the sweep are not written.
+    return : area, the total area between the paths, or an area reaching budget.
+    """
+    return _sweep_run(coord_th, exp_x, exp_y, 0, budget, steps)[0]
+
+
+def _sweep_windows(coord_th, windows):
+    """
+    Sweep an experimental path given by consecutive windows, which share their
+    extremities. A window ends the sweep with all its segments consumed, so the
+    sweep of the next one starts on the same theoretical segment, as one sweep
+    of the whole path would.
+    arg1 coord_th : a PreparedPath, the theoretical path.
+    arg2 windows : an iterable of (xs, ys), the coordinates of the windows.
+    return : area, the total area between the paths.
+    """
+    area, i = 0.0, 0
+    for xs, ys in windows:
+        window_area, i, _ = _sweep_run(coord_th, xs, ys, i)
+        area += window_area
+        if i+1 >= len(coord_th):
+            break
+    return area
+
+
+def _sweep_run(coord_th, exp_x, exp_y, i, budget=np.inf, steps=None):
+    """
+    Sweep both paths in runs of steps, from the theoretical segment i and the
+    first experimental segment.
+    arg1 coord_th : a PreparedPath, the theoretical path.
+    arg2,3 exp_x, exp_y : the coordinates of the experimental path.
+    arg4 i : an int, the theoretical segment where the sweep starts.
+    arg5,6 budget, steps : as for _sweep_area.
+    return : area, i, j. The area found, and the segments where the sweep stopped.
+    """
+    # initialize values:
+    area = 0.0 # the total area between the theoretical and experimental paths
+    j = 0 # iterator over the experimental path
+    n, m = len(coord_th), len(exp_x)
+    low = high = 0 # the theoretical points low to high excluded, as lists of floats:
+    th_x = th_y = squared_lengths = []
+
+    while i+1 < n and j+1 < m:
+        if high < min(i + _SCALAR_STEPS + 2, n):
+            # both runs below read the points i to i+_SCALAR_STEPS+1 at most:
+            low, high = i, min(i + _WINDOW, n)
+            th_x, th_y = coord_th.x[low:high].tolist(), coord_th.y[low:high].tolist()
+            squared_lengths = coord_th.squared_lengths[low:high].tolist()
+        # run along the experimental path, on the theoretical segment i, first one step at a time:
+        k = i - low
+        ax, ay, bx, by, squared_length = th_x[k], th_y[k], th_x[k+1], th_y[k+1], squared_lengths[k]
+        stop = min(j + _SCALAR_STEPS, m - 1)
+        xs, ys = exp_x[j:stop+1].tolist(), exp_y[j:stop+1].tolist()
+        for k in range(stop - j):
+            branch, step_area = _classify_step(ax, ay, bx, by, squared_length,
+                                               xs[k], ys[k], xs[k+1], ys[k+1])
+            if branch == _ADVANCE:
+                j += k
+                i += 1 # advance along the theoretical path
+                break
+            area += step_area
+            if steps is not None:
+                steps[0][j+k], steps[1][j+k] = i, branch
+        else:
+            # then in blocks, as the run goes on:
+            j = stop
+            size = _BLOCK
+            while j+1 < m:
+                stop = min(j + size, m - 1)
+                branch, step_area = _classify_steps(coord_th, exp_x, exp_y, i, np.arange(j, stop))
+                advance = np.flatnonzero(branch == _ADVANCE)
+                if advance.size:
+                    k = advance[0]
+                    area += step_area[:k].sum()
+                    if steps is not None:
+                        steps[0][j:j+k], steps[1][j:j+k] = i, branch[:k]
+                    j += k
+                    i += 1 # advance along the theoretical path
+                    break
+                area += step_area.sum()
+                if steps is not None:
+                    steps[0][j:stop], steps[1][j:stop] = i, branch
+                j = stop
+                size = min(2 * size, _MAX_BLOCK)
+                if area >= budget:
+                    return area, i, j
+        if area >= budget:
+            return area, i, j
+        if i+1 >= n or j+1 >= m:
+            break
+
+        # run along the theoretical path, as long as the experimental segment j is left over:
+        (px, qx), (py, qy) = exp_x[j:j+2].tolist(), exp_y[j:j+2].tolist()
+        stop = min(i + _SCALAR_STEPS, n - 1)
+        for k in range(i - low, stop - low):
+            branch, _ = _classify_step(th_x[k], th_y[k], th_x[k+1], th_y[k+1], squared_lengths[k],
+                                       px, py, qx, qy, with_area=False)
+            if branch != _ADVANCE:
+                i = low + k
+                break
+        else:
+            i = stop
+            size = _BLOCK
+            while i+1 < n:
+                stop = min(i + size, n - 1)
+                branch, _ = _classify_steps(coord_th, exp_x, exp_y, np.arange(i, stop), j,
+                                            with_area=False)
+                consume = np.flatnonzero(branch != _ADVANCE)
+                if consume.size:
+                    i += consume[0]
+                    break
+                i = stop
+                size = min(2 * size, _MAX_BLOCK)
+
+    return area, i, j
+
+
+# In[4]:
+
+
+# Batch scoring
+#
+# Each pair is packed into two contiguous float64 arrays of shape (N,2) before
+# it is sent to a worker process: arrays are pickled as raw buffers, which is
+# far cheaper than lists of tuples. When several pairs share the same route
+# object, it is packed once, and pickle sends it once per chunk. A
+# StoredTrajectory is sent as the name of its file, without its points.
+
+PairScore = namedtuple("PairScore", ["error", "exception"])
+PairScore.__doc__ = """
+The result of one pair of trajectory_error_many.
+error : a float, the trajectory error, or None if the computation failed.
+exception : None, or the exception raised by the computation.
+"""
+
+
+def _pack(coords, drop_repeated=False):
+    """
+    Convert a path to a contiguous array of floats of shape (N,2).
+    arg1 coords : a list of tuples (x,y), an array of shape (N,2), a PreparedPath
+    or a StoredTrajectory.
+    arg2 drop_repeated : a boolean, remove the consecutive duplicates of the path.
+    return : an array of shape (N,2), or the StoredTrajectory, which is pickled
+    as the name of its file and mapped again by the worker.
+    """
+    if isinstance(coords, StoredTrajectory):
+        return coords
+    if isinstance(coords, PreparedPath):
+        return np.stack((coords.x, coords.y), axis=1)
+    xs, ys = _as_columns(coords)
+    if drop_repeated:
+        xs, ys = _drop_repeated_points(xs, ys)
+    return np.stack((xs, ys), axis=1)
+
+
+def _score_chunk(chunk):
+    """
+    Score a chunk of packed pairs. This runs in the worker processes.
+    arg1 chunk : a list of (index, th, exp) with th and exp arrays of shape (N,2).
+    return : a list of (index, PairScore).
+    """
+    prepared = {} # the routes shared by several pairs are prepared once
+    results = []
+    for index, th, exp in chunk:
+        try:
+            if id(th) not in prepared:
+                prepared[id(th)] = PreparedPath(th)
+            results.append((index, PairScore(trajectory_error_vectorized(prepared[id(th)], exp), None)))
+        except Exception as exception:
+            results.append((index, PairScore(None, exception)))
+    return results
+
+
+def trajectory_error_many(pairs, workers=None, chunksize=None):
+    """
+    Compute the trajectory error of many pairs of paths, in parallel.
+    The pairs are scored with the array engine trajectory_error_vectorized, after
+    the repeated points of the experimental paths are dropped (see drop_repeated_points).
+    A trajstore.StoredTrajectory is swept as it is, window by window.
+    arg1 pairs : an iterable of (coord_th, coord_exp), as given to trajectory_error_vectorized.
+    The same coord_th object may be used by many pairs, it is then packed only once.
+    arg2 workers : an int, the number of worker processes. None uses every core,
+    and 0 or 1 score the pairs in the current process.
+    arg3 chunksize : an int, the number of pairs sent at once to a worker.
+    By default the pairs are split in about four chunks per worker.
+    return : a list of PairScore, in the order of pairs. A pair whose computation
+    failed has error None and the exception raised, the others are not affected.
+    """
+    pairs = list(pairs)
+    results = [None] * len(pairs)
+    
+    # pack the pairs, each route once:
+    packed_routes = {}
+    packed = []
+    for index, (coord_th, coord_exp) in enumerate(pairs):
+        try:
+            if id(coord_th) not in packed_routes:
+                packed_routes[id(coord_th)] = _pack(coord_th)
+            packed.append((index, packed_routes[id(coord_th)], _pack(coord_exp, drop_repeated=True)))
+        except Exception as exception:
+            results[index] = PairScore(None, exception)
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, -(-len(packed) // (4 * max(workers, 1))))
+    chunks = [packed[k:k + chunksize] for k in range(0, len(packed), chunksize)]
+    
+    if workers <= 1:
+        scored = map(_score_chunk, chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            scored = list(executor.map(_score_chunk, chunks))
+    for chunk_results in scored:
+        for index, score in chunk_results:
+            results[index] = score
+    return results
+
+
+# In[5]:
+
+
+def _as_tuple(point):
+    """
+    Convert a point to a tuple of Python numbers, as the functions of the sweep expect.
+    arg1 point : a tuple, a list or an array of two numbers.
+    return : a tuple (x,y).
+    """
+    if isinstance(point, np.ndarray):
+        point = point.tolist()
+    return tuple(point)
+
+
+class TrajectoryErrorAccumulator:
+    """
+    Compute the trajectory error of an experimental path received one point at a time.
+    It keeps the state of the sweep of trajectory_error between the points, so that
+    each new point only costs the steps it makes possible: amortized O(1). A point
+    equal to the previous one is dropped, as a stationary object sends many of them:
+    the error is always equal to trajectory_error(coord_th, drop_repeated_points(points received so far)).
+    
+    >>> accumulator = TrajectoryErrorAccumulator([(0,0),(0,1)])
+    >>> accumulator.push((1,0))
+    >>> accumulator.push((-1,1))
+    >>> float(accumulator.current_error())
+    0.5
+    """
+    
+    def __init__(self, coord_th):
+        """
+        Constructor.
+        arg1 coord_th : a list of tuples (x,y), or a PreparedPath. The path which should be followed.
+        """
+        self.coord_th = coord_th
+        self.area = 0 # the total area between the theoretical and experimental paths so far
+        self.distance = path_length(coord_th) # total theoretical path length
+        self.i = 0 # iterator over the theoretical path
+        self.j = 0 # iterator over the experimental path
+        # the points of the experimental path from index j, the previous ones are not needed anymore:
+        self._pending = deque()
+    
+    def push(self, point):
+        """
+        Add a point at the end of the experimental path.
+        arg1 point : a tuple (x,y).
+        """
+        point = _as_tuple(point)
+        if not self._pending or point != self._pending[-1]:
+            self._pending.append(point)
+            self._sweep()
+    
+    def push_many(self, points):
+        """
+        Add many points at the end of the experimental path.
+        arg1 points : a list of tuples (x,y), or an array of shape (N,2).
+        """
+        if isinstance(points, np.ndarray):
+            points = points.tolist()
+        pending = self._pending
+        for point in points:
+            point = _as_tuple(point)
+            # the pending points always end with the last point kept:
+            if not pending or point != pending[-1]:
+                pending.append(point)
+        self._sweep()
+    
+    def current_error(self):
+        """
+        return: the trajectory error of the experimental path received so far.
+        """
+        return self.area / self.distance
+    
+    def _sweep(self):
+        """
+        Perform the steps of the sweep allowed by the points received.
+        """
+        coord_th = self.coord_th
+        pending = self._pending
+        while self.i+1 < len(coord_th) and len(pending) > 1:
+            step_area, branch = _sweep_step(coord_th, pending, self.i, 0)
+            self.area += step_area
+            if branch == _ADVANCE:
+                self.i += 1 # advance along the theoretical path
+            else:
+                pending.popleft()
+                self.j += 1 # advance along the experimental path
+
+
+# In[6]:
+
+
+ErrorBreakdown = namedtuple("ErrorBreakdown", ["error", "area", "distance", "theoretical_areas",
+                                               "experimental_areas", "arc_lengths"])
+ErrorBreakdown.__doc__ = """
+The trajectory error, with the share of each segment of both paths.
+error : a float, equal to trajectory_error(coord_th, coord_exp).
+area, distance : two floats, the total area and the length of coord_th, error = area / distance.
+theoretical_areas : an array of len(coord_th)-1 floats, the area found on each theoretical segment.
+experimental_areas : an array of len(coord_exp)-1 floats, the area found on each experimental segment.
+arc_lengths : an array of len(coord_th) floats, the length of coord_th from its start to each point.
+Both arrays of areas sum to area, up to the rounding of the sums.
+"""
+
+
+def trajectory_error_breakdown(coord_th, coord_exp):
+    """
+    Compute the trajectory error and how it is shared between the segments of
+    both paths, in the single sweep of trajectory_error: each step adds its area
+    to the theoretical segment i and the experimental segment j it works on.
+    arg1 coord_th : a list of tuples (x,y). The path which should be followed.
+    A PreparedPath is swept as the list of its points.
+    arg2 coord_exp: a list of tuples (x,y). The points received from the "indoors-gps"
+    Both paths can also be given as Columns, or as buffers (see trajectory_error),
+    which are swept as the lists of their points.
+    return: an ErrorBreakdown.
+    
+    >>> breakdown = trajectory_error_breakdown([(0,0),(0,2),(2,2)], [(0,0),(1,1),(0,2),(2,2)])
+    >>> breakdown.theoretical_areas.tolist(), breakdown.experimental_areas.tolist()
+    ([1.0, 0.0], [0.5, 0.5, 0.0])
+    """
+    # a buffer is read as two columns, as trajectory_error does:
+    if _is_buffer(coord_th):
+        coord_th = Columns(*_as_columns(coord_th))
+    if _is_buffer(coord_exp):
+        coord_exp = Columns(*_as_columns(coord_exp))
+    if isinstance(coord_th, (PreparedPath, Columns)):
+        coord_th = list(coord_th)
+    if isinstance(coord_exp, Columns):
+        coord_exp = list(coord_exp)
+    theoretical_areas = np.zeros(max(len(coord_th) - 1, 0))
+    experimental_areas = np.zeros(max(len(coord_exp) - 1, 0))
+    arc_lengths = np.zeros(len(coord_th))
+    
+    # initialize values, as trajectory_error does:
+    area = 0 # the total area between the theoretical and experimental paths
+    distance = path_length(coord_th) # total theoretical path length
+    j = 0 # iterator over the experimental path
+    i = 0 # iterator over the theoretical path
+    
+    while (i+1 < len(coord_th) and j+1 < len(coord_exp)):
+        step_area, branch = _sweep_step(coord_th, coord_exp, i, j)
+        area += step_area
+        if branch == _ADVANCE:
+            i += 1 # advance along the theoretical path
+        else:
+            theoretical_areas[i] += step_area
+            experimental_areas[j] = step_area
+            j += 1 # advance along the experimental path
+    
+    # the same additions as path_length, so that arc_lengths[-1] == distance:
+    leng = 0
+    for k in range(len(coord_th)-1):
+        leng += seg_length(coord_th[k], coord_th[k+1])
+        arc_lengths[k+1] = leng
+    return ErrorBreakdown(area / distance, area, distance, theoretical_areas, experimental_areas, arc_lengths)
+
+
+# In[7]:
+
+
+def within_tolerance(coord_th, coord_exp, max_error):
+    """
+    Tell whether the trajectory error is under a budget, that is,
+    trajectory_error(coord_th, coord_exp) < max_error, without always computing it.
+    The area of a step of the sweep is never negative: the sweep stops as soon as
+    the area found so far gives an error reaching max_error, the remaining steps
+    cannot bring it back under. A run far off its route is rejected after its first
+    few steps, only the runs within the budget are swept to the end.
+    arg1 coord_th : a list of tuples (x,y). The path which should be followed.
+    It can also be a PreparedPath, then the array engine trajectory_error_vectorized is used.
+    arg2 coord_exp: a list of tuples (x,y). The points received from the "indoors-gps"
+    When either path is given as Columns, or as a buffer (see trajectory_error),
+    the array engine is used too.
+    arg3 max_error : a float, the largest error refused.
+    return : a bool, True iff the error is strictly under max_error.
+    
+    >>> within_tolerance([(0,0),(0,1)], [(0,0),(1,1)], 0.6), within_tolerance([(0,0),(0,1)], [(0,0),(1,1)], 0.5)
+    (True, False)
+    """
+    # a buffer is read as two columns, as trajectory_error does:
+    if _is_buffer(coord_th):
+        coord_th = Columns(*_as_columns(coord_th))
+    if _is_buffer(coord_exp):
+        coord_exp = Columns(*_as_columns(coord_exp))
+    if isinstance(coord_th, (PreparedPath, Columns)) or isinstance(coord_exp, Columns):
+        if not isinstance(coord_th, PreparedPath):
+            coord_th = PreparedPath(coord_th)
+        distance = coord_th.length
+        exp_x, exp_y = _as_columns(coord_exp)
+        area = _sweep_area(coord_th, exp_x, exp_y, budget=max_error * distance)
+        return bool(area / distance < max_error)
+    
+    # the budget as an area, computed once; the error itself is only checked once
+    # the area reaches it, so that the answer is the one of trajectory_error:
+    distance = path_length(coord_th) # total theoretical path length
+    budget = max_error * distance
+    area = 0 # the total area between the theoretical and experimental paths
+    j = 0 # iterator over the experimental path
+    i = 0 # iterator over the theoretical path
+    while (i+1 < len(coord_th) and j+1 < len(coord_exp)):
+        step_area, branch = _sweep_step(coord_th, coord_exp, i, j)
+        area += step_area
+        if branch == _ADVANCE:
+            i += 1 # advance along the theoretical path
+        else:
+            j += 1 # advance along the experimental path
+            if area >= budget and area / distance >= max_error:
+                return False
+    return bool(area / distance < max_error)
+
+
+# In[8]:
+
+
+# Shoelace engine
+#
+# The area between the paths is the area of the polygons they enclose between
+# two consecutive crossings. The area of a polygon is half the absolute value
+# of its shoelace sum, the sum of the cross products x_k*y_(k+1) - x_(k+1)*y_k
+# of its consecutive vertices. Along a path, these sums are cumulative: with S
+# the cumulative sums of the cross products of the segments, the part of the
+# sum from the start of the path to the point P_s + u*(P_(s+1) - P_s) is
+# S[s] + u*cross(P_s, P_(s+1)). The polygon between two crossings goes forward
+# along the experimental path and back along the theoretical one, so its sum is
+# a difference of four such values: no square root, and one pass over each path
+# once the crossings are found. The ends are joined by the segments from the
+# projections of the extremities of the experimental path on the theoretical one.
+#
+# The crossings are found with the SegmentGrid of the PreparedPath, in time
+# proportional to the pairs of segments sharing a cell of the grid: linear for
+# a route which crosses itself a few times, as indoor routes do, but quadratic
+# for a route crossing the same room again and again (the star polygon of the
+# "crossings" scenario of synthetic.py).
+
+_CROSSING_CHUNK = 1024 # experimental segments intersected with the path at once
+
+
+def _chunked_crossings(path, exp_x, exp_y):
+    """
+    Find the intersections of the segments of an experimental path with a
+    PreparedPath, by chunks of _CROSSING_CHUNK segments: a route crossing a
+    region many times has many candidate segments for each one.
+    arg1 path : a PreparedPath, the theoretical path.
+    arg2,3 exp_x, exp_y : the coordinates of the experimental path.
+    return : a PathCrossings, sorted along the experimental path.
+    """
+    points = np.stack((exp_x, exp_y), axis=1)
+    chunks = []
+    for start in range(0, len(points) - 1, _CROSSING_CHUNK):
+        stop = min(start + _CROSSING_CHUNK, len(points) - 1)
+        chunk = path.crossings(points[start:stop], points[start+1:stop+1])
+        chunks.append(chunk._replace(segments=chunk.segments + start))
+    return PathCrossings(*(np.concatenate(column) for column in zip(*chunks)))
+
+
+def _forward_chain(values):
+    """
+    Find the longest subsequence of values which never decreases.
+    arg1 values : an array of floats.
+    return : an array of ints, the indices of the subsequence, in increasing order.
+    """
+    if np.all(values[1:] >= values[:-1]):
+        return np.arange(len(values)) # already in order, as along a route which does not cross itself
+    tails, tail_values = [], [] # the last index and value of the best chain of each length
+    previous = [-1] * len(values) # the index before each one in its chain
+    for k, value in enumerate(values.tolist()):
+        length = bisect.bisect_right(tail_values, value)
+        if length:
+            previous[k] = tails[length-1]
+        if length == len(tails):
+            tails.append(k)
+            tail_values.append(value)
+        else:
+            tails[length], tail_values[length] = k, value
+    chain = []
+    k = tails[-1] if tails else -1
+    while k >= 0:
+        chain.append(k)
+        k = previous[k]
+    return np.array(chain[::-1], dtype=np.intp)
+
+
+def _shoelace_part(path, exp_x, exp_y, start, stop):
+    """
+    Find the crossings of a part of an experimental path with a PreparedPath,
+    and the shoelace sums of the part up to each of them.
+    arg1 path : a PreparedPath, the theoretical path.
+    arg2,3 exp_x, exp_y : the coordinates of the experimental path.
+    arg4,5 start, stop : two ints, the part is made of the segments start to stop
+    excluded, from the point start to the point stop.
+    return : crossings, along, total. A PathCrossings of the part, with the indices
+    of the whole path; the shoelace sum of the part from the point start to each
+    crossing; and the sum of the whole part.
+    """
+    # coordinates from the first point of the path, to keep the cross products small:
+    ex, ey = exp_x[start:stop+1] - path.x[0], exp_y[start:stop+1] - path.y[0]
+    exp_cross = ex[:-1]*ey[1:] - ex[1:]*ey[:-1]
+    exp_sums = np.concatenate(([0.0], np.cumsum(exp_cross)))
+    crossings = _chunked_crossings(path, exp_x[start:stop+1], exp_y[start:stop+1])
+    along = exp_sums[crossings.segments] + crossings.positions*exp_cross[crossings.segments]
+    return crossings._replace(segments=crossings.segments + start), along, exp_sums[-1]
+
+
+def _shoelace_area(path, exp_x, exp_y, crossings, along, total):
+    """
+    Compute the area of the polygons enclosed by the paths between their crossings.
+    arg1 path : a PreparedPath, the theoretical path.
+    arg2,3 exp_x, exp_y : the coordinates of the experimental path, at least two points.
+    arg4,5,6 crossings, along, total : as returned by _shoelace_part for the whole
+    experimental path.
+    return : a float, the area.
+    """
+    n = len(path)
+    tx, ty = path.x - path.x[0], path.y - path.y[0]
+    ex, ey = exp_x[[0,-1]] - path.x[0], exp_y[[0,-1]] - path.y[0]
+    th_cross = tx[:-1]*ty[1:] - tx[1:]*ty[:-1]
+    th_sums = np.concatenate(([0.0], np.cumsum(th_cross)))
+
+    # the extremities of the experimental path, projected on the first and the last segments:
+    t_start = ((ex[0] - tx[0])*(tx[1] - tx[0]) + (ey[0] - ty[0])*(ty[1] - ty[0]))\
+              / path.squared_lengths[0]
+    t_end = ((ex[-1] - tx[-2])*(tx[-1] - tx[-2]) + (ey[-1] - ty[-2])*(ty[-1] - ty[-2]))\
+            / path.squared_lengths[-1]
+    t_start, t_end = min(max(t_start, 0.0), 1.0), min(max(t_end, 0.0), 1.0)
+
+    # the polygons are between the consecutive crossings, and the extremities.
+    # Where the route passes again at the same place, the experimental path also
+    # crosses the other passes: only the longest chain of crossings going forward
+    # along the route, between the extremities, is kept.
+    arc_lengths = path.cumulative_lengths[crossings.path_segments]\
+                + crossings.path_positions * path.lengths[crossings.path_segments]
+    inside = np.flatnonzero((arc_lengths >= t_start * path.lengths[0])
+                            & (arc_lengths <= path.cumulative_lengths[-2] + t_end * path.lengths[-1]))
+    kept = inside[_forward_chain(arc_lengths[inside])]
+    th_segments = np.concatenate(([0], crossings.path_segments[kept], [n-2]))
+    t = np.concatenate(([t_start], crossings.path_positions[kept], [t_end]))
+    along = np.concatenate(([0.0], along[kept], [total]))\
+          - th_sums[th_segments] - t*th_cross[th_segments]
+    sums = np.diff(along)
+    # the segments joining the paths at their extremities:
+    start_x, start_y = tx[0] + t_start*(tx[1] - tx[0]), ty[0] + t_start*(ty[1] - ty[0])
+    end_x, end_y = tx[-2] + t_end*(tx[-1] - tx[-2]), ty[-2] + t_end*(ty[-1] - ty[-2])
+    sums[0] += start_x*ey[0] - ex[0]*start_y
+    sums[-1] += ex[-1]*end_y - end_x*ey[-1]
+    return np.abs(sums).sum() / 2
+
+
+def trajectory_error_shoelace(coord_th, coord_exp):
+    """
+    Compute the trajectory error as the area of the polygons enclosed by both
+    paths between their crossings, divided by the length of coord_th. This is
+    the area trajectory_error finds when its sweep follows the paths; the
+    polygons are only those of the paths when the crossings come in the same
+    order along both paths.
+    arg1 coord_th : an array of shape (N,2), a list of tuples (x,y) or a PreparedPath.
+    The path which should be followed.
+    arg2 coord_exp: an array of shape (M,2), or a list of tuples (x,y). The points received from the "indoors-gps"
+    return: error, the total area difference betweeen the theoretical trajectory
+    and the experimental one, divided by the length of coord_th.
+    
+    >>> float(trajectory_error_shoelace([(0,0),(0,2)], [(0,0),(1,0),(-1,1),(1,2),(0,2)]))
+    0.5
+    """
+    if not isinstance(coord_th, PreparedPath):
+        coord_th = PreparedPath(coord_th)
+    # the repeated points add no area, and the sweep consumes them without one:
+    exp_x, exp_y = _drop_repeated_points(*_as_columns(coord_exp))
+    m = len(exp_x)
+    if m < 2:
+        return 0.0
+    crossings, along, total = _shoelace_part(coord_th, exp_x, exp_y, 0, m-1)
+    return _shoelace_area(coord_th, exp_x, exp_y, crossings, along, total) / coord_th.length
+
+
+# In[9]:
+
+
+# Backtracking engine
+#
+# The sweep of trajectory_error only moves forward along the theoretical path:
+# where the tracked object doubles back, it counts the area again at each pass,
+# or leaves the experimental points to the next segments and loses them.
+# trajectory_error_backtracking maps each experimental point to its arc length
+# along the theoretical path, at its closest point, and its signed distance to
+# the path. The closest segment is found from the one of the previous point,
+# moving to a neighbour segment while it is closer, so the mapping follows the
+# experimental path both ways. Each experimental segment then covers the interval
+# of arc lengths between the positions of its extremities, and the area between
+# the paths above it is the integral of the distance, linear along the interval.
+# The intervals already covered are kept in an IntervalSet, and the area above
+# their parts covered again is subtracted: the area between the paths is counted
+# once, at the first pass.
+
+def _arc_position(xs, ys, cumulative, i, x, y):
+    """
+    Find the position of a point along a path, from a segment close to it.
+    arg1,2 xs, ys : two lists of floats, the coordinates of the path.
+    arg3 cumulative : a list of floats, the arc length at each point of the path.
+    arg4 i : an int, the segment where the search starts.
+    arg5,6 x, y : two floats, the coordinates of the point.
+    return : i, s, h. The segment of the path closest to the point among the
+    neighbours of the segment given, followed while they get closer; the arc
+    length of the closest point of this segment; and the distance to it, negative
+    if the point is on the right of the path.
+    """
+    def position(k):
+        dx, dy = xs[k+1] - xs[k], ys[k+1] - ys[k]
+        wx, wy = x - xs[k], y - ys[k]
+        squared_length = dx*dx + dy*dy
+        t = (wx*dx + wy*dy) / squared_length if squared_length else 0.0
+        t = min(max(t, 0.0), 1.0)
+        ex, ey = wx - t*dx, wy - t*dy
+        distance = (ex*ex + ey*ey) ** 0.5
+        return distance, cumulative[k] + t*(cumulative[k+1] - cumulative[k]),\
+               distance if dx*wy - dy*wx >= 0 else -distance
+
+    current = position(i)
+    while True:
+        if i + 2 < len(xs):
+            following = position(i+1)
+            if following[0] < current[0]:
+                i, current = i+1, following
+                continue
+        if i > 0:
+            preceding = position(i-1)
+            if preceding[0] < current[0]:
+                i, current = i-1, preceding
+                continue
+        return i, current[1], current[2]
+
+
+def _covered_area(h_start, h_end, width):
+    """
+    Compute the area between a line and a segment above an interval of the line.
+    arg1,2 h_start, h_end : two floats, the signed distances of the segment to the
+    line at the extremities of the interval.
+    arg3 width : a float, the length of the interval.
+    return : a float, the area: a trapezium, or two triangles if the segment crosses the line.
+    """
+    if h_start * h_end < 0:
+        # the triangles are proportional to the squares of the heights:
+        return (h_start*h_start + h_end*h_end) / (abs(h_start) + abs(h_end)) * width / 2
+    return (abs(h_start) + abs(h_end)) * width / 2
+
+
+def trajectory_error_backtracking(coord_th, coord_exp):
+    """
+    Compute the trajectory error, counting the area between the paths once
+    where the experimental path doubles back over parts of coord_th.
+    arg1 coord_th : an array of shape (N,2), a list of tuples (x,y) or a PreparedPath.
+    The path which should be followed.
+    arg2 coord_exp: an array of shape (M,2), or a list of tuples (x,y). The points received from the "indoors-gps"
+    return: error, the total area difference betweeen the theoretical trajectory
+    and the experimental one, divided by the length of coord_th.
+    
+    >>> trajectory_error_backtracking([(0,0),(4,0)], [(0,1),(3,1),(1,1),(4,1)])
+    1.0
+    """
+    if not isinstance(coord_th, PreparedPath):
+        coord_th = PreparedPath(coord_th)
+    exp_x, exp_y = _as_columns(coord_exp)
+    xs, ys = coord_th.x.tolist(), coord_th.y.tolist()
+    cumulative = coord_th.cumulative_lengths.tolist()
+    covered = IntervalSet()
+    area = 0.0
+    i = 0
+    previous = None
+    for x, y in zip(exp_x.tolist(), exp_y.tolist()):
+        i, s, h = _arc_position(xs, ys, cumulative, i, x, y)
+        if previous is not None and previous[0] != s:
+            (low, h_low), (high, h_high) = sorted((previous, (s, h)))
+            area += _covered_area(h_low, h_high, high - low)
+            # the parts of the interval already covered, with the distances above them:
+            for start, end in covered.add(low, high):
+                area -= _covered_area(h_low + (h_high - h_low) * (start - low) / (high - low),
+                                      h_low + (h_high - h_low) * (end - low) / (high - low),
+                                      end - start)
+        previous = (s, h)
+    return max(area, 0.0) / coord_th.length
+
+
+# In[10]:
+
+
+# Parallel shoelace engine
+#
+# The sweep of trajectory_error goes through the experimental path in order:
+# the theoretical segment of a step depends on all the steps before it, so one
+# long trace is scored on one core. The shoelace sums of trajectory_error_shoelace
+# do not: the sum of the experimental path up to a point is the sum of its parts.
+# trajectory_error_parallel cuts the experimental path in chunks of consecutive
+# segments, and the worker processes find the crossings of each chunk with the
+# route and the shoelace sums of the chunk up to them. The sums of the chunks
+# before a chunk are then added to its own, so a polygon across a seam is
+# closed exactly as in one pass; only the chain of crossings and the sums of
+# the polygons are left to the main process.
+#
+# The workers read the experimental path from a shared_memory block, which
+# is written once: a chunk is sent as its two indices, not as a copy of its
+# points. The route is small, it is sent to each worker when it starts, and
+# prepared there once.
+
+_worker_path = None # the PreparedPath of the route, in a worker process
+_worker_memory = None # the SharedMemory of the experimental path, in a worker process
+
+
+def _attach_worker(route, memory_name):
+    """
+    Prepare a worker process of trajectory_error_parallel.
+    arg1 route : an array of shape (N,2), the theoretical path.
+    arg2 memory_name : a str, the name of the SharedMemory of the experimental path.
+    """
+    global _worker_path, _worker_memory
+    _worker_path = PreparedPath(route)
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+
+
+def _shoelace_chunk(task):
+    """
+    Compute the crossings and the shoelace sums of a chunk. This runs in the worker processes.
+    arg1 task : a tuple (m, start, stop), the number of points of the experimental
+    path, and the segments of the chunk.
+    return : the result of _shoelace_part.
+    """
+    m, start, stop = task
+    points = np.ndarray((2, m), dtype=float, buffer=_worker_memory.buf)
+    return _shoelace_part(_worker_path, points[0], points[1], start, stop)
+
+
+def trajectory_error_parallel(coord_th, coord_exp, workers=None, chunk_size=None):
+    """
+    Compute the same error as trajectory_error_shoelace, splitting a long
+    experimental path between worker processes.
+    arg1 coord_th : an array of shape (N,2), a list of tuples (x,y) or a PreparedPath.
+    The path which should be followed.
+    arg2 coord_exp: an array of shape (M,2), or a list of tuples (x,y). The points received from the "indoors-gps"
+    arg3 workers : an int, the number of worker processes. None uses every core,
+    and 0 or 1 score the chunks in the current process.
+    arg4 chunk_size : an int, the number of experimental segments of a chunk.
+    By default the path is split in about four chunks per worker.
+    return: error, the total area difference betweeen the theoretical trajectory
+    and the experimental one, divided by the length of coord_th.
+    
+    >>> float(trajectory_error_parallel([(0,0),(0,2)], [(0,0),(1,0),(-1,1),(1,2),(0,2)], 1, 2))
+    0.5
+    """
+    if not isinstance(coord_th, PreparedPath):
+        coord_th = PreparedPath(coord_th)
+    # the repeated points add no area, and the sweep consumes them without one:
+    exp_x, exp_y = _drop_repeated_points(*_as_columns(coord_exp))
+    m = len(exp_x)
+    if m < 2:
+        return 0.0
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-(m - 1) // (4 * max(workers, 1))))
+    bounds = [(start, min(start + chunk_size, m - 1)) for start in range(0, m - 1, chunk_size)]
+
+    if workers <= 1:
+        parts = [_shoelace_part(coord_th, exp_x, exp_y, start, stop) for start, stop in bounds]
+    else:
+        memory = shared_memory.SharedMemory(create=True, size=2 * m * np.dtype(float).itemsize)
+        try:
+            points = np.ndarray((2, m), dtype=float, buffer=memory.buf)
+            points[0], points[1] = exp_x, exp_y
+            del points # the block cannot be closed while an array uses it
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker,
+                                     initargs=(_pack(coord_th), memory.name)) as executor:
+                parts = list(executor.map(_shoelace_chunk, [(m, start, stop) for start, stop in bounds]))
+        finally:
+            memory.close()
+            memory.unlink()
+
+    # the sums of a chunk start at its first point: the sums of the chunks before it are added.
+    totals = np.array([total for _, _, total in parts])
+    offsets = np.concatenate(([0.0], np.cumsum(totals)))
+    crossings = PathCrossings(*(np.concatenate(column) for column in zip(*(part[0] for part in parts))))
+    along = np.concatenate([offset + part[1] for offset, part in zip(offsets, parts)])
+    return _shoelace_area(coord_th, exp_x, exp_y, crossings, along, offsets[-1]) / coord_th.length
+
+
+# In[11]:
+
+
+# Incremental re-scoring
+#
+# A route is often edited one vertex at a time, and every run recorded along it
+# scored again. The sweep of trajectory_error changes little: the steps before
+# the edited segments are the same, and once the new sweep reaches a pair of
+# segments (i, j) which the previous sweep went through, with i after the edited
+# segments, every step from there is the same too, on the theoretical segment
+# shifted by the number of segments inserted or deleted.
+#
+# A SweepResult keeps the theoretical segment and the area of each step of a
+# sweep. An edit sweeps again from the first experimental segment consumed by an
+# edited theoretical segment, in windows of growing size, until it finds such a
+# pair, and takes the steps after it from the previous result. The length of the
+# route is updated from the lengths of the segments replaced (PreparedPath.edited).
+
+
+def _step_areas(path, exp_x, exp_y, segments, offset=0):
+    """
+    Compute the area added by steps, given the theoretical segment consuming each
+    experimental segment.
+    arg1 path : a PreparedPath, the theoretical path.
+    arg2,3 exp_x, exp_y : the coordinates of the experimental path.
+    arg4 segments : an array of ints, the theoretical segment of the step consuming
+    each experimental segment from offset on, or -1 if it is left over.
+    arg5 offset : an int, the experimental segment of segments[0].
+    return : an array of len(segments) floats, 0 for the segments left over.
+    """
+    areas = np.zeros(len(segments))
+    consumed = np.flatnonzero(segments >= 0)
+    for start in range(0, len(consumed), _MAX_BLOCK):
+        block = consumed[start:start + _MAX_BLOCK]
+        _, areas[block] = _classify_steps(path, exp_x, exp_y, segments[block], block + offset)
+    return areas
+
+
+class SweepResult:
+    """
+    The steps of the sweep of trajectory_error, which can be updated when the
+    theoretical path is edited. The results are not changed by an edit: it
+    returns a new one, which shares the experimental path.
+    Attributes :
+    path : a PreparedPath, the theoretical path.
+    exp_x, exp_y : two arrays of M floats, the coordinates of the experimental path.
+    segments : an array of M-1 ints, the theoretical segment of the step consuming
+    each experimental segment, or -1 for the segments left over by the sweep.
+    areas : an array of M-1 floats, the area added by each step, 0 for the segments left over.
+    area : a float, the total area between the paths.
+
+    >>> result = sweep_result([(0,0),(0,2)], [(0,0),(1,1),(0,2)])
+    >>> float(result.error), float(result.length)
+    (0.5, 2.0)
+    >>> result = result.insert_vertex(1, (0,1))
+    >>> result.segments.tolist(), float(result.error)
+    ([0, 0], 0.75)
+    >>> result = result.move_vertex(1, (1,1))
+    >>> float(result.error), float(result.length) == 2 * 2**0.5
+    (0.0, True)
+    """
+
+    def __init__(self, path, exp_x, exp_y, segments, areas, area):
+        self.path = path
+        self.exp_x, self.exp_y = exp_x, exp_y
+        self.segments = segments
+        self.areas = areas
+        self.area = area
+
+    def __repr__(self):
+        return "SweepResult(%d theoretical points, %d experimental points, error=%r)"\
+               % (len(self.path), len(self.exp_x), self.error)
+
+    @property
+    def length(self):
+        """
+        return : a float, the length of the theoretical path.
+        """
+        return self.path.length
+
+    @property
+    def error(self):
+        """
+        return : a float, the error of trajectory_error, the area divided by the length.
+        """
+        return self.area / self.path.length
+
+    def insert_vertex(self, k, point):
+        """
+        Insert a point in the theoretical path.
+        arg1 k : an int, the index of the new point, 0 <= k <= len(self.path).
+        arg2 point : a tuple (x,y).
+        return : a SweepResult.
+        """
+        return self.edited(k, k, [point])
+
+    def move_vertex(self, k, point):
+        """
+        Move a point of the theoretical path.
+        arg1 k : an int, the index of the point, 0 <= k < len(self.path).
+        arg2 point : a tuple (x,y), the new position.
+        return : a SweepResult.
+        """
+        return self.edited(k, k + 1, [point])
+
+    def delete_vertex(self, k):
+        """
+        Delete a point of the theoretical path, which keeps two points at least.
+        arg1 k : an int, the index of the point, 0 <= k < len(self.path).
+        return : a SweepResult.
+        """
+        return self.edited(k, k + 1, [])
+
+    def edited(self, start, stop, points):
+        """
+        Replace points of the theoretical path, and update the sweep.
+        The experimental path is swept again from the first edited segment, until
+        the sweep meets the previous one; the steps are then copied. The copies
+        take a time linear in the sizes of the paths, see PreparedPath.edited, but
+        far less than a sweep.
+        The indices are those of self.path, whose consecutive duplicates are dropped.
+        When the edit makes two consecutive points equal, the new path is swept
+        from its start, without the duplicate.
+        arg1,2 start, stop : two ints, the points replaced are start to stop excluded.
+        arg3 points : a list of tuples (x,y), the new points.
+        return : a SweepResult.
+        """
+        n = len(self.path)
+        if not 0 <= start <= stop <= n:
+            raise IndexError("points %d to %d are out of a path of %d points" % (start, stop, n))
+        if n - (stop - start) + len(points) < 2:
+            raise ValueError("the theoretical path must keep two points at least")
+        path = self.path.edited(start, stop, points)
+        # the segments first to last excluded of the new path replace the segments
+        # first to replaced excluded of the previous one, see PreparedPath.edited:
+        first = max(start - 1, 0)
+        last = min(start + len(points), len(path) - 1)
+        replaced = min(stop, n - 1)
+        if not np.all(path.squared_lengths[first:last]):
+            return sweep_result(np.stack((path.x, path.y), axis=1), Columns(self.exp_x, self.exp_y))
+        shift = last - replaced
+
+        # the previous sweep reached the segment first on the experimental segment j0:
+        count = len(self.segments)
+        consumed = count if not count or self.segments[-1] >= 0\
+                   else int(np.argmax(self.segments < 0))
+        j0 = int(np.searchsorted(self.segments[:consumed], first))
+        if j0 == count:
+            # the sweep ended before the edited segments: only the length changes.
+            return SweepResult(path, self.exp_x, self.exp_y, self.segments, self.areas, self.area)
+
+        size = 4 * _BLOCK
+        while True:
+            stop_j = min(j0 + size, count)
+            segments = np.full(stop_j - j0, -1, dtype=np.intp)
+            branches = np.full(stop_j - j0, -1, dtype=np.intp)
+            _, i, j = _sweep_run(path, self.exp_x[j0:stop_j+1], self.exp_y[j0:stop_j+1], first,
+                                 steps=(segments, branches))
+            ended = i+1 >= len(path) or stop_j == count
+            # the new sweep went through the theoretical segments low[k] to high[k]
+            # on the experimental segment j0+k, for k from 0 to j:
+            low = np.concatenate(([first], segments[:j]))
+            high = np.concatenate((segments[:j], [i]))
+            # and the previous sweep through previous_low to previous_high, on the same ones:
+            g = j0 + np.arange(j + 1)
+            previous_low = self.segments[g - 1] if j0 else np.concatenate(([0], self.segments[g[1:] - 1]))
+            previous_high = np.where(g < count, self.segments[np.minimum(g, count - 1)], previous_low)
+            previous_high = np.where(previous_high >= 0, previous_high, n - 1)
+            # a pair both went through, after the edited segments:
+            common = (np.maximum(np.maximum(low, previous_low + shift), last)
+                      <= np.minimum(high, previous_high + shift)) & (previous_low >= 0)
+            if common.any() or ended:
+                break
+            size *= 2
+
+        new = self.segments.copy()
+        areas = self.areas.copy()
+        if common.any():
+            resumed = j0 + int(np.argmax(common))
+            new[j0:resumed] = segments[:resumed - j0]
+            # the steps after it are the previous ones, on shifted segments, up
+            # to the segments left over, all at the end:
+            new[resumed:consumed] += shift
+        else:
+            resumed = count
+            new[j0:stop_j] = segments
+            new[stop_j:] = -1
+        areas[j0:resumed] = _step_areas(path, self.exp_x, self.exp_y, new[j0:resumed], j0)
+        area = self.area - self.areas[j0:resumed].sum() + areas[j0:resumed].sum()
+        return SweepResult(path, self.exp_x, self.exp_y, new, areas, area)
+
+
+def sweep_result(coord_th, coord_exp):
+    """
+    Sweep the paths as trajectory_error_vectorized does, keeping the steps, so
+    that the error can be updated when the theoretical path is edited.
+    arg1 coord_th : an array of shape (N,2), a list of tuples (x,y) or a PreparedPath.
+    The path which should be followed.
+    arg2 coord_exp: an array of shape (M,2), a list of tuples (x,y) or Columns. The points received from the "indoors-gps"
+    return : a SweepResult, whose error is the one of trajectory_error.
+    """
+    if not isinstance(coord_th, PreparedPath):
+        coord_th = PreparedPath(coord_th)
+    exp_x, exp_y = _as_columns(coord_exp)
+    count = max(len(exp_x) - 1, 0)
+    segments = np.full(count, -1, dtype=np.intp)
+    branches = np.full(count, -1, dtype=np.intp)
+    _sweep_area(coord_th, exp_x, exp_y, steps=(segments, branches))
+    areas = _step_areas(coord_th, exp_x, exp_y, segments)
+    return SweepResult(coord_th, exp_x, exp_y, segments, areas, areas.sum())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Spatial index over the segments of a path.
+#
+# The plane is cut into a uniform grid of square cells, and each segment is
+# registered in every cell its bounding box overlaps. The cells are stored in
+# the compressed sparse row layout: the segments of cell c are
+# cell_segments[cell_start[c]:cell_start[c+1]]. The cell size is chosen so that
+# there are about as many cells as segments, so a query only looks at a few
+# segments instead of scanning the whole path.
+#
+# Every query has a batched version working on arrays, without Python loops
+# over the points or the boxes.
+
+import numpy as np
+
+
+def _ranges(starts, counts):
+    """
+    Concatenate the ranges [starts[k], starts[k] + counts[k]).
+    arg1 starts : an array of ints, the first value of each range.
+    arg2 counts : an array of ints, the length of each range.
+    return : owner, values. Two arrays of ints: the index k of the range of each value, and the values.
+    """
+    owner = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts # position of the first value of each range
+    values = np.repeat(starts - first, counts) + np.arange(counts.sum())
+    return owner, values
+
+
+def point_segment_distances(points, starts, ends):
+    """
+    Compute the distances between points and segments, pairwise.
+    arg1 points : an array of shape (N,2).
+    arg2 starts, ends : two arrays of shape (N,2), the extremities of the segments.
+    return : an array of N floats.
+    """
+    direction = ends - starts
+    offset = points - starts
+    squared_length = np.einsum('ij,ij->i', direction, direction)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.einsum('ij,ij->i', offset, direction) / squared_length
+    t = np.clip(np.nan_to_num(t), 0, 1)
+    return np.hypot(*(offset - t[:,None] * direction).T)
+
+
+def _ring_offsets(ring):
+    """
+    List the cells at Chebyshev distance ring of a cell.
+    arg1 ring : an int, at least 0.
+    return : an array of ints of shape (8*ring,2), or (1,2) for the ring 0, the offsets of the cells.
+    """
+    if ring == 0:
+        return np.zeros((1, 2), dtype=int)
+    side = np.arange(-ring, ring + 1)
+    inner = side[1:-1]
+    return np.concatenate((np.stack((side, np.full_like(side, -ring)), axis=1),
+                           np.stack((side, np.full_like(side, ring)), axis=1),
+                           np.stack((np.full_like(inner, -ring), inner), axis=1),
+                           np.stack((np.full_like(inner, ring), inner), axis=1)))
+
+
+class SegmentGrid:
+    """
+    Uniform grid index over segments, for nearest-segment and box queries.
+    Attributes :
+    starts, ends : two arrays of shape (S,2), the extremities of the segments.
+    bounding_boxes : an array of shape (S,4), (xmin, ymin, xmax, ymax) of each segment.
+    origin : an array of two floats, the lower left corner of the grid.
+    cell_size : a float, the side of the cells.
+    shape : (nx, ny), the number of cells along each axis.
+    """
+
+    def __init__(self, starts, ends, cell_size=None):
+        """
+        Constructor.
+        arg1 starts : an array of shape (S,2), the first points of the segments.
+        arg2 ends : an array of shape (S,2), the last points of the segments.
+        arg3 cell_size : a float, the side of the cells. By default, about one cell per segment.
+        """
+        self.starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        self.ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        self.bounding_boxes = np.concatenate((np.minimum(self.starts, self.ends),
+                                              np.maximum(self.starts, self.ends)), axis=1)
+        n_segments = len(self.starts)
+        self.origin = self.bounding_boxes[:,:2].min(axis=0) if n_segments else np.zeros(2)
+        extent = self.bounding_boxes[:,2:].max(axis=0) - self.origin if n_segments else np.zeros(2)
+        if cell_size is None:
+            # about one cell per segment, but no cell smaller than a typical segment:
+            sides = self.bounding_boxes[:,2:] - self.bounding_boxes[:,:2]
+            typical = np.median(sides.max(axis=1)) if n_segments else 0.0
+            cell_size = max(np.sqrt(extent[0] * extent[1] / max(n_segments, 1)), typical)
+            if cell_size == 0:
+                cell_size = max(extent.max(), 1.0)
+        self.cell_size = float(cell_size)
+        self.shape = tuple(int(k) for k in np.floor(extent / self.cell_size).astype(int) + 1)
+
+        # register each segment in the cells of its bounding box:
+        low = self._cell_coordinates(self.bounding_boxes[:,:2])
+        high = self._cell_coordinates(self.bounding_boxes[:,2:])
+        cells, segments = self._box_cells(low, high)
+        order = np.argsort(cells, kind='stable')
+        self.cell_segments = segments[order]
+        counts = np.bincount(cells, minlength=self.shape[0] * self.shape[1])
+        self.cell_start = np.concatenate(([0], np.cumsum(counts)))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _cell_coordinates(self, points):
+        """
+        Compute the cell of points, clipped to the grid.
+        arg1 points : an array of shape (N,2).
+        return : an array of ints of shape (N,2), the column and the row of each cell.
+        """
+        cells = np.floor((points - self.origin) / self.cell_size).astype(int)
+        return np.clip(cells, 0, np.array(self.shape) - 1)
+
+    def _box_cells(self, low, high):
+        """
+        Enumerate the cells of rectangles of cells.
+        arg1,2 low, high : two arrays of ints of shape (N,2), the first and last cells of each rectangle.
+        return : cells, owner. Two arrays of ints: the cells, as column + nx * row,
+        and the index of the rectangle each cell belongs to.
+        """
+        widths = high[:,0] - low[:,0] + 1
+        heights = high[:,1] - low[:,1] + 1
+        owner, position = _ranges(np.zeros(len(low), dtype=int), widths * heights)
+        columns = low[owner,0] + position % widths[owner]
+        rows = low[owner,1] + position // widths[owner]
+        return columns + self.shape[0] * rows, owner
+
+    def _cell_contents(self, cells):
+        """
+        List the segments registered in cells.
+        arg1 cells : an array of ints, the cells.
+        return : owner, segments. Two arrays of ints: the position in cells, and the segment.
+        """
+        counts = self.cell_start[cells + 1] - self.cell_start[cells]
+        owner, positions = _ranges(self.cell_start[cells], counts)
+        return owner, self.cell_segments[positions]
+
+    def segments_in_boxes(self, boxes):
+        """
+        Find the segments whose bounding box overlaps boxes, for many boxes at once.
+        arg1 boxes : an array of shape (N,4), (xmin, ymin, xmax, ymax) of each box.
+        return : box, segment. Two arrays of ints listing the pairs (box, segment)
+        that overlap, sorted by box and then by segment.
+        """
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        if len(self) == 0 or len(boxes) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        cells, box_of_cell = self._box_cells(self._cell_coordinates(boxes[:,:2]),
+                                             self._cell_coordinates(boxes[:,2:]))
+        owner, segments = self._cell_contents(cells)
+        box = box_of_cell[owner]
+        # a segment is registered in several cells: keep each pair once
+        # (sorting is much faster than np.unique, which hashes large integer arrays)
+        pairs = np.sort(box * len(self) + segments)
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        box, segments = pairs // len(self), pairs % len(self)
+        # the cells only give candidates, check the bounding boxes:
+        candidate = self.bounding_boxes[segments]
+        overlap = (candidate[:,0] <= boxes[box,2]) & (candidate[:,2] >= boxes[box,0])\
+                & (candidate[:,1] <= boxes[box,3]) & (candidate[:,3] >= boxes[box,1])
+        return box[overlap], segments[overlap]
+
+    def segments_in_box(self, xmin, ymin, xmax, ymax):
+        """
+        Find the segments whose bounding box overlaps a box.
+        arg1,2,3,4 xmin, ymin, xmax, ymax : four floats, the box.
+        return : an array of ints, the sorted indices of the segments.
+        """
+        return self.segments_in_boxes([(xmin, ymin, xmax, ymax)])[1]
+
+    def nearest_segments(self, points):
+        """
+        Find the nearest segment of many points.
+        The search looks at the cells around each point, ring after ring, until
+        no unseen segment can be nearer than the best one found.
+        arg1 points : an array of shape (N,2).
+        return : segments, distances. An array of ints, the index of the nearest
+        segment of each point, and an array of floats, the distances.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        n_points = len(points)
+        best = np.full(n_points, -1)
+        best_distance = np.full(n_points, np.inf)
+        if len(self) == 0:
+            return best, best_distance
+        # the cell of each point, clamped to the grid, and the distance from the point
+        # to the grid along each axis, 0 for a point inside:
+        home = self._cell_coordinates(points)
+        outside = np.maximum(np.maximum(self.origin - points,
+                                        points - (self.origin + np.array(self.shape) * self.cell_size)), 0)
+        max_ring = max(self.shape) # every cell is then seen
+        active = np.arange(n_points)
+        ring = 0
+        while active.size and ring <= max_ring:
+            offsets = _ring_offsets(ring)
+            cells = home[active,None,:] + offsets[None,:,:]
+            inside = (cells >= 0).all(axis=2) & (cells < np.array(self.shape)).all(axis=2)
+            point_of_cell = np.broadcast_to(active[:,None], inside.shape)[inside]
+            cells = cells[inside]
+            owner, segments = self._cell_contents(cells[:,0] + self.shape[0] * cells[:,1])
+            owner = point_of_cell[owner]
+            distances = point_segment_distances(points[owner], self.starts[segments], self.ends[segments])
+            if owner.size:
+                # keep the smallest distance of each point (the pairs are grouped by point):
+                group = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+                group_min = np.minimum.reduceat(distances, group)
+                smallest = np.flatnonzero(distances == np.repeat(group_min, np.diff(np.r_[group, len(owner)])))
+                smallest = smallest[np.r_[True, owner[smallest][1:] != owner[smallest][:-1]]]
+                owner, segments, distances = owner[smallest], segments[smallest], distances[smallest]
+                better = distances < best_distance[owner]
+                best[owner[better]] = segments[better]
+                best_distance[owner[better]] = distances[better]
+            # a segment outside of the rings seen so far is in a column, or a row, at least
+            # ring cells away from the home cell, which is that far from the point plus
+            # the distance from the point to the grid along that axis:
+            gap_x, gap_y = outside[active,0], outside[active,1]
+            reach = ring * self.cell_size
+            bound = np.minimum(np.hypot(reach + gap_x, gap_y), np.hypot(gap_x, reach + gap_y))
+            done = best_distance[active] <= bound
+            active = active[~done]
+            ring += 1
+        return best, best_distance
+
+    def nearest_segment(self, point):
+        """
+        Find the nearest segment of a point.
+        arg1 point : a tuple (x,y).
+        return : segment, distance. An int, the index of the nearest segment, and a float, its distance.
+        """
+        segments, distances = self.nearest_segments([point])
+        return int(segments[0]), float(distances[0])
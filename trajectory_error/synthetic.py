@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Seeded generators of synthetic indoor routes and experimental traces, for the
+# benchmarks and the tests.
+#
+# A route is an array of shape (N,2), the theoretical path. A trace is the
+# experimental path of someone following a route: points regularly spaced along
+# the route, moved by a gaussian noise, with optional dwell periods where the
+# person stands still. The noise is kept well below the spacing of the points,
+# and fades out near the vertices of the route: otherwise the points come back
+# and forth along the route, or are projected out of both segments at a corner,
+# which trajectory_error does not follow. The traces of back_and_forth double
+# back along the route, for trajectory_error_backtracking.
+
+import numpy as np
+
+
+def corridors(n_points, seed=0):
+    """
+    A route made of straight corridors: a random walk along the axes, turning
+    left or right at each point (two aligned segments in a row would be one corridor).
+    arg1 n_points : an int, the number of points of the route.
+    arg2 seed : an int, the seed of the random generator.
+    return : an array of shape (n_points,2).
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.uniform(1, 10, size=n_points - 1) * rng.choice([-1, 1], size=n_points - 1)
+    steps = np.zeros((n_points - 1, 2))
+    steps[0::2, 0] = lengths[0::2]
+    steps[1::2, 1] = lengths[1::2]
+    return np.concatenate(([(0.0,0.0)], np.cumsum(steps, axis=0)))
+
+
+def zigzag(n_points, seed=0):
+    """
+    A route going forward in zigzags, with diagonal segments.
+    arg1 n_points : an int, the number of points of the route.
+    arg2 seed : an int, the seed of the random generator.
+    return : an array of shape (n_points,2).
+    """
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(1, 5, size=n_points)) - 1
+    y = np.where(np.arange(n_points) % 2, 1.0, -1.0) * rng.uniform(1, 5, size=n_points)
+    return np.stack((x - x[0], y), axis=1)
+
+
+def u_turns(n_points, seed=0):
+    """
+    A route going back and forth along parallel lanes, as in a shop or a warehouse.
+    arg1 n_points : an int, the number of points of the route.
+    arg2 seed : an int, the seed of the random generator.
+    return : an array of shape (n_points,2).
+    """
+    rng = np.random.default_rng(seed)
+    # (0,0), (20,0), (20,d), (0,d), (0,2d), (20,2d)...
+    x = np.where(np.isin(np.arange(n_points) % 4, (1, 2)), 20.0, 0.0)
+    y = (np.arange(n_points) // 2) * rng.uniform(2, 3)
+    return np.stack((x, y), axis=1)
+
+
+def crossings(n_points, seed=0):
+    """
+    A route crossing itself many times: the vertices of a star polygon, around a room.
+    arg1 n_points : an int, the number of points of the route.
+    arg2 seed : an int, the seed of the random generator.
+    return : an array of shape (n_points,2).
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.arange(n_points) * (2 * np.pi * 0.382) + rng.uniform(0, 2 * np.pi)
+    radius = 20 * rng.uniform(0.8, 1.0, size=n_points)
+    return np.stack((radius * np.cos(angles), radius * np.sin(angles)), axis=1)
+
+
+ROUTES = {
+    "corridors": corridors,
+    "zigzag": zigzag,
+    "u_turns": u_turns,
+    "crossings": crossings,
+}
+
+
+def trace(route, n_points, noise=0.1, dwells=0, dwell_points=20, seed=0):
+    """
+    Build an experimental trace along a route.
+    arg1 route : an array of shape (N,2), or a list of tuples (x,y), the theoretical route.
+    arg2 n_points : an int, the number of points of the trace, dwell periods included.
+    arg3 noise : a float, the standard deviation of the noise. It is reduced to a
+    quarter of the distance to the next point where the points are closer.
+    arg4 dwells : an int, the number of dwell periods, where the person nearly stands still.
+    arg5 dwell_points : an int, the number of points of each dwell period.
+    arg6 seed : an int, the seed of the random generator.
+    return : an array of shape (n_points,2). The first and the last points are the
+    extremities of the route.
+    """
+    rng = np.random.default_rng(seed)
+    route = np.asarray(route, dtype=float).reshape(-1, 2)
+    lengths = np.hypot(*np.diff(route, axis=0).T)
+    cumulative = np.concatenate(([0], np.cumsum(lengths)))
+    dwell_points = min(dwell_points, (n_points - 2) // max(dwells, 1)) if dwells else 0
+    moving_points = n_points - dwells * dwell_points
+    # positions along the route: regularly spaced points, and the dwell periods,
+    # many points within a tenth of the spacing:
+    spacing = cumulative[-1] / max(moving_points - 1, 1)
+    stops = rng.uniform(0, cumulative[-1] - spacing / 10, size=dwells)
+    s = np.sort(np.concatenate((np.linspace(0, cumulative[-1], moving_points),
+                                (stops[:,None] + np.linspace(0, spacing / 10, dwell_points)).ravel())))
+    points = np.stack((np.interp(s, cumulative, route[:,0]),
+                       np.interp(s, cumulative, route[:,1])), axis=1)
+    # the noise fades out near the vertices, where a point off the route may be
+    # projected out of both segments, and near the next point:
+    gaps = np.diff(s)
+    local = np.minimum(np.r_[gaps, 0], np.r_[0, gaps])
+    k = np.clip(np.searchsorted(cumulative, s), 1, len(cumulative) - 1)
+    to_vertex = np.minimum(cumulative[k] - s, s - cumulative[k-1])
+    scale = np.minimum(noise, local / 4) * np.clip(to_vertex / (2 * spacing), 0, 1)
+    return points + rng.normal(size=points.shape) * scale[:,None]
+
+
+def back_and_forth(route, n_points, turns, back=0.5, noise=0.1, seed=0):
+    """
+    Build an experimental trace along a route, which doubles back several times,
+    as someone looking for a room.
+    arg1 route : an array of shape (N,2), or a list of tuples (x,y), the theoretical route.
+    arg2 n_points : an int, the number of points of the trace.
+    arg3 turns : an int, the number of times the trace goes back.
+    arg4 back : a float, each time the trace goes back by this fraction of the
+    length between two turns, at most.
+    arg5 noise : a float, the standard deviation of the noise, reduced as in trace.
+    arg6 seed : an int, the seed of the random generator.
+    return : an array of shape (n_points,2). The first and the last points are the
+    extremities of the route.
+    """
+    rng = np.random.default_rng(seed)
+    route = np.asarray(route, dtype=float).reshape(-1, 2)
+    lengths = np.hypot(*np.diff(route, axis=0).T)
+    cumulative = np.concatenate(([0], np.cumsum(lengths)))
+    # the arc lengths of the turns: forward to each one, then back:
+    forward = cumulative[-1] * np.arange(1, turns + 1) / (turns + 1)
+    backward = forward - rng.uniform(0, back, size=turns) * cumulative[-1] / (turns + 1)
+    stops = np.concatenate(([0], np.stack((forward, backward), axis=1).ravel(), [cumulative[-1]]))
+    # points regularly spaced along the distance travelled:
+    travelled = np.concatenate(([0], np.cumsum(np.abs(np.diff(stops)))))
+    s = np.interp(np.linspace(0, travelled[-1], n_points), travelled, stops)
+    points = np.stack((np.interp(s, cumulative, route[:,0]),
+                       np.interp(s, cumulative, route[:,1])), axis=1)
+    # the noise fades out near the vertices and the turns, as in trace:
+    spacing = travelled[-1] / max(n_points - 1, 1)
+    k = np.clip(np.searchsorted(cumulative, s), 1, len(cumulative) - 1)
+    to_vertex = np.minimum(cumulative[k] - s, s - cumulative[k-1])
+    u = np.linspace(0, travelled[-1], n_points)
+    k = np.clip(np.searchsorted(travelled, u), 1, len(travelled) - 1)
+    to_turn = np.minimum(travelled[k] - u, u - travelled[k-1])
+    scale = min(noise, spacing / 4) * np.clip(np.minimum(to_vertex, to_turn) / (2 * spacing), 0, 1)
+    return points + rng.normal(size=points.shape) * scale[:,None]
+
+
+SCENARIOS = ("corridors", "zigzag", "u_turns", "crossings", "dwells")
+
+
+def scenario(name, n_points, seed=0):
+    """
+    Build a pair of paths of a benchmark scenario: a route of about one point
+    for ten points of the trace, and the trace.
+    arg1 name : a string, in SCENARIOS. "dwells" is a route of corridors, with a
+    trace that stands still for 40% of its points.
+    arg2 n_points : an int, the number of points of the trace.
+    arg3 seed : an int, the seed of the random generator.
+    return : route, trace. Two arrays of shape (N,2).
+    """
+    if name not in SCENARIOS:
+        raise ValueError("unknown scenario %r, expected one of %s" % (name, ", ".join(SCENARIOS)))
+    route = ROUTES["corridors" if name == "dwells" else name](max(2, n_points // 10), seed)
+    if name == "dwells":
+        dwells = max(1, n_points // 100)
+        return route, trace(route, n_points, dwells=dwells, dwell_points=40, seed=seed)
+    return route, trace(route, n_points, seed=seed)
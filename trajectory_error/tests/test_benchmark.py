@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Unit testing for the regression gate of the benchmarks.
+
+# In[1]:
+
+
+# Imports
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import benchmark
+
+# In[2]:
+
+
+class TestRegressionGate(unittest.TestCase):
+    """
+    Unit testing for the baselines and their comparison.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "baseline.json")
+        self.results = {"linear": {"seconds": 0.01, "peak_bytes": 1000},
+                        "small": {"seconds": 0.001, "peak_bytes": 100}}
+        benchmark.save_baseline(self.path, self.results)
+
+    def compare(self, results, **options):
+        with mock.patch("sys.stdout"):
+            return benchmark.compare_with_baseline(self.path, results, **options)
+
+    def test_saved(self):
+        with open(self.path) as baseline:
+            baseline = json.load(baseline)
+
+        self.assertEqual(benchmark.BASELINE_VERSION, baseline["version"])
+        self.assertEqual(self.results, baseline["cases"])
+
+    def test_no_regression(self):
+        self.assertEqual([], self.compare(self.results))
+
+    def test_slower(self):
+        results = dict(self.results, linear={"seconds": 0.1, "peak_bytes": 1000})
+
+        self.assertEqual(["linear"], self.compare(results))
+        self.assertEqual([], self.compare(results, max_ratio=20))
+
+    def test_memory(self):
+        results = dict(self.results, small={"seconds": 0.001, "peak_bytes": 10**6})
+
+        self.assertEqual(["small"], self.compare(results))
+        # a few more bytes are within the slack:
+        results = dict(self.results, small={"seconds": 0.001, "peak_bytes": 1000})
+        self.assertEqual([], self.compare(results))
+
+    def test_new_case(self):
+        results = dict(self.results, new={"seconds": 1.0, "peak_bytes": 0})
+
+        self.assertEqual([], self.compare(results))
+
+    def test_version(self):
+        with open(self.path, mode='w') as baseline:
+            json.dump({"version": 0, "cases": {}}, baseline)
+
+        with self.assertRaises(ValueError):
+            self.compare(self.results)
+
+    def test_scaling_exponent(self):
+        sizes = [10, 100, 1000, 10000]
+
+        np.testing.assert_almost_equal(1, benchmark.scaling_exponent(sizes, [1e-3 * n for n in sizes]))
+        np.testing.assert_almost_equal(2, benchmark.scaling_exponent(sizes, [1e-3 * n * n for n in sizes]))
+        self.assertTrue(np.isnan(benchmark.scaling_exponent([10], [1.0])))
+
+
+# In[3]:
+
+
+if __name__ == "__main__":
+    unittest.main()
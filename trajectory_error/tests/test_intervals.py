@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Unit testing for the sets of intervals.
+
+# In[1]:
+
+
+# Imports
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from intervals import IntervalSet
+
+# In[2]:
+
+
+class TestIntervalSet(unittest.TestCase):
+    """
+    Unit testing for IntervalSet, against a sampling of the line.
+    """
+
+    def test_disjoint(self):
+        covered = IntervalSet()
+
+        self.assertEqual([], covered.add(4, 5))
+        self.assertEqual([], covered.add(0, 1))
+        self.assertEqual([], covered.add(2, 3))
+        self.assertEqual([(0, 1), (2, 3), (4, 5)], list(covered))
+
+    def test_merge(self):
+        covered = IntervalSet()
+        for start, end in ((0, 1), (2, 3), (4, 5)):
+            covered.add(start, end)
+
+        self.assertEqual([(0.5, 1), (2, 3), (4, 4.5)], covered.add(0.5, 4.5))
+        self.assertEqual([(0, 5)], list(covered))
+        self.assertEqual([(1, 2)], covered.add(1, 2))
+
+    def test_touching(self):
+        # intervals sharing an extremity are merged, without any part covered:
+        covered = IntervalSet()
+        covered.add(0, 1)
+
+        self.assertEqual([], covered.add(1, 2))
+        self.assertEqual([(0, 2)], list(covered))
+
+    def test_overlaps(self):
+        covered = IntervalSet()
+        covered.add(0, 1)
+
+        self.assertEqual([(0.5, 1)], covered.overlaps(0.5, 3))
+        self.assertEqual([(0, 1)], list(covered))
+
+    def test_sorted_additions(self):
+        # intervals added in order, the worst case of an unbalanced tree:
+        covered = IntervalSet()
+        for k in range(5000, 0, -1):
+            covered.add(2*k, 2*k + 1)
+
+        self.assertEqual(5000, len(covered))
+        self.assertEqual([(2, 3), (4, 5)], list(covered)[:2])
+        self.assertEqual([(4, 5), (6, 6.5)], covered.overlaps(3.5, 6.5))
+        self.assertEqual([(4, 5), (6, 7)], covered.add(3, 7.5))
+        self.assertEqual(4998, len(covered))
+
+    def test_random(self):
+        rng = np.random.default_rng(0)
+        samples = np.linspace(0, 100, 100001)
+        covered, sampled = IntervalSet(), np.zeros(len(samples), dtype=bool)
+        for start, width in zip(rng.uniform(0, 95, size=200).tolist(), rng.exponential(1, size=200).tolist()):
+            inside = (samples >= start) & (samples <= start + width)
+            parts = covered.add(start, start + width)
+            np.testing.assert_almost_equal((inside & sampled).sum() * 1e-3,
+                                           sum(end - start for start, end in parts), 2)
+            sampled |= inside
+        np.testing.assert_almost_equal(sampled.sum() * 1e-3, covered.length(), 2)
+        self.assertTrue(all(end < start for (_, end), (start, _) in zip(covered, list(covered)[1:])))
+
+
+# In[3]:
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,11 +11,19 @@
 
 # Imports
 
+import copy
+import os
+import pickle
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 import unittest
+from array import array
 
-import ../oop_solutions as sl
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import oop_solution as sl
+import solution
 
 # In[2]:
 
@@ -57,6 +65,25 @@ class test_point(unittest.TestCase):
     def test_distance_diagonal_negative(self):
         
         np.testing.assert_almost_equal(1.41421, sl.Point(0,0).distance(sl.Point(-1,-1)), 4)
+    
+    # immutability:
+    def test_immutable(self):
+        
+        with self.assertRaises(AttributeError):
+            sl.Point(0,0).x = 1
+        with self.assertRaises(AttributeError):
+            sl.Point(0,0).z = 1
+    
+    def test_hash(self):
+        
+        self.assertEqual(1, len({sl.Point(0,1), sl.Point(0,1)}))
+    
+    def test_pickle_and_copy(self):
+        point = sl.Point(0.5,-1)
+        
+        for copied in (pickle.loads(pickle.dumps(point)), copy.copy(point), copy.deepcopy(point)):
+            self.assertEqual(point, copied)
+            self.assertIsInstance(copied, sl.Point)
 
 # In[3]:
 
@@ -94,6 +121,39 @@ class test_segment(unittest.TestCase):
         invPath = [sl.Point(0,0),sl.Point(0,-1),sl.Point(-1,-1)]
         
         self.assertEqual(2, sl.Segment.path_length(invPath))
+    
+    # cached geometry:
+    def test_derived_geometry(self):
+        segment = sl.Segment(sl.Point(1,1), sl.Point(4,-3))
+        
+        self.assertEqual((3,-4), segment.direction)
+        self.assertEqual((4,3), segment.normal)
+        self.assertEqual(25, segment.squared_length)
+        self.assertEqual(5, segment.length())
+        np.testing.assert_almost_equal(-4/3, segment.slope)
+        np.testing.assert_almost_equal(7/3, segment.intercept)
+        self.assertEqual((1,-3,4,1), segment.bounding_box)
+    
+    def test_vertical_geometry(self):
+        segment = sl.Segment(sl.Point(1,3), sl.Point(1,0))
+        
+        self.assertTrue(segment.is_vertical)
+        self.assertIsNone(segment.slope)
+        self.assertIsNone(segment.intercept)
+    
+    def test_segment_immutable(self):
+        
+        with self.assertRaises(AttributeError):
+            sl.Segment(sl.Point(0,0), sl.Point(1,0)).p1 = sl.Point(1,1)
+    
+    def test_segment_pickle_and_copy(self):
+        segment = sl.Segment(sl.Point(1,1), sl.Point(4,-3))
+        segment.length()
+        
+        for copied in (pickle.loads(pickle.dumps(segment)), copy.copy(segment), copy.deepcopy(segment)):
+            self.assertEqual((segment.p1, segment.p2), (copied.p1, copied.p2))
+            self.assertEqual(25, copied.squared_length)
+            self.assertEqual(5, copied.length())
         
     # intersection function:
     def test_simplest_intersection(self):
@@ -211,6 +271,45 @@ class test_segment(unittest.TestCase):
         
         self.assertEqual(sl.Point(2,2), sl.Segment(segA_1, segA_2).orthogonal_projection(y))
     
+    def test_projections_of_points(self):
+        segA_1 = sl.Point(0,0)
+        segA_2 = sl.Point(0,2)
+        points = [sl.Point(-1,-1),sl.Point(1,1),sl.Point(0,3)]
+        
+        np.testing.assert_almost_equal([(0,-1),(0,1),(0,3)], sl.Segment(segA_1, segA_2).orthogonal_projections(points))
+        
+    def test_projections_of_array(self):
+        segA_1 = sl.Point(0,0)
+        segA_2 = sl.Point(2,0)
+        points = np.array([(1,1),(1,-1),(3,2)])
+        
+        np.testing.assert_almost_equal([(1,0),(1,0),(3,0)], sl.Segment(segA_1, segA_2).orthogonal_projections(points))
+        
+    def test_projections_on_degenerate_segment(self):
+        segA_1 = sl.Point(1,1)
+        segA_2 = sl.Point(1,1)
+        points = [sl.Point(0,0),sl.Point(2,3)]
+        
+        np.testing.assert_almost_equal([(1,1),(1,1)], sl.Segment(segA_1, segA_2).orthogonal_projections(points))
+    
+    def test_intersection_second_vertical(self):
+        seg_1 = sl.Segment(sl.Point(0,0), sl.Point(2,2))
+        seg_2 = sl.Segment(sl.Point(1,0), sl.Point(1,2))
+        
+        self.assertEqual(sl.Point(1,1), seg_1.intersection(seg_2))
+    
+    def test_intersection_both_vertical(self):
+        seg_1 = sl.Segment(sl.Point(0,0), sl.Point(0,2))
+        seg_2 = sl.Segment(sl.Point(1,0), sl.Point(1,2))
+        
+        self.assertIsNone(seg_1.intersection(seg_2))
+    
+    def test_intersection_nearly_parallel(self):
+        seg_1 = sl.Segment(sl.Point(0,0), sl.Point(3,1))
+        seg_2 = sl.Segment(sl.Point(0,1e-17), sl.Point(3,0.9999999999999999))
+        
+        self.assertAlmostEqual(0.2478881940730877, seg_1.intersection(seg_2).x)
+    
     # point_belongs_to_segment function:
     def test_clearly_belongs_to_segment(self):
         seg_A = sl.Point(0,0)
@@ -219,6 +318,12 @@ class test_segment(unittest.TestCase):
         
         self.assertTrue(sl.Segment(seg_A, seg_B).point_belongs_to_segment(point))
     
+    def test_extremity_belongs_to_segment(self):
+        seg_A = sl.Point(2.58,2.38)
+        seg_B = sl.Point(4.28,4.33)
+        
+        self.assertTrue(sl.Segment(seg_A, seg_B).point_belongs_to_segment(seg_B))
+    
     def test_inside_below(self):
         seg_A = sl.Point(0,0)
         seg_B = sl.Point(2,2)
@@ -398,9 +503,159 @@ class test_trajectory(unittest.TestCase):
         
         self.assertEqual(0.5, sl.Trajectory(theo, expe).trajectory_error())
 
+    def test_prepared_path(self):
+        theo = [sl.Point(0,0),sl.Point(0,2)]
+        expe = [sl.Point(0,0),sl.Point(1,0),sl.Point(-1,1),sl.Point(1,2),sl.Point(0,2)]
+        route = sl.Trajectory.prepare(theo)
+        
+        np.testing.assert_almost_equal(0.5, sl.Trajectory(route, expe).trajectory_error(), 10)
+        
+    def test_polylines(self):
+        theo = [sl.Point(0,0),sl.Point(0,2)]
+        expe = [sl.Point(0,0),sl.Point(1,0),sl.Point(-1,1),sl.Point(1,2),sl.Point(0,2)]
+        theo_line = sl.Polyline.from_points(theo)
+        expe_line = sl.Polyline.from_points(expe)
+        
+        np.testing.assert_almost_equal(0.5, sl.Trajectory(theo_line, expe_line).trajectory_error(), 10)
+        np.testing.assert_almost_equal(0.5, sl.Trajectory(sl.Trajectory.prepare(theo_line), expe_line).trajectory_error(), 10)
+        # the polylines are swept by the array engine, step by step only for the stats:
+        stats = solution.SweepStats()
+        self.assertEqual(sl.trajectory_error_vectorized(theo_line.as_array(), expe_line.as_array()),
+                         sl.Trajectory(theo, expe_line).trajectory_error())
+        np.testing.assert_almost_equal(0.5, sl.Trajectory(theo_line, expe_line).trajectory_error(stats=stats), 10)
+        self.assertEqual(4, stats.iterations)
+        expe_line.append(sl.Point(0,3))
+        # the prepared path does not hold the buffer of the polyline, which can still grow:
+        route = sl.Trajectory.prepare(theo_line)
+        theo_line.append(sl.Point(2,2))
+        self.assertEqual(2, len(route))
+        
+    def test_columns(self):
+        theo = sl.Columns(array('d', [0,0]), array('d', [0,2]))
+        expe = sl.Columns(np.array([0.0,1,-1,1,0]), memoryview(array('d', [0,0,1,2,2])))
+        stats = solution.SweepStats()
+        
+        np.testing.assert_almost_equal(0.5, sl.Trajectory(theo, expe).trajectory_error(), 10)
+        np.testing.assert_almost_equal(0.5, sl.Trajectory(sl.Trajectory.prepare(theo), expe).trajectory_error(), 10)
+        np.testing.assert_almost_equal(0.5, sl.Trajectory(theo, expe).trajectory_error(stats=stats), 10)
+        self.assertEqual(4, stats.iterations)
+        
+    def test_buffers(self):
+        theo = np.array([(0.0,0),(0,2)])
+        expe = np.array([(0.0,0),(1,0),(-1,1),(1,2),(0,2)])
+        for path in (expe, memoryview(expe), array('d', expe.ravel()), memoryview(array('d', expe.ravel()))):
+            for route in (theo, memoryview(theo), array('d', theo.ravel())):
+                np.testing.assert_almost_equal(0.5, sl.Trajectory(route, path).trajectory_error(), 10)
+                np.testing.assert_almost_equal(0.5, sl.Trajectory(route, path).trajectory_error(stats=solution.SweepStats()), 10)
+                np.testing.assert_almost_equal(0.5, sl.Trajectory(sl.Trajectory.prepare(route), path).trajectory_error(), 10)
+        
+    def test_stats(self):
+        theo = [sl.Point(0,0),sl.Point(0,2),sl.Point(2,2)]
+        expe = [sl.Point(0,0),sl.Point(1,0),sl.Point(-1,1),sl.Point(1,2),sl.Point(2,3),sl.Point(2,2)]
+        stats = solution.SweepStats()
+        
+        self.assertEqual(sl.Trajectory(theo, expe).trajectory_error(),
+                         sl.Trajectory(theo, expe).trajectory_error(stats=stats))
+        self.assertEqual(stats.iterations, sum(stats.branches.values()))
+        self.assertEqual(stats.iterations, stats.calls["intersection"])
+        self.assertEqual(stats.branches["quad"], stats.calls["compute_area"])
+        
+    def test_stats_same_keys_as_solution(self):
+        theo = [(0,0),(0,2),(2,2)]
+        expe = [(0,0),(1,0),(-1,1),(1,2),(2,3),(2,2)]
+        oop_stats, stats = solution.SweepStats(), solution.SweepStats()
+        
+        sl.Trajectory([sl.Point(*p) for p in theo], [sl.Point(*p) for p in expe]).trajectory_error(stats=oop_stats)
+        solution.trajectory_error(theo, expe, stats=stats)
+        self.assertEqual(stats.calls, oop_stats.calls)
+        self.assertEqual(stats.branches, oop_stats.branches)
+        
+    def test_drop_repeated_points(self):
+        expe = [sl.Point(0,0),sl.Point(1,1),sl.Point(1,1),sl.Point(1.01,1),sl.Point(2,0),sl.Point(2,0)]
+        
+        self.assertEqual([sl.Point(0,0),sl.Point(1,1),sl.Point(1.01,1),sl.Point(2,0)],
+                         sl.Trajectory.drop_repeated_points(expe))
+        self.assertEqual([sl.Point(0,0),sl.Point(1,1),sl.Point(2,0)],
+                         sl.Trajectory.drop_repeated_points(expe, tolerance=0.1))
+        line = sl.Trajectory.drop_repeated_points(sl.Polyline.from_points(expe))
+        self.assertIsInstance(line, sl.Polyline)
+        self.assertEqual(4, len(line))
+
+    def test_repeated_experimental_points(self):
+        theo = [sl.Point(0,0),sl.Point(10,0),sl.Point(10,10)]
+        expe = [sl.Point(0,1),sl.Point(5,1),sl.Point(11,-1),sl.Point(11,-1),sl.Point(11,5),sl.Point(9,10)]
+        
+        self.assertEqual(sl.Trajectory(theo, sl.Trajectory.drop_repeated_points(expe)).trajectory_error(),
+                         sl.Trajectory(theo, expe).trajectory_error())
+        
+    def test_repeated_theoretical_points(self):
+        theo = [sl.Point(-1,-1),sl.Point(-1,-1),sl.Point(3,0)]
+        expe = [sl.Point(1,-1),sl.Point(3,-2),sl.Point(-3,-1),sl.Point(-3,-2)]
+        
+        np.testing.assert_almost_equal(sl.Trajectory(theo[1:], expe).trajectory_error(),
+                                       sl.Trajectory(theo, expe).trajectory_error())
+
+
 # In[6]:
 
 
+class test_polyline(unittest.TestCase):
+    """
+    Unit testing for the Polyline object.
+    """
+    
+    def setUp(self):
+        self.points = [sl.Point(0,0),sl.Point(3,4),sl.Point(3,0)]
+        self.line = sl.Polyline.from_points(self.points)
+    
+    def test_indexing(self):
+        
+        self.assertEqual(3, len(self.line))
+        self.assertEqual(sl.Point(3,4), self.line[1])
+        self.assertEqual(sl.Point(3,0), self.line[-1])
+        self.assertEqual(self.points, list(self.line))
+        with self.assertRaises(IndexError):
+            self.line[3]
+    
+    def test_slice(self):
+        
+        self.assertEqual(self.points[1:], list(self.line[1:]))
+    
+    def test_segment(self):
+        
+        self.assertEqual(5, self.line.segment(0).length())
+    
+    def test_length(self):
+        
+        self.assertEqual(9, self.line.length())
+    
+    def test_array_view(self):
+        
+        self.line.append(sl.Point(0,0))
+        view = self.line.as_array()
+        view[0,0] = 1
+        
+        self.assertEqual((4,2), view.shape)
+        self.assertEqual(sl.Point(1,0), self.line[0])
+    
+    def test_array_view_blocks_append(self):
+        
+        view = self.line.as_array()
+        with self.assertRaises(BufferError):
+            self.line.append(sl.Point(0,0))
+        del view
+        self.line.append(sl.Point(0,0))
+        self.assertEqual(4, len(self.line))
+    
+    def test_odd_number_of_coordinates(self):
+        
+        with self.assertRaises(ValueError):
+            sl.Polyline([0,1,2])
+
+
+# In[7]:
+
+
 # initialisation
 loader = unittest.TestLoader()
 myTestSuite = unittest.TestSuite()
@@ -409,9 +664,11 @@ myTestSuite.addTests(loader.loadTestsFromTestCase(test_point))
 myTestSuite.addTests(loader.loadTestsFromTestCase(test_segment))
 myTestSuite.addTests(loader.loadTestsFromTestCase(test_triangle))
 myTestSuite.addTests(loader.loadTestsFromTestCase(test_trajectory))
+myTestSuite.addTests(loader.loadTestsFromTestCase(test_polyline))
 # run!
-runner = unittest.TextTestRunner()
-runner.run(myTestSuite)
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner()
+    runner.run(myTestSuite)
 
 # In[ ]:
 
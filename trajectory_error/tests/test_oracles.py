@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Unit testing for the loading of the oracle files.
+
+# In[1]:
+
+
+# Imports
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import oracles
+
+SIMPLE = "0,0,0\n0,1,2\n0,1,0\n0,1,2\n0.5\n0.01\n"
+
+# In[2]:
+
+
+class TestOracles(unittest.TestCase):
+    """
+    Unit testing for parse_oracle and load_oracles.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_directory.cleanup)
+        patcher = mock.patch.object(oracles, "CACHE_DIRECTORY", self.cache_directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, name, content):
+        with open(os.path.join(self.directory.name, name), mode='w') as oracle:
+            oracle.write(content)
+
+    def load(self, **kwargs):
+        return oracles.load_oracles(self.directory.name, cache_directory=self.cache_directory.name, **kwargs)
+
+    def test_parse(self):
+        oracle = oracles.parse_oracle(SIMPLE, "simple")
+
+        np.testing.assert_array_equal([(0,0),(0,1),(0,2)], oracle.theoretical)
+        np.testing.assert_array_equal([(0,0),(1,1),(0,2)], oracle.experimental)
+        self.assertEqual((0.5, 0.01), (oracle.expected, oracle.tolerance))
+
+    def test_parse_errors(self):
+        with self.assertRaises(ValueError):
+            oracles.parse_oracle("0,0\n0,1\n")
+        with self.assertRaises(ValueError):
+            oracles.parse_oracle("0,0\n0\n0\n0\n0\n0\n")
+
+    def test_load_directory(self):
+        self.write("[test1]b.txt", SIMPLE)
+        self.write("[test0]a.txt", SIMPLE.replace("0.5", "0.25"))
+        self.write("notes.md", "not an oracle")
+
+        loaded = self.load()
+
+        self.assertEqual(["[test0]a.txt", "[test1]b.txt"], [oracle.name for oracle in loaded])
+        self.assertEqual([0.25, 0.5], [oracle.expected for oracle in loaded])
+
+    def test_cache(self):
+        self.write("a.txt", SIMPLE)
+        first = self.load()
+        # the cache is out of the directory of the oracles:
+        self.assertEqual(["a.txt"], os.listdir(self.directory.name))
+        self.assertEqual(1, len(os.listdir(self.cache_directory.name)))
+
+        # an unchanged oracle is not parsed again:
+        with mock.patch.object(oracles, "parse_oracle", side_effect=AssertionError):
+            second = self.load()
+        np.testing.assert_array_equal(first[0].experimental, second[0].experimental)
+        self.assertEqual(first[0].expected, second[0].expected)
+
+    def test_cache_changed_file(self):
+        self.write("a.txt", SIMPLE)
+        self.load()
+        self.write("a.txt", SIMPLE.replace("0.5", "0.75"))
+
+        self.assertEqual(0.75, self.load()[0].expected)
+
+    def test_without_cache(self):
+        self.write("a.txt", SIMPLE)
+        self.load(cache=False)
+
+        self.assertEqual([], os.listdir(self.cache_directory.name))
+
+    def test_default_cache_directory(self):
+        self.write("a.txt", SIMPLE)
+        oracles.load_oracles(self.directory.name)
+
+        self.assertEqual(["a.txt"], os.listdir(self.directory.name))
+        self.assertEqual(1, len(os.listdir(self.cache_directory.name)))
+
+    def test_unwritable_cache(self):
+        self.write("a.txt", SIMPLE)
+        with mock.patch.object(oracles.np, "savez", side_effect=OSError("read-only file system")):
+            loaded = self.load()
+
+        self.assertEqual([0.5], [oracle.expected for oracle in loaded])
+        self.assertEqual([], os.listdir(self.cache_directory.name))
+
+
+# In[3]:
+
+
+class TestRunOracles(unittest.TestCase):
+    """
+    Unit testing for the oracle runner and its reports.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        # the error of the paths of SIMPLE is 0.75:
+        self.oracles = [oracles.parse_oracle(SIMPLE.replace("0.5\n", "0.75\n"), "pass"),
+                        oracles.parse_oracle(SIMPLE, "fail")]
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_run(self):
+        results = oracles.run_oracles(self.oracles, workers=1)
+
+        self.assertEqual(["pass", "fail"], [result.name for result in results])
+        self.assertEqual([True, False], [result.passed for result in results])
+        np.testing.assert_almost_equal(0.75, results[0].result)
+        self.assertEqual((3, 3), (results[0].theoretical_points, results[0].experimental_points))
+
+    def test_run_in_parallel(self):
+        serial = oracles.run_oracles(self.oracles, workers=1)
+        parallel = oracles.run_oracles(self.oracles, workers=2)
+
+        self.assertEqual([(r.name, r.result) for r in serial], [(r.name, r.result) for r in parallel])
+
+    def test_exception(self):
+        with mock.patch.object(oracles.sl, "trajectory_error", side_effect=ZeroDivisionError("division by zero")):
+            result = oracles.run_oracle(self.oracles[0])
+
+        self.assertFalse(result.passed)
+        self.assertIsNone(result.result)
+        self.assertIn("ZeroDivisionError", result.exception)
+
+    def test_json_report(self):
+        oracles.write_json_report(oracles.run_oracles(self.oracles, workers=1), self.path("report.json"))
+        with open(self.path("report.json")) as report:
+            report = json.load(report)
+
+        self.assertEqual((2, 1), (report["tests"], report["failures"]))
+        self.assertEqual("fail", report["oracles"][1]["name"])
+        self.assertFalse(report["oracles"][1]["passed"])
+
+    def test_junit_report(self):
+        oracles.write_junit_report(oracles.run_oracles(self.oracles, workers=1), self.path("report.xml"))
+        suite = ET.parse(self.path("report.xml")).getroot()
+
+        self.assertEqual(("2", "1"), (suite.get("tests"), suite.get("failures")))
+        self.assertIsNone(suite.find("testcase[@name='pass']/failure"))
+        self.assertIsNotNone(suite.find("testcase[@name='fail']/failure"))
+
+    def test_main(self):
+        with open(self.path("a.txt"), mode='w') as oracle:
+            oracle.write(SIMPLE.replace("0.5\n", "0.75\n"))
+        with mock.patch("sys.stdout"):
+            status = oracles.main([self.directory.name, "--workers", "1", "--json", self.path("report.json")])
+
+        self.assertEqual(0, status)
+        self.assertTrue(os.path.exists(self.path("report.json")))
+
+    def test_main_failure(self):
+        with open(self.path("a.txt"), mode='w') as oracle:
+            oracle.write(SIMPLE)
+        with mock.patch("sys.stdout"):
+            status = oracles.main([self.directory.name, "--workers", "1"])
+
+        self.assertEqual(1, status)
+
+
+# In[4]:
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Unit testing for the robust geometric predicates.
+
+# In[1]:
+
+
+# Imports
+
+import os
+import sys
+import unittest
+from fractions import Fraction
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import predicates as pr
+
+# In[2]:
+
+
+def exact_orientation(ax, ay, bx, by, cx, cy):
+    ax, ay, bx, by, cx, cy = map(Fraction, (ax, ay, bx, by, cx, cy))
+    det = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    return (det > 0) - (det < 0)
+
+
+class TestPredicates(unittest.TestCase):
+    """
+    Unit testing for the predicates, against the exact arithmetic of fractions.
+    """
+
+    def test_cross_sign(self):
+        self.assertEqual(1, pr.cross_sign(0, 0, 1, 0, 0, 0, 0, 1))
+        self.assertEqual(-1, pr.cross_sign(0, 0, 0, 1, 0, 0, 1, 0))
+        self.assertEqual(0, pr.cross_sign(0, 0, 1, 1, 5, 5, 7, 7))
+        self.assertEqual(0, pr.cross_sign(0, 0, 1, 1, 5, 5, 5, 5))
+
+    def test_nearly_aligned_points(self):
+        # points within a few units of the last place of a line, where the floats are often wrong:
+        u = 2.0 ** -53
+        for i in range(32):
+            for j in range(32):
+                point = (0.5 + i*u, 0.5 + j*u)
+                self.assertEqual(exact_orientation(12.0, 12.0, 24.0, 24.0, *point),
+                                 pr.orient2d(12.0, 12.0, 24.0, 24.0, *point), point)
+
+    def test_random_points(self):
+        rng = np.random.default_rng(0)
+        for ax, ay, bx, by, t, offset in rng.uniform(-100, 100, size=(500, 6)).tolist():
+            # a point computed on the line, then moved by a few units of the last place:
+            cx = ax + t * (bx - ax)
+            cy = ay + t * (by - ay) + offset * 1e-15
+            self.assertEqual(exact_orientation(ax, ay, bx, by, cx, cy),
+                             pr.orient2d(ax, ay, bx, by, cx, cy))
+
+    def test_exact_calls(self):
+        exact_calls = pr.exact_calls
+        pr.orient2d(0, 0, 3, 1, 1, 2)
+        self.assertEqual(exact_calls, pr.exact_calls)
+        pr.orient2d(12.0, 12.0, 24.0, 24.0, 0.5000000000000053, 0.5000000000000046)
+        self.assertEqual(exact_calls + 1, pr.exact_calls)
+
+    def test_intersection_parameter(self):
+        self.assertEqual(0.5, pr.intersection_parameter(0, 0, 2, 2, 0, 2, 2, 0))
+        # nearly parallel lines:
+        args = (0, 0, 3, 1, 0, 1e-17, 3, 0.9999999999999999)
+        ax, ay, bx, by, cx, cy, dx, dy = map(Fraction, args)
+        expected = ((cx - ax) * (dy - cy) - (cy - ay) * (dx - cx))\
+                 / ((bx - ax) * (dy - cy) - (by - ay) * (dx - cx))
+        self.assertEqual(float(expected), pr.intersection_parameter(*args))
+
+    def test_nearly_aligned(self):
+        rng = np.random.default_rng(1)
+        for scale in (1e-6, 1.0, 1e6):
+            for ax, ay, bx, by, t in rng.uniform(-1, 1, size=(100, 5)).tolist():
+                ax, ay, bx, by = ax * scale, ay * scale, bx * scale, by * scale
+                self.assertTrue(pr.nearly_aligned(ax, ay, bx, by, ax + t*(bx - ax), ay + t*(by - ay)))
+                # a millionth of the length of the segment away from the line:
+                self.assertFalse(pr.nearly_aligned(ax, ay, bx, by, ax + t*(bx - ax) - (by - ay) * 1e-6,
+                                                   ay + t*(by - ay) + (bx - ax) * 1e-6))
+
+
+# In[3]:
+
+
+if __name__ == "__main__":
+    unittest.main()
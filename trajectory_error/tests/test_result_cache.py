@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Unit testing for the cache of the results of trajectory_error.
+
+# In[1]:
+
+
+# Imports
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import oop_solution as oop
+import result_cache as rc
+import solution as sl
+
+# In[2]:
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    Unit testing for the keys, the memory and the disk tiers of ResultCache.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.theo = [(0,0),(0,2),(2,2)]
+        self.expe = [(0,0),(1,0),(-1,1),(1,2),(2,3),(2,2)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def runs(self, count):
+        return [[(0,0),(k,1),(0,2)] for k in range(1, count + 1)]
+
+    def test_hits(self):
+        cache = rc.ResultCache()
+        expected = sl.trajectory_error_vectorized(self.theo, self.expe)
+
+        self.assertEqual(expected, cache.trajectory_error(self.theo, self.expe))
+        self.assertEqual(expected, cache.trajectory_error(self.theo, self.expe))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        self.assertEqual({"entries": 1, "hits": 1, "disk_hits": 0, "misses": 1,
+                          "evictions": 0, "disk_evictions": 0}, cache.as_dict())
+
+    def test_keys(self):
+        cache = rc.ResultCache()
+        key = cache.key("trajectory_error", self.theo, self.expe)
+        array = np.array(self.expe, dtype=float)
+        points = [oop.Point(x, y) for x, y in self.expe]
+
+        # the same coordinates in other containers:
+        for expe in (array, sl.Columns(array[:,0], array[:,1]), points, oop.Polyline(array)):
+            self.assertEqual(key, cache.key("trajectory_error", sl.PreparedPath(self.theo), expe))
+        # a bit changed, the paths swapped, another function:
+        array[2,1] = np.nextafter(array[2,1], 2)
+        self.assertNotEqual(key, cache.key("trajectory_error", self.theo, array))
+        self.assertNotEqual(key, cache.key("trajectory_error", self.expe, self.theo))
+        self.assertNotEqual(key, cache.key("Trajectory.trajectory_error", self.theo, self.expe))
+
+    def test_least_recently_used(self):
+        cache = rc.ResultCache(max_entries=2)
+        first, second, third = self.runs(3)
+        cache.trajectory_error(self.theo, first)
+        cache.trajectory_error(self.theo, second)
+        cache.trajectory_error(self.theo, first)
+        cache.trajectory_error(self.theo, third) # evicts second
+
+        cache.trajectory_error(self.theo, first)
+        cache.trajectory_error(self.theo, second)
+        self.assertEqual((2, 4, 2, 2), (cache.hits, cache.misses, cache.evictions, len(cache)))
+
+    def test_disk(self):
+        cache = rc.ResultCache(directory=self.directory)
+        expected = cache.trajectory_error(self.theo, self.expe)
+        # another process, with the same directory:
+        cache = rc.ResultCache(directory=self.directory)
+
+        self.assertEqual(expected, cache.trajectory_error(self.theo, self.expe))
+        self.assertEqual((1, 0), (cache.disk_hits, cache.misses))
+        cache.clear()
+        self.assertEqual([], os.listdir(self.directory))
+
+    def test_disk_eviction(self):
+        cache = rc.ResultCache(max_entries=1, directory=self.directory, max_disk_entries=4)
+        runs = self.runs(5)
+        for k, run in enumerate(runs):
+            cache.trajectory_error(self.theo, run)
+            # the files written within the same tick of the clock have the same time:
+            name = os.path.join(self.directory, cache.key("trajectory_error", self.theo, run) + rc.SUFFIX)
+            if os.path.exists(name):
+                os.utime(name, ns=(k, k))
+
+        # down to three quarters of max_disk_entries, the most recent ones:
+        self.assertEqual(2, cache.disk_evictions)
+        self.assertEqual(3, len(os.listdir(self.directory)))
+        cache.trajectory_error(self.theo, runs[-1])
+        self.assertEqual(1, cache.hits)
+        cache.trajectory_error(self.theo, runs[2])
+        self.assertEqual(1, cache.disk_hits)
+
+    def test_trajectory(self):
+        cache = rc.ResultCache()
+        theo = [oop.Point(x, y) for x, y in self.theo]
+        expe = oop.Polyline(np.array(self.expe, dtype=float))
+        expected = oop.Trajectory(theo, expe).trajectory_error()
+
+        self.assertEqual(expected, cache.trajectory_error_of(oop.Trajectory(theo, expe)))
+        self.assertEqual(expected, cache.trajectory_error_of(oop.Trajectory(oop.Trajectory.prepare(theo), expe)))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_containers(self):
+        theo = [(-1,-1),(-1,-1),(3,0)]
+        expe = [(1,-1),(3,-2),(-3,-1),(-3,-2)]
+        expected = sl.trajectory_error_vectorized(theo, expe)
+
+        cache = rc.ResultCache()
+        self.assertEqual(expected, cache.trajectory_error(theo, expe))
+        self.assertEqual(expected, cache.trajectory_error(sl.Columns(*zip(*theo)), expe))
+        self.assertEqual(expected, cache.trajectory_error(memoryview(np.array(theo, dtype=float)), expe))
+        self.assertEqual((2, 1), (cache.hits, cache.misses))
+
+        cache = rc.ResultCache()
+        self.assertEqual(expected, cache.trajectory_error(sl.Columns(*zip(*theo)), expe))
+        self.assertEqual(expected, cache.trajectory_error(theo, expe))
+        self.assertEqual(expected, cache.trajectory_error_of(oop.Trajectory([oop.Point(x, y) for x, y in theo], expe)))
+
+    def test_exceptions_not_cached(self):
+        cache = rc.ResultCache(directory=self.directory)
+        self.assertRaises(ValueError, cache.get, "key", lambda: float("x"))
+        self.assertEqual((0, 0, []), (len(cache), cache.hits, os.listdir(self.directory)))
+
+
+# In[3]:
+
+
+if __name__ == "__main__":
+    unittest.main()
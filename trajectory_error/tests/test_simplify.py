@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Unit testing for the simplification of the experimental paths.
+
+# In[1]:
+
+
+# Imports
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import simplify as sp
+import solution as sl
+import synthetic as sy
+
+# In[2]:
+
+
+class TestSimplify(unittest.TestCase):
+    """
+    Unit testing for simplify and its bound on the change of the area.
+    """
+
+    def area(self, theo, expe):
+        path = sl.PreparedPath(theo)
+        return sl.trajectory_error_vectorized(path, expe) * path.length
+
+    def test_triangle_areas(self):
+        xs, ys = np.array([0.0, 1, 2, 2]), np.array([0.0, 1, 0, 2])
+
+        np.testing.assert_array_almost_equal([1, 1], sp.triangle_areas(xs, ys))
+
+    def test_aligned_points(self):
+        # the points aligned above the segment have no triangle, they are all removed:
+        theo = [(0,0),(10,0)]
+        expe = [(0,1),(1,1),(2,1),(3,1),(5,1),(10,1)]
+        result = sp.simplify(theo, expe, 0)
+
+        np.testing.assert_array_equal([(0,1),(10,1)], result.points)
+        self.assertEqual((4, 0), (result.removed, result.area))
+        np.testing.assert_almost_equal(self.area(theo, expe), self.area(theo, result.points))
+
+    def test_vertices_kept(self):
+        # the points around the vertex (10,0) are consumed on both segments of the route:
+        theo = [(0,0),(10,0),(10,10)]
+        expe = [(0,1),(5,1),(9,1),(9,5),(9,10)]
+        result = sp.simplify(theo, expe, 100)
+
+        np.testing.assert_array_equal([(0,1),(9,1),(9,5),(9,10)], result.points)
+
+    def test_bound(self):
+        for name in sy.SCENARIOS:
+            theo, expe = sy.scenario(name, 2000)
+            for epsilon in (0.01, 1.0):
+                result = sp.simplify(theo, expe, epsilon)
+                self.assertLessEqual(result.area, epsilon)
+                self.assertEqual(len(expe) - result.removed, len(result.points))
+                self.assertLessEqual(abs(self.area(theo, result.points) - self.area(theo, expe)),
+                                     result.area + 1e-9, (name, epsilon))
+
+    def test_chunks(self):
+        theo, expe = sy.scenario("dwells", 2000)
+        result = sp.simplify(theo, expe, 1.0, chunk_size=100)
+
+        np.testing.assert_array_equal(expe[[0,-1]], result.points[[0,-1]])
+        self.assertGreater(result.removed, 0)
+        self.assertLessEqual(abs(self.area(theo, result.points) - self.area(theo, expe)),
+                             result.area + 1e-9)
+
+    def test_short_paths(self):
+        self.assertEqual(0, sp.simplify([(0,0),(1,0)], [(0,1),(1,1)], 1).removed)
+        self.assertEqual(0, sp.simplify([(0,0),(1,0)], [(0,1)], 1).removed)
+
+
+# In[3]:
+
+
+if __name__ == "__main__":
+    unittest.main()
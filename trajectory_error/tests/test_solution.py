@@ -10,11 +10,16 @@
 
 # Imports
 
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 import unittest
+from array import array
 
-import ../solution as sl ## the solution notebook exported as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import solution as sl # the solution notebook exported as a script
 
 # In[2]:
 
@@ -67,15 +72,15 @@ def oracle_parser(ORACLE_FILE):
     # define results:
     theoretical_path = []
     experimental_path = []
-    # fetch the file
-    oracle = open(ORACLE_FILE,mode='r')
-    # extract data
-    theoretical_x_axis = oracle.readline()
-    theoretical_y_axis = oracle.readline()
-    experimental_x_axis = oracle.readline()
-    experimental_y_axis = oracle.readline()
-    expected_result = oracle.readline()
-    error = oracle.readline()
+    # fetch the file and extract data
+    # (oracles.load_oracles reads a whole directory of oracles, with a cache)
+    with open(ORACLE_FILE,mode='r') as oracle:
+        theoretical_x_axis = oracle.readline()
+        theoretical_y_axis = oracle.readline()
+        experimental_x_axis = oracle.readline()
+        experimental_y_axis = oracle.readline()
+        expected_result = oracle.readline()
+        error = oracle.readline()
     # process the strings
     theoretical_x_axis = [float(x) for x in theoretical_x_axis.split(",")]
     theoretical_y_axis = [float(x) for x in theoretical_y_axis.split(",")]
@@ -117,6 +122,7 @@ def perform_oracle_test(ORACLE_FILE):
 
 
 #perform_oracle_test("./indoor-location-oracles/Oracles/[test0]simple.txt")
+# the whole corpus, in parallel, with a report: python oracles.py --json report.json
 
 # __Unit testing using the unittest.py module__
 
@@ -173,6 +179,28 @@ class TestTrajectoryError(unittest.TestCase):
         
         self.assertEqual(0.5, sl.trajectory_error(theo, expe))# Difference expected : 0.75
 
+    def test_repeated_theoretical_points(self):
+        theo = [(-1,-1),(-1,-1),(3,0)]
+        expe = [(1,-1),(3,-2),(-3,-1),(-3,-2)]
+
+        np.testing.assert_almost_equal(sl.trajectory_error(theo[1:], expe), sl.trajectory_error(theo, expe))
+        np.testing.assert_almost_equal(sl.trajectory_error_vectorized(theo, expe), sl.trajectory_error(theo, expe))
+
+    def test_repeated_theoretical_points_everywhere(self):
+        theo = [(-1,-1),(-1,-1),(3,0)]
+        expe = [(1,-1),(3,-2),(-3,-1),(-3,-2)]
+        error = sl.trajectory_error(theo, expe)
+        accumulator = sl.TrajectoryErrorAccumulator(theo)
+        accumulator.push_many(expe)
+        breakdown = sl.trajectory_error_breakdown(theo, expe)
+
+        np.testing.assert_almost_equal(1.536058958563442, error)
+        self.assertEqual(error, breakdown.error)
+        self.assertEqual([0, error * breakdown.distance], breakdown.theoretical_areas.tolist())
+        self.assertEqual(error, accumulator.current_error())
+        self.assertFalse(sl.within_tolerance(theo, expe, 0.5))
+        self.assertTrue(sl.within_tolerance(theo, expe, 1.6))
+
 # In[7]:
 
 
@@ -269,6 +297,18 @@ class TestIntersection(unittest.TestCase):
         
         self.assertEqual((1.0,1.0), sl.intersection(segB_1, segB_2, segA_1, segA_2))
         
+    def test_nearly_parallel(self):
+        # the slopes are equal once rounded, but the segments cross:
+        intersect = sl.intersection((0,0), (3,1), (0,1e-17), (3,0.9999999999999999))
+        
+        self.assertIsNotNone(intersect)
+        self.assertAlmostEqual(0.2478881940730877, intersect[0])
+        self.assertIsNone(sl.intersection((0,0), (3,1), (0,1e-17), (3,1.0000000000000002)))
+        
+    def test_null_segment(self):
+        self.assertIsNone(sl.intersection((0,0), (2,2), (1,0), (1,0)))
+        self.assertIsNone(sl.intersection((0,0), (2,2), (1,1), (1,1)))
+        
 
 # In[9]:
 
@@ -502,10 +542,763 @@ class TestPointBelongsToSegment(unittest.TestCase):
         
         self.assertFalse(sl.point_belongs_to_segment(seg_A, seg_B, point))
         
+    def test_large_coordinates(self):
+        # a projection is aligned up to the rounding of its coordinates:
+        seg_A = (1e6,2e6)
+        seg_B = (1e6+3,2e6+1)
+        point = sl.ortogonal_projection(seg_A, seg_B, (1e6+1,2e6+5))
+        
+        self.assertTrue(sl.point_belongs_to_segment(seg_A, seg_B, point))
+        
+    def test_small_coordinates(self):
+        seg_A = (1e-6,1e-6)
+        seg_B = (1e-6+3e-9,1e-6+1e-9)
+        point = (1e-6+1e-9,1e-6+2e-10)
+        
+        self.assertFalse(sl.point_belongs_to_segment(seg_A, seg_B, point))
+        
 
 # In[13]:
 
 
+class TestTrajectoryErrorVectorized(unittest.TestCase):
+    """
+    Unit testing code for the array engine. It must give the results of trajectory_error,
+    for lists of tuples as well as for (N,2) arrays.
+    """
+
+    def assert_same_error(self, theo, expe):
+        expected = sl.trajectory_error(theo, expe)
+        np.testing.assert_almost_equal(expected, sl.trajectory_error_vectorized(theo, expe), 10)
+        np.testing.assert_almost_equal(expected, sl.trajectory_error_vectorized(np.array(theo), np.array(expe)), 10)
+
+    def test_equal_paths(self):
+        self.assert_same_error([(0,x) for x in range(5)], [(0,x) for x in range(5)])
+
+    def test_equal_paths_with_u_turn(self):
+        self.assert_same_error([(0,2),(1,2),(1,0),(0,0)], [(0,2),(1,2),(1,0),(0,0)])
+
+    def test_straight_parallel(self):
+        self.assert_same_error([(0,x) for x in range(5)], [(1,x) for x in range(5)])
+
+    def test_straight_crossing(self):
+        self.assert_same_error([(0,0),(0,1)], [(1,0),(-1,1)])
+
+    def test_different_length(self):
+        self.assert_same_error([(0,0),(5,0)], [(0,0)] + [(x,1) for x in range(6)] + [(5,0)])
+
+    def test_different_length_crossing(self):
+        self.assert_same_error([(0,0),(0,2)], [(0,0),(1,0),(-1,1),(1,2),(0,2)])
+
+    def test_long_runs(self):
+        # longer than a block, on both paths:
+        theo = [(x,x % 2) for x in range(100)]
+        expe = [(x/10,0.5) for x in range(1000)]
+        self.assert_same_error(theo, expe)
+
+    def test_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            sl.trajectory_error_vectorized(np.zeros((3,3)), np.zeros((3,2)))
+
+
+# In[14]:
+
+
+class TestOrthogonalProjections(unittest.TestCase):
+    """
+    Unit testing code for the batched orthogonal projection brick.
+    """
+
+    def test_same_as_ortogonal_projection(self):
+        segA_1 = (0,0)
+        segA_2 = (2,1)
+        points = [(-1,-1),(1,1),(3,0),(2,1)]
+        expected = [sl.ortogonal_projection(segA_1, segA_2, y) for y in points]
+        
+        np.testing.assert_almost_equal(expected, sl.ortogonal_projections(segA_1, segA_2, points))
+        
+    def test_vertical_line(self):
+        segA_1 = (0,0)
+        segA_2 = (0,2)
+        points = [(1,1),(-1,1),(-1,-1)]
+        
+        np.testing.assert_almost_equal([(0,1),(0,1),(0,-1)], sl.ortogonal_projections(segA_1, segA_2, points))
+        
+    def test_degenerate_segment(self):
+        segA_1 = (1,1)
+        segA_2 = (1,1)
+        points = [(0,0),(3,2)]
+        projections, t = sl.ortogonal_projections(segA_1, segA_2, points, return_parameter=True)
+        
+        np.testing.assert_almost_equal([(1,1),(1,1)], projections)
+        np.testing.assert_almost_equal([0,0], t)
+        
+    def test_parameter(self):
+        segA_1 = (0,0)
+        segA_2 = (2,0)
+        points = [(-1,5),(1,1),(4,-1)]
+        _, t = sl.ortogonal_projections(segA_1, segA_2, points, return_parameter=True)
+        
+        np.testing.assert_almost_equal([-0.5,0.5,2], t)
+        
+    def test_one_point_per_segment(self):
+        starts = [(0,0),(0,0)]
+        ends = [(2,0),(0,2)]
+        points = [(1,1),(1,1)]
+        
+        np.testing.assert_almost_equal([(1,0),(0,1)], sl.ortogonal_projections_many(starts, ends, points))
+        
+    def test_every_point_on_every_segment(self):
+        starts = np.array([(0,0),(0,0)])
+        ends = np.array([(2,0),(0,2)])
+        points = np.array([(1,1),(3,2),(-1,0)])
+        projections = sl.ortogonal_projections_many(starts[:,None], ends[:,None], points[None,:])
+        
+        self.assertEqual((2,3,2), projections.shape)
+        np.testing.assert_almost_equal([(1,0),(3,0),(-1,0)], projections[0])
+        np.testing.assert_almost_equal([(0,1),(0,2),(0,0)], projections[1])
+
+
+# In[15]:
+
+
+class TestPreparedPath(unittest.TestCase):
+    """
+    Unit testing code for the prepared theoretical path.
+    """
+
+    def test_segments(self):
+        path = sl.PreparedPath([(0,0),(3,0),(3,4)])
+        
+        np.testing.assert_almost_equal([9,16], path.squared_lengths)
+        np.testing.assert_almost_equal([3,4], path.lengths)
+        np.testing.assert_almost_equal([0,3,7], path.cumulative_lengths)
+        self.assertEqual(7, path.length)
+        np.testing.assert_almost_equal([(1,0),(0,1)], path.directions)
+        np.testing.assert_almost_equal([(0,1),(-1,0)], path.normals)
+        np.testing.assert_almost_equal([(0,0,3,0),(3,0,3,4)], path.bounding_boxes)
+        
+    def test_repeated_points(self):
+        path = sl.PreparedPath([(0,0),(0,0),(1,0),(1,0)])
+        
+        self.assertEqual(2, len(path))
+        self.assertEqual([(0,0),(1,0)], list(path))
+        
+    def test_copied_coordinates(self):
+        coords = np.array([(0.0,0),(3,0),(3,4)])
+        path = sl.PreparedPath(coords)
+        coords[1] = (5,5)
+        
+        self.assertEqual([(0,0),(3,0),(3,4)], list(path))
+        self.assertEqual(7, path.length)
+        self.assertFalse(np.shares_memory(coords, path.x))
+        
+    def test_path_length(self):
+        path = [(0,0),(0,1),(1,1)]
+        
+        self.assertEqual(sl.path_length(path), sl.path_length(sl.PreparedPath(path)))
+        
+    def test_project(self):
+        path = sl.PreparedPath([(0,0),(3,0),(3,4)])
+        projection = path.project([(1,1),(4,2),(-1,-1),(3,10)])
+        
+        np.testing.assert_array_equal([0,1,0,1], projection.segments)
+        np.testing.assert_almost_equal([(1,0),(3,2),(0,0),(3,4)], projection.points)
+        np.testing.assert_almost_equal([1,5,0,7], projection.arc_lengths)
+        np.testing.assert_almost_equal([1,1,np.sqrt(2),6], projection.distances)
+        
+    def test_crossings(self):
+        path = sl.PreparedPath([(0,0),(3,0),(3,4)])
+        crossings = path.crossings([(1,-1),(2,1),(-1,-1)], [(1,1),(4,1),(5,5)])
+        
+        np.testing.assert_array_equal([0,1,2,2], crossings.segments)
+        np.testing.assert_almost_equal([0.5,0.5,1/6,2/3], crossings.positions)
+        np.testing.assert_array_equal([0,1,0,1], crossings.path_segments)
+        np.testing.assert_almost_equal([(1,0),(3,1),(0,0),(3,3)], crossings.points)
+        
+    def test_no_crossing(self):
+        path = sl.PreparedPath([(0,0),(3,0)])
+        
+        self.assertEqual(0, len(path.crossings([(0,1)], [(3,1)]).segments))
+        
+    def test_trajectory_error(self):
+        theo = [(0,0),(0,2)]
+        path = sl.PreparedPath(theo)
+        for expe in ([(0,0),(1,0),(-1,1),(1,2),(0,2)], [(1,0),(-1,1)], [(1,0),(1,2)]):
+            np.testing.assert_almost_equal(sl.trajectory_error(theo, expe), sl.trajectory_error(path, expe), 10)
+        
+    def test_edited(self):
+        points = [(0,0),(3,0),(3,4),(6,4)]
+        path = sl.PreparedPath(points)
+        for start, stop, new in ((0,1,[(0,1)]), (1,1,[(1,1)]), (2,3,[]), (4,4,[(6,0)]), (3,4,[]), (1,3,[(2,2)])):
+            edited = path.edited(start, stop, new)
+            expected = sl.PreparedPath(points[:start] + new + points[stop:])
+            for name in ("x", "y", "squared_lengths", "lengths", "cumulative_lengths",
+                         "directions", "normals", "bounding_boxes"):
+                np.testing.assert_almost_equal(getattr(expected, name), getattr(edited, name), 12)
+            self.assertAlmostEqual(expected.length, edited.length, 12)
+
+
+# In[16]:
+
+
+class TestTrajectoryErrorMany(unittest.TestCase):
+    """
+    Unit testing code for the batch scoring of many pairs of paths.
+    """
+
+    def setUp(self):
+        self.theo = [(0,0),(0,2)]
+        self.pairs = [(self.theo, [(0,0),(1,0),(-1,1),(1,2),(0,2)]),
+                      ([(0,0),(0,1)], [(1,0),(-1,1)]),
+                      (self.theo, [(1,0),(1,2)])]
+
+    def test_in_process(self):
+        results = sl.trajectory_error_many(self.pairs, workers=1)
+        
+        for (theo, expe), result in zip(self.pairs, results):
+            self.assertIsNone(result.exception)
+            np.testing.assert_almost_equal(sl.trajectory_error(theo, expe), result.error, 10)
+        
+    def test_process_pool(self):
+        expected = sl.trajectory_error_many(self.pairs, workers=1)
+        
+        self.assertEqual(expected, sl.trajectory_error_many(self.pairs, workers=2, chunksize=1))
+        
+    def test_failures_per_pair(self):
+        pairs = [([(0,0)], [(0,0),(1,1)]), self.pairs[1], ([(1,2,3)], [(0,0),(1,1)])]
+        results = sl.trajectory_error_many(pairs, workers=1)
+        
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[0].exception, AssertionError)
+        np.testing.assert_almost_equal(0.5, results[1].error, 10)
+        self.assertIsInstance(results[2].exception, ValueError)
+        
+    def test_repeated_points(self):
+        expe = [(0,0),(1,0),(1,0),(1,0),(-1,1),(1,2),(1,2),(0,2)]
+        result, = sl.trajectory_error_many([(self.theo, expe)], workers=1)
+        
+        np.testing.assert_almost_equal(sl.trajectory_error(self.theo, sl.drop_repeated_points(expe)),
+                                       result.error, 10)
+
+
+# In[17]:
+
+
+class TestTrajectoryErrorAccumulator(unittest.TestCase):
+    """
+    Unit testing code for the incremental computation of the trajectory error.
+    """
+
+    def test_same_as_trajectory_error(self):
+        theo = [(0,0),(0,2)]
+        expe = [(0,0),(1,0),(-1,1),(1,2),(0,2)]
+        accumulator = sl.TrajectoryErrorAccumulator(theo)
+        for k, point in enumerate(expe):
+            accumulator.push(point)
+            if k > 0:
+                self.assertEqual(sl.trajectory_error(theo, expe[:k+1]), accumulator.current_error())
+        
+    def test_push_many(self):
+        theo = [(0,0),(5,0)]
+        expe = [(0,0)] + [(x,1) for x in range(6)] + [(5,0)]
+        accumulator = sl.TrajectoryErrorAccumulator(theo)
+        accumulator.push_many(expe[:3])
+        accumulator.push_many(np.array(expe[3:]))
+        
+        self.assertEqual(sl.trajectory_error(theo, expe), accumulator.current_error())
+        
+    def test_no_point(self):
+        accumulator = sl.TrajectoryErrorAccumulator([(0,0),(0,1)])
+        
+        self.assertEqual(0, accumulator.current_error())
+        
+    def test_keeps_only_needed_points(self):
+        accumulator = sl.TrajectoryErrorAccumulator([(0,0),(100,0)])
+        accumulator.push_many([(x,1) for x in range(100)])
+        
+        self.assertEqual(99, accumulator.j)
+        self.assertEqual(1, len(accumulator._pending))
+        
+    def test_repeated_points(self):
+        theo = [(0,0),(10,10)]
+        expe = [(0,1),(5,6),(5,6),(5,6),(9,10),(9,10)]
+        accumulator = sl.TrajectoryErrorAccumulator(theo)
+        accumulator.push_many(expe[:3])
+        accumulator.push(expe[3])
+        accumulator.push_many(expe[4:])
+        
+        self.assertEqual(2, accumulator.j)
+        self.assertEqual(sl.trajectory_error(theo, [(0,1),(5,6),(9,10)]), accumulator.current_error())
+
+
+# In[18]:
+
+
+class TestSweepStats(unittest.TestCase):
+    """
+    Unit testing code for the instrumentation of the sweep of trajectory_error.
+    """
+
+    def setUp(self):
+        self.theo = [(0,0),(0,2),(2,2)]
+        self.expe = [(0,0),(1,0),(-1,1),(1,2),(2,3),(2,2)]
+
+    def test_same_result(self):
+        stats = sl.SweepStats()
+        
+        self.assertEqual(sl.trajectory_error(self.theo, self.expe),
+                         sl.trajectory_error(self.theo, self.expe, stats=stats))
+        
+    def test_counters(self):
+        stats = sl.SweepStats()
+        sl.trajectory_error(self.theo, self.expe, stats=stats)
+        
+        self.assertEqual(stats.iterations, sum(stats.branches.values()))
+        self.assertEqual(set(sl.BRANCH_NAMES), set(stats.branches))
+        self.assertGreater(stats.branches["advance"], 0)
+        self.assertEqual(stats.iterations, stats.calls["intersection"])
+        self.assertEqual(stats.branches["quad"], stats.calls["compute_area"])
+        self.assertGreaterEqual(stats.seconds["total"], stats.seconds["intersection"])
+        
+    def test_counts_add_up(self):
+        stats = sl.SweepStats()
+        sl.trajectory_error(self.theo, self.expe, stats=stats)
+        iterations = stats.iterations
+        sl.trajectory_error(self.theo, self.expe, stats=stats)
+        
+        self.assertEqual(2 * iterations, stats.iterations)
+        
+    def test_prepared_path(self):
+        stats = sl.SweepStats()
+        error = sl.trajectory_error(sl.PreparedPath(self.theo), self.expe, stats=stats)
+        
+        np.testing.assert_almost_equal(sl.trajectory_error(self.theo, self.expe), error, 10)
+        self.assertGreater(stats.iterations, 0)
+        
+    def test_as_dict(self):
+        stats = sl.SweepStats()
+        sl.trajectory_error(self.theo, self.expe, stats=stats)
+        
+        self.assertEqual(stats.iterations, stats.as_dict()["iterations"])
+        self.assertEqual(stats.calls, stats.as_dict()["calls"])
+
+
+# In[19]:
+
+
+class TestTrajectoryErrorBreakdown(unittest.TestCase):
+    """
+    Unit testing code for the share of each segment in the trajectory error.
+    """
+
+    def test_same_error(self):
+        theo = [(0,0),(0,2),(2,2)]
+        expe = [(0,0),(1,0),(-1,1),(1,2),(2,3),(2,2)]
+        breakdown = sl.trajectory_error_breakdown(theo, expe)
+        
+        self.assertEqual(sl.trajectory_error(theo, expe), breakdown.error)
+        self.assertEqual(breakdown.error, breakdown.area / breakdown.distance)
+        
+    def test_areas(self):
+        # the experimental path goes away from the first segment only:
+        theo = [(0,0),(0,2),(2,2)]
+        expe = [(0,0),(1,1),(0,2),(2,2)]
+        breakdown = sl.trajectory_error_breakdown(theo, expe)
+        
+        np.testing.assert_array_almost_equal([1,0], breakdown.theoretical_areas)
+        np.testing.assert_array_almost_equal([0.5,0.5,0], breakdown.experimental_areas)
+        
+    def test_sums(self):
+        theo = [(0,0),(0,2),(2,2),(2,0)]
+        expe = [(0,0),(0.5,0.5),(-0.5,1.5),(0.5,2.5),(1.5,1.5),(2.5,1),(2,0)]
+        breakdown = sl.trajectory_error_breakdown(theo, expe)
+        
+        np.testing.assert_almost_equal(breakdown.area, breakdown.theoretical_areas.sum(), 12)
+        np.testing.assert_almost_equal(breakdown.area, breakdown.experimental_areas.sum(), 12)
+        
+    def test_arc_lengths(self):
+        theo = [(0,0),(0,2),(2,2),(2,0)]
+        breakdown = sl.trajectory_error_breakdown(theo, theo)
+        
+        np.testing.assert_array_equal([0,2,4,6], breakdown.arc_lengths)
+        self.assertEqual(breakdown.distance, breakdown.arc_lengths[-1])
+        self.assertEqual(0, breakdown.error)
+        
+    def test_buffers(self):
+        theo = np.array([(0,0),(0,2),(2,2)], dtype=float)
+        expe = np.array([(0,0),(1,1),(0,2),(2,2)], dtype=float)
+        expected = sl.trajectory_error_breakdown(theo.tolist(), expe.tolist())
+        
+        for coords in (lambda a: a, memoryview, lambda a: array('d', a.ravel()), lambda a: sl.Columns(a[:,0], a[:,1])):
+            breakdown = sl.trajectory_error_breakdown(coords(theo), coords(expe))
+            self.assertEqual(0.25, breakdown.error)
+            np.testing.assert_array_equal(expected.experimental_areas, breakdown.experimental_areas)
+
+
+# In[20]:
+
+
+class TestWithinTolerance(unittest.TestCase):
+    """
+    Unit testing code for the pass/fail scoring with an error budget.
+    """
+
+    def test_same_answer(self):
+        theo = [(0,0),(0,2),(2,2),(2,0)]
+        expe = [(0,0),(0.5,0.5),(-0.5,1.5),(0.5,2.5),(1.5,1.5),(2.5,1),(2,0)]
+        error = sl.trajectory_error(theo, expe)
+        
+        for max_error in (error / 2, error, np.nextafter(error, np.inf), 2 * error):
+            self.assertEqual(error < max_error, sl.within_tolerance(theo, expe, max_error), max_error)
+            
+    def test_prepared_path(self):
+        theo = [(0,0),(0,2),(2,2),(2,0)]
+        expe = [(0,0),(0.5,0.5),(-0.5,1.5),(0.5,2.5),(1.5,1.5),(2.5,1),(2,0)]
+        error = sl.trajectory_error_vectorized(theo, expe)
+        
+        for max_error in (error / 2, error, 2 * error):
+            self.assertEqual(error < max_error, sl.within_tolerance(sl.PreparedPath(theo), expe, max_error))
+            
+    def test_early_termination(self):
+        # the first experimental segment alone is over the budget, the sweep
+        # would fail on the next points if it went on:
+        theo = [(0,0),(0,1)]
+        expe = [(0,0),(1,0.5),None,None]
+        
+        self.assertFalse(sl.within_tolerance(theo, expe, 0.1))
+        
+    def test_buffers(self):
+        theo = np.array([(0,0),(0,2),(2,2)], dtype=float)
+        expe = np.array([(0,0),(1,1),(0,2),(2,2)], dtype=float)
+        
+        for coords in (lambda a: a, memoryview, lambda a: array('d', a.ravel()), lambda a: sl.Columns(a[:,0], a[:,1])):
+            self.assertTrue(sl.within_tolerance(coords(theo), coords(expe), 0.3))
+            self.assertFalse(sl.within_tolerance(coords(theo), coords(expe), 0.25))
+            self.assertTrue(sl.within_tolerance(theo.tolist(), coords(expe), 0.3))
+
+
+# In[21]:
+
+
+class TestDropRepeatedPoints(unittest.TestCase):
+    """
+    Unit testing code for the collapse of the repeated points of experimental paths.
+    """
+
+    def test_exact(self):
+        expe = [(0,0),(0,0),(1,1),(1,1),(1,1),(2,0),(2,0)]
+        
+        self.assertEqual([(0,0),(1,1),(2,0)], sl.drop_repeated_points(expe))
+        self.assertEqual([], sl.drop_repeated_points([]))
+        
+    def test_tolerance(self):
+        expe = [(0,0),(1,1),(1.05,1),(1,1.05),(1.2,1),(2,0),(2,0.01)]
+        
+        self.assertEqual([(0,0),(1,1),(1.2,1),(2,0),(2,0.01)], sl.drop_repeated_points(expe, tolerance=0.1))
+        
+    def test_same_error(self):
+        # the repeated point projects after the end of the first theoretical segment:
+        theo = [(0,0),(10,0),(10,10)]
+        expe = [(0,1),(5,1),(11,-1),(11,-1),(11,5),(9,10)]
+        error = sl.trajectory_error(theo, sl.drop_repeated_points(expe))
+        accumulator = sl.TrajectoryErrorAccumulator(theo)
+        accumulator.push_many(expe)
+        
+        self.assertEqual(error, sl.trajectory_error(theo, expe))
+        self.assertEqual(error, sl.trajectory_error_breakdown(theo, expe).error)
+        self.assertEqual(error, accumulator.current_error())
+        np.testing.assert_almost_equal(error, sl.trajectory_error_vectorized(theo, expe), 10)
+        np.testing.assert_almost_equal(error, sl.trajectory_error_many([(theo, expe)], workers=1)[0].error, 10)
+        self.assertEqual(sl.trajectory_error_shoelace(theo, sl.drop_repeated_points(expe)),
+                         sl.trajectory_error_shoelace(theo, expe))
+
+
+# In[22]:
+
+
+class TestTrajectoryErrorShoelace(unittest.TestCase):
+    """
+    Unit testing code for the shoelace engine.
+    """
+
+    def test_same_as_trajectory_error(self):
+        # the scenarios of TestTrajectoryError, where the sweep is right:
+        cases = [([(0,x) for x in range(5)], [(0,x) for x in range(5)]),
+                 ([(0,2),(1,2),(1,0),(0,0)], [(0,2),(1,2),(1,0),(0,0)]),
+                 ([(0,x) for x in range(5)], [(1,x) for x in range(5)]),
+                 ([(0,0),(0,1)], [(1,0),(-1,1)]),
+                 ([(0,0),(5,0)], [(0,0)] + [(x,1) for x in range(6)] + [(5,0)]),
+                 ([(0,0),(0,2)], [(0,0),(1,0),(-1,1),(1,2),(0,2)])]
+        for theo, expe in cases:
+            np.testing.assert_almost_equal(sl.trajectory_error(theo, expe),
+                                           sl.trajectory_error_shoelace(theo, expe), 10)
+            
+    def test_area_under_trace(self):
+        # along a straight route, the area is the integral of the distance to the route:
+        rng = np.random.default_rng(1)
+        xs = np.concatenate(([0], np.sort(rng.uniform(0, 100, 50)), [100]))
+        ys = np.concatenate(([0], rng.normal(size=50), [0]))
+        samples = np.linspace(0, 100, 200001)
+        
+        np.testing.assert_almost_equal(np.abs(np.interp(samples, xs, ys)).mean(),
+                                       sl.trajectory_error_shoelace([(0,0),(100,0)], np.stack((xs, ys), axis=1)), 5)
+        
+    def test_route_crossing_itself(self):
+        # the experimental path also crosses the first segment of the route on its last
+        # segment: this crossing is ignored. The area is a triangle of 2.5 and one of 1.125.
+        theo = [(0,0),(10,0),(10,5),(5,5),(5,-5)]
+        expe = [(0,0),(10,0.5),(9.5,5),(5,5),(5,-5)]
+        
+        np.testing.assert_almost_equal(3.625 / 30, sl.trajectory_error_shoelace(theo, expe), 12)
+        
+    def test_extremities(self):
+        # the ends of the experimental path are joined to their projections on the route:
+        np.testing.assert_almost_equal(1, sl.trajectory_error_shoelace([(0,0),(4,0)], [(0,1),(4,1)]), 12)
+        # here to the extremities of the route, the area is a trapezium of 5:
+        np.testing.assert_almost_equal(1.25, sl.trajectory_error_shoelace([(0,0),(4,0)], [(-1,1),(5,1)]), 12)
+        self.assertEqual(0, sl.trajectory_error_shoelace([(0,0),(4,0)], [(0,1)]))
+        
+    def test_chunks(self):
+        # lanes back and forth, and a path crossing them every other point:
+        theo = [(0,0),(20,0),(20,2),(0,2),(0,4),(20,4)]
+        expe = [(x,0.1*(-1)**x) for x in range(21)] + [(x,2+0.1*(-1)**x) for x in range(20,-1,-1)]\
+             + [(x,4+0.1*(-1)**x) for x in range(21)]
+        error = sl.trajectory_error_shoelace(theo, expe)
+        
+        self.addCleanup(setattr, sl, "_CROSSING_CHUNK", sl._CROSSING_CHUNK)
+        sl._CROSSING_CHUNK = 7
+        np.testing.assert_almost_equal(error, sl.trajectory_error_shoelace(theo, expe), 12)
+
+
+# In[23]:
+
+
+class TestTrajectoryErrorBacktracking(unittest.TestCase):
+    """
+    Unit testing for trajectory_error_backtracking, on paths doubling back.
+    """
+    
+    def test_straight(self):
+        # two pairs of triangles, the second one over the vertex of the route:
+        theo = [(0,0),(10,0),(20,0)]
+        expe = [(0,1),(5,-1),(20,1)]
+        
+        np.testing.assert_almost_equal((2.5 + 7.5) / 20, sl.trajectory_error_backtracking(theo, expe), 12)
+        
+    def test_doubling_back(self):
+        # back over a vertex of the route and forward again: each part is counted once,
+        # where the sweep of trajectory_error leaves the last segment:
+        theo = [(0,0),(10,0),(20,0),(30,0)]
+        expe = [(x,1) for x in range(0,16)] + [(x,1) for x in range(14,4,-1)] + [(x,1) for x in range(6,31)]
+        
+        np.testing.assert_almost_equal(1, sl.trajectory_error_backtracking(theo, expe), 12)
+        np.testing.assert_almost_equal(20 / 30, sl.trajectory_error(theo, expe), 12)
+        
+    def test_first_pass_counted(self):
+        # the way back, further from the route, only adds the part not covered yet:
+        theo = [(0,0),(10,0)]
+        expe = [(0,1),(6,1),(6,2),(4,2),(4,1),(10,1)]
+        
+        np.testing.assert_almost_equal(1, sl.trajectory_error_backtracking(theo, expe), 12)
+        
+    def test_crossing(self):
+        # the area of the two triangles, then the part of the way back which is not covered:
+        theo = [(0,0),(4,0)]
+        expe = [(0,1),(2,-1),(1,-1),(4,-1)]
+        
+        np.testing.assert_almost_equal((0.5 + 0.5 + 2) / 4, sl.trajectory_error_backtracking(theo, expe), 12)
+        
+    def test_many_turns(self):
+        # a trace going back and forth is scored like a trace going straight:
+        route = np.array([(0,0),(30,0),(30,20),(60,20)])
+        turns = np.concatenate([(k, k - 3) for k in range(5, 80, 5)])
+        s = np.concatenate([np.linspace(a, b, 50) for a, b in zip(np.r_[0, turns], np.r_[turns, 80])])
+        cumulative = [0, 30, 50, 80]
+        expe = np.stack((np.interp(s, cumulative, route[:,0]), np.interp(s, cumulative, route[:,1])), axis=1)
+        
+        self.assertAlmostEqual(0, sl.trajectory_error_backtracking(route, expe))
+        expe = expe + [0, 0.5] * (s[:,None] < 30) + [-0.5, 0] * ((s[:,None] > 30) & (s[:,None] < 50))
+        np.testing.assert_almost_equal((30 * 0.5 + 20 * 0.5) / 80, sl.trajectory_error_backtracking(route, expe), 2)
+        
+    def test_prepared_path(self):
+        theo = [(0,0),(10,0),(10,10)]
+        expe = [(0,1),(9,1),(9,5),(9,3),(9,10)]
+        
+        self.assertEqual(sl.trajectory_error_backtracking(theo, expe),
+                         sl.trajectory_error_backtracking(sl.PreparedPath(theo), np.array(expe)))
+
+
+# In[24]:
+
+
+class TestTrajectoryErrorParallel(unittest.TestCase):
+    """
+    Unit testing code for the parallel shoelace engine.
+    """
+
+    def setUp(self):
+        # a noisy trace along a route with a turn, which crosses it many times:
+        rng = np.random.default_rng(2)
+        self.theo = [(0,0),(50,0),(50,50)]
+        along = np.sort(rng.uniform(0, 100, 3000))
+        self.expe = np.stack((np.minimum(along, 50), np.maximum(along - 50, 0)), axis=1)\
+                  + rng.normal(scale=0.5, size=(3000, 2))
+
+    def test_seams(self):
+        # the polygons across the seams of the chunks, even of a single segment, are closed:
+        expected = sl.trajectory_error_shoelace(self.theo, self.expe)
+        for chunk_size in (1, 2, 7, 1000, 5000):
+            np.testing.assert_almost_equal(expected, sl.trajectory_error_parallel(self.theo, self.expe, 1, chunk_size), 12)
+
+    def test_workers(self):
+        np.testing.assert_almost_equal(sl.trajectory_error_shoelace(self.theo, self.expe),
+                                       sl.trajectory_error_parallel(self.theo, self.expe, 2), 12)
+
+    def test_short_paths(self):
+        self.assertEqual(0, sl.trajectory_error_parallel([(0,0),(4,0)], [(0,1)], 2))
+        np.testing.assert_almost_equal(1, sl.trajectory_error_parallel([(0,0),(4,0)], [(0,1),(4,1)], 2), 12)
+
+
+# In[25]:
+
+
+class TestColumns(unittest.TestCase):
+    """
+    Unit testing code for the paths given as columns.
+    """
+
+    def setUp(self):
+        self.theo = [(0,0),(0,2),(2,2)]
+        self.expe = [(0,0),(1,0),(-1,1),(1,2),(2,3),(2,2)]
+
+    def columns(self, path):
+        return [x for x, _ in path], [y for _, y in path]
+
+    def test_list_of_tuples(self):
+        xs, ys = self.columns(self.expe)
+        path = sl.Columns(xs, ys)
+
+        self.assertEqual(self.expe, list(path))
+        self.assertEqual((1, 2), path[3])
+        self.assertEqual(sl.path_length(self.expe), sl.path_length(path))
+
+    def test_buffers_not_copied(self):
+        xs = array('d', [0, 1, 2])
+        ys = np.array([1.0, 1, 1])
+        path = sl.Columns(xs, memoryview(ys))
+        xs[1] = 5
+
+        self.assertEqual((5, 1), path[1])
+        self.assertTrue(np.shares_memory(ys, path.y))
+
+    def test_trajectory_error(self):
+        expected = sl.trajectory_error(self.theo, self.expe)
+        theo, expe = sl.Columns(*self.columns(self.theo)), sl.Columns(*map(array, 'dd', self.columns(self.expe)))
+
+        np.testing.assert_almost_equal(expected, sl.trajectory_error(self.theo, expe), 12)
+        np.testing.assert_almost_equal(expected, sl.trajectory_error(theo, expe), 12)
+        np.testing.assert_almost_equal(expected, sl.trajectory_error(theo, self.expe), 12)
+        np.testing.assert_almost_equal(expected, sl.trajectory_error(self.theo, memoryview(np.array(self.expe, dtype=float))), 12)
+        stats = sl.SweepStats()
+        self.assertEqual(expected, sl.trajectory_error(theo, expe, stats=stats))
+        self.assertGreater(stats.iterations, 0)
+
+    def test_buffers(self):
+        expected = sl.trajectory_error(self.theo, self.expe)
+        coords = np.array(self.expe, dtype=float)
+        interleaved = array('d', coords.ravel())
+        for path in (coords, memoryview(coords), interleaved, memoryview(interleaved)):
+            np.testing.assert_almost_equal(expected, sl.trajectory_error(self.theo, path), 12)
+            self.assertEqual(expected, sl.trajectory_error(self.theo, path, stats=sl.SweepStats()))
+            np.testing.assert_almost_equal(sl.path_length(self.expe), sl.path_length(path), 12)
+        theo = np.array(self.theo, dtype=float)
+        for path in (theo, memoryview(theo), array('d', theo.ravel())):
+            np.testing.assert_almost_equal(expected, sl.trajectory_error(path, self.expe), 12)
+            self.assertEqual(expected, sl.trajectory_error(path, self.expe, stats=sl.SweepStats()))
+
+    def test_different_lengths(self):
+        self.assertRaises(ValueError, sl.Columns, [0, 1, 2], [0, 1])
+        self.assertRaises(ValueError, sl.Columns, [[0, 1]], [[0, 1]])
+
+
+# In[26]:
+
+
+class TestSweepResult(unittest.TestCase):
+    """
+    Unit testing code for the incremental re-scoring of an edited theoretical path.
+    """
+
+    def setUp(self):
+        # a noisy trace along a route with turns, close enough for the sweep to follow it:
+        rng = np.random.default_rng(3)
+        self.theo = [(0,0),(20,0),(20,20),(40,20),(40,0)]
+        path = sl.PreparedPath(self.theo)
+        along = np.sort(rng.uniform(0, path.length, 2000))
+        self.expe = np.stack((np.interp(along, path.cumulative_lengths, path.x),
+                              np.interp(along, path.cumulative_lengths, path.y)), axis=1)\
+                  + rng.normal(scale=0.05, size=(2000, 2))
+
+    def assertSameSweep(self, result):
+        theo = np.stack((result.path.x, result.path.y), axis=1)
+        expected = sl.sweep_result(theo, self.expe)
+        np.testing.assert_array_equal(expected.segments, result.segments)
+        np.testing.assert_almost_equal(expected.error, result.error, 10)
+        np.testing.assert_almost_equal(sl.path_length(theo.tolist()), result.length, 10)
+        np.testing.assert_almost_equal(sl.trajectory_error_vectorized(theo, self.expe), result.error, 10)
+
+    def test_sweep(self):
+        result = sl.sweep_result(self.theo, self.expe)
+        
+        np.testing.assert_almost_equal(sl.trajectory_error_vectorized(self.theo, self.expe), result.error, 12)
+        self.assertTrue(np.all(result.segments >= 0))
+        self.assertEqual(sl.path_length(self.theo), result.length)
+
+    def test_edits(self):
+        result = sl.sweep_result(self.theo, self.expe)
+        for edit in (lambda r: r.insert_vertex(1, (10,0.5)), lambda r: r.move_vertex(1, (10,-0.5)),
+                     lambda r: r.insert_vertex(4, (30,20.5)), lambda r: r.delete_vertex(1),
+                     lambda r: r.move_vertex(0, (-1,0)), lambda r: r.insert_vertex(len(r.path), (40,-5)),
+                     lambda r: r.delete_vertex(len(r.path) - 1), lambda r: r.delete_vertex(0)):
+            result = edit(result)
+            self.assertSameSweep(result)
+
+    def test_previous_result_kept(self):
+        result = sl.sweep_result(self.theo, self.expe)
+        error, segments = result.error, result.segments.copy()
+        result.insert_vertex(2, (20,10))
+        
+        self.assertEqual(error, result.error)
+        np.testing.assert_array_equal(segments, result.segments)
+        self.assertEqual(5, len(result.path))
+
+    def test_left_over(self):
+        # the trace goes past the end of the route, then the route is extended:
+        result = sl.sweep_result([(0,0),(4,0)], [(0,1),(4,1),(8,1)])
+        self.assertEqual([0, -1], result.segments.tolist())
+        result = result.insert_vertex(2, (8,0))
+        
+        self.assertEqual([0, 1], result.segments.tolist())
+        np.testing.assert_almost_equal(1, result.error, 12)
+
+    def test_duplicate(self):
+        result = sl.sweep_result(self.theo, self.expe).move_vertex(1, (20,20))
+        
+        self.assertEqual(4, len(result.path))
+        self.assertSameSweep(result)
+
+    def test_invalid_edits(self):
+        result = sl.sweep_result([(0,0),(4,0)], [(0,1),(4,1)])
+        
+        self.assertRaises(ValueError, result.delete_vertex, 0)
+        self.assertRaises(IndexError, result.move_vertex, 2, (0,0))
+        self.assertRaises(IndexError, result.insert_vertex, 3, (0,0))
+
+
+# In[27]:
+
+
 # initialisation
 loader = unittest.TestLoader()
 myTestSuite = unittest.TestSuite()
@@ -513,10 +1306,25 @@ myTestSuite = unittest.TestSuite()
 myTestSuite.addTests(loader.loadTestsFromTestCase(TestPathLength))
 myTestSuite.addTests(loader.loadTestsFromTestCase(TestPointBelongsToSegment))
 myTestSuite.addTests(loader.loadTestsFromTestCase(TestOrthogonalProjection))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestOrthogonalProjections))
 myTestSuite.addTests(loader.loadTestsFromTestCase(TestIntersection))
 myTestSuite.addTests(loader.loadTestsFromTestCase(TestComputeArea))
 myTestSuite.addTests(loader.loadTestsFromTestCase(TestAreaRightTriangle))
 myTestSuite.addTests(loader.loadTestsFromTestCase(TestTrajectoryError))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestTrajectoryErrorVectorized))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestPreparedPath))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestTrajectoryErrorMany))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestTrajectoryErrorAccumulator))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestSweepStats))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestTrajectoryErrorBreakdown))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestWithinTolerance))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestDropRepeatedPoints))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestTrajectoryErrorShoelace))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestTrajectoryErrorBacktracking))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestTrajectoryErrorParallel))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestColumns))
+myTestSuite.addTests(loader.loadTestsFromTestCase(TestSweepResult))
 # run!
-runner = unittest.TextTestRunner()
-runner.run(myTestSuite)
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner()
+    runner.run(myTestSuite)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Unit testing for the spatial index over the segments of a path.
+
+# In[1]:
+
+
+# Imports
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import spatial_index as si
+
+# In[2]:
+
+
+class TestSegmentGrid(unittest.TestCase):
+    """
+    Unit testing for the grid index: the queries must give the results of a linear scan.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        points = np.cumsum(rng.normal(size=(201,2)), axis=0)
+        self.starts = points[:-1]
+        self.ends = points[1:]
+        self.grid = si.SegmentGrid(self.starts, self.ends)
+        self.queries = rng.normal(size=(100,2)) * 10
+
+    def test_nearest_segments(self):
+        segments, distances = self.grid.nearest_segments(self.queries)
+        for point, segment, distance in zip(self.queries, segments, distances):
+            all_distances = si.point_segment_distances(np.repeat([point], len(self.starts), axis=0),
+                                                       self.starts, self.ends)
+            np.testing.assert_almost_equal(all_distances.min(), distance)
+            np.testing.assert_almost_equal(all_distances[segment], distance)
+
+    def test_nearest_segment(self):
+        segments, distances = self.grid.nearest_segments(self.queries[:1])
+
+        self.assertEqual((segments[0], distances[0]), self.grid.nearest_segment(self.queries[0]))
+
+    def test_nearest_segment_far_away(self):
+        grid = si.SegmentGrid([(0,0),(1,0)], [(1,0),(1,1)])
+
+        self.assertEqual((1, 99.0), grid.nearest_segment((100,0.5)))
+
+    def test_nearest_segments_very_far_away(self):
+        # a stray point far from a small path: the rings must not grow with its distance
+        grid = si.SegmentGrid([(0,0),(1,0),(1,1),(0,1)], [(1,0),(1,1),(0,1),(0,0)])
+        segments, distances = grid.nearest_segments([(2e4,0.5), (-3e3,-4e3), (0.5,1e9)])
+
+        self.assertEqual([1, 0, 2], segments.tolist())
+        np.testing.assert_almost_equal([2e4 - 1, 5e3], distances[:2])
+        self.assertEqual(1e9 - 1, distances[2])
+        self.assertEqual((0, 2e4 - 1), si.SegmentGrid([(0,0)], [(1,0)]).nearest_segment((2e4,0)))
+
+    def test_segments_in_boxes(self):
+        boxes = np.concatenate((self.queries, self.queries + 3), axis=1)
+        box, segments = self.grid.segments_in_boxes(boxes)
+        bb = self.grid.bounding_boxes
+        overlap = (bb[None,:,0] <= boxes[:,None,2]) & (bb[None,:,2] >= boxes[:,None,0])\
+                & (bb[None,:,1] <= boxes[:,None,3]) & (bb[None,:,3] >= boxes[:,None,1])
+        expected_box, expected_segments = np.nonzero(overlap)
+
+        np.testing.assert_array_equal(expected_box, box)
+        np.testing.assert_array_equal(expected_segments, segments)
+
+    def test_segments_in_box(self):
+        grid = si.SegmentGrid([(0,0),(5,0),(5,5)], [(5,0),(5,5),(0,5)])
+
+        np.testing.assert_array_equal([0,1], grid.segments_in_box(4,-1,6,1))
+        np.testing.assert_array_equal([], grid.segments_in_box(1,1,4,4))
+
+    def test_vertical_and_horizontal_segments(self):
+        grid = si.SegmentGrid([(0,0),(0,0)], [(0,10),(10,0)])
+
+        self.assertEqual((0, 1.0), grid.nearest_segment((-1,5)))
+        self.assertEqual((1, 1.0), grid.nearest_segment((5,-1)))
+
+    def test_empty(self):
+        grid = si.SegmentGrid(np.zeros((0,2)), np.zeros((0,2)))
+
+        self.assertEqual(-1, grid.nearest_segment((0,0))[0])
+        self.assertEqual(0, len(grid.segments_in_box(0,0,1,1)))
+
+
+# In[3]:
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Unit testing for the generators of synthetic routes and traces.
+
+# In[1]:
+
+
+# Imports
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import solution as sl
+import synthetic as sy
+
+# In[2]:
+
+
+class TestSynthetic(unittest.TestCase):
+    """
+    Unit testing for the routes, the traces and the scenarios.
+    """
+
+    def test_routes(self):
+        for name, route in sy.ROUTES.items():
+            points = route(50, seed=1)
+            self.assertEqual((50,2), points.shape, name)
+            np.testing.assert_array_equal(points, route(50, seed=1))
+
+    def test_corridors_turn(self):
+        steps = np.diff(sy.corridors(50), axis=0)
+        # each step is along one axis, and the next one along the other axis:
+        self.assertTrue(((steps[:,0] == 0) != (steps[:,1] == 0)).all())
+        self.assertTrue(((steps[1:,0] == 0) != (steps[:-1,0] == 0)).all())
+
+    def test_trace(self):
+        route = sy.zigzag(10)
+        trace = sy.trace(route, 200, noise=0.1, seed=3)
+
+        self.assertEqual((200,2), trace.shape)
+        np.testing.assert_array_equal(route[[0,-1]], trace[[0,-1]])
+        np.testing.assert_array_equal(trace, sy.trace(route, 200, noise=0.1, seed=3))
+
+    def test_trace_without_noise(self):
+        route = np.array([(0,0),(10,0)])
+
+        np.testing.assert_array_almost_equal([(0,0),(5,0),(10,0)], sy.trace(route, 3, noise=0))
+
+    def test_dwells(self):
+        route = np.array([(0,0),(100,0)])
+        trace = sy.trace(route, 100, noise=0, dwells=2, dwell_points=30)
+        steps = np.diff(trace[:,0])
+
+        self.assertEqual(100, len(trace))
+        self.assertTrue((steps >= 0).all())
+        # the regular steps are of 100/39, the steps of the dwell periods are much smaller:
+        self.assertGreaterEqual((steps < 0.5).sum(), 58)
+
+    def test_back_and_forth(self):
+        route = np.array([(0,0),(100,0)])
+        trace = sy.back_and_forth(route, 400, 3, back=0.5, noise=0)
+        steps = np.diff(trace[:,0])
+
+        self.assertEqual((400,2), trace.shape)
+        np.testing.assert_array_equal(route[[0,-1]], trace[[0,-1]])
+        # forward, back, forward... the trace turns 3 times each way:
+        self.assertEqual(6, (np.diff(np.sign(steps[steps != 0])) != 0).sum())
+        np.testing.assert_array_equal(trace, sy.back_and_forth(route, 400, 3, back=0.5, noise=0))
+
+    def test_scenarios(self):
+        for name in sy.SCENARIOS:
+            route, trace = sy.scenario(name, 500)
+            self.assertEqual(500, len(trace))
+            # the traces are followed by the sweep of trajectory_error, as by the array engine:
+            error = sl.trajectory_error([tuple(p) for p in route.tolist()], [tuple(p) for p in trace.tolist()])
+            np.testing.assert_almost_equal(error, sl.trajectory_error_vectorized(route, trace), 10)
+
+    def test_unknown_scenario(self):
+        with self.assertRaises(ValueError):
+            sy.scenario("stairs", 10)
+
+
+# In[3]:
+
+
+if __name__ == "__main__":
+    unittest.main()
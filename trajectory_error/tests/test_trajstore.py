@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Unit testing for the trajectory files.
+
+# In[1]:
+
+
+# Imports
+
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import solution as sl
+import synthetic as sy
+import trajstore as ts
+
+# In[2]:
+
+
+class TestTrajectoryStore(unittest.TestCase):
+    """
+    Unit testing for the format, and for the functions of solution.py reading it.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.route, self.run = sy.scenario("corridors", 5000)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, xs, ys, timestamps=None, name="run.traj"):
+        return ts.write_trajectory(os.path.join(self.directory, name), xs, ys, timestamps, window=1000)
+
+    def test_round_trip(self):
+        times = np.arange(len(self.run)) * 0.1
+        stored = self.write(self.run[:,0], self.run[:,1], times)
+        reopened = ts.open_trajectory(stored.path)
+
+        np.testing.assert_array_equal(self.run, np.stack((reopened.x, reopened.y), axis=1))
+        np.testing.assert_array_equal(times, reopened.t)
+        self.assertEqual([tuple(point) for point in self.run.tolist()], list(reopened))
+        self.assertEqual(tuple(self.run[-1]), reopened[-1])
+        self.assertEqual(os.path.getsize(stored.path), 64 + 3 * 8 * len(self.run))
+
+    def test_without_timestamps(self):
+        stored = self.write([0, 1], [2, 3])
+
+        self.assertIsNone(stored.t)
+        self.assertEqual([(0, 2), (1, 3)], list(stored))
+        self.assertEqual([], list(self.write([], [], name="empty.traj")))
+
+    def test_windows(self):
+        stored = self.write(self.run[:,0], self.run[:,1])
+        windows = list(stored.windows(700))
+
+        self.assertTrue(all(len(xs) <= 700 for xs, _ in windows))
+        # the windows share their extremities:
+        np.testing.assert_array_equal(self.run[:,0], np.concatenate([xs[:-1] for xs, _ in windows] + [windows[-1][0][-1:]]))
+
+    def test_invalid_files(self):
+        name = os.path.join(self.directory, "invalid.traj")
+        with open(name, "wb") as file:
+            file.write(b"0,1,2\n3,4,5\n")
+        self.assertRaises(ValueError, ts.open_trajectory, name)
+        stored = self.write([0, 1, 2], [0, 1, 0])
+        with open(stored.path, "r+b") as file:
+            file.truncate(64 + 8 * 4)
+        self.assertRaises(ValueError, ts.open_trajectory, stored.path)
+        self.assertRaises(ValueError, self.write, [0, 1], [0])
+
+    def test_trajectory_error(self):
+        stored = self.write(self.run[:,0], self.run[:,1])
+        route = [tuple(point) for point in self.route.tolist()]
+        expected = sl.trajectory_error_vectorized(route, self.run)
+
+        np.testing.assert_almost_equal(expected, sl.trajectory_error(route, stored), 12)
+        np.testing.assert_almost_equal(expected, sl.trajectory_error(sl.PreparedPath(route), stored), 12)
+        # swept by windows, which are not aligned with the runs of steps of the sweep:
+        np.testing.assert_almost_equal(expected * sl.path_length(route),
+                                       sl._sweep_windows(sl.PreparedPath(route), stored.windows(3)), 10)
+        np.testing.assert_almost_equal(sl.path_length([tuple(point) for point in self.run.tolist()]),
+                                       sl.path_length(stored), 8)
+
+    def test_trajectory_error_many(self):
+        stored = self.write(self.run[:,0], self.run[:,1])
+        expected = sl.trajectory_error_vectorized(self.route, self.run)
+
+        self.assertLess(len(pickle.dumps(stored)), 200)
+        for workers in (1, 2):
+            scores = sl.trajectory_error_many([(self.route, stored)], workers=workers)
+            np.testing.assert_almost_equal(expected, scores[0].error, 12)
+
+
+# In[3]:
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# A binary file format for long trajectories, read without parsing them.
+#
+# An archived trace of millions of points does not fit in memory as a list of
+# tuples, nor as a list of Points. A trajectory file is a header of 64 bytes,
+# followed by columns of little-endian float64: the abscissas, the ordinates,
+# and optionally the timestamps of the points.
+#
+#     offset  size  field
+#          0     8  magic, b"TRAJSTOR"
+#          8     4  version, uint32, 1
+#         12     4  flags, uint32: bit 0 is set when there is a column of timestamps
+#         16     8  n_points, uint64
+#         24    40  reserved, zeros
+#         64  8*n   x
+#      64+8n  8*n   y
+#     64+16n  8*n   t, if the flag is set
+#
+# A StoredTrajectory maps the columns with np.memmap: the pages of the file are
+# read from disk when the computation reaches them. The functions of
+# solution.py accept it as a path. The array engine sweeps it by windows of
+# WINDOW points, each mapped on its own and released after it, so the memory
+# used stays bounded, whatever the length of the trajectory. A StoredTrajectory
+# is pickled as the name of its file, so it is sent to a worker process of
+# trajectory_error_many without its points.
+
+import os
+
+import numpy as np
+
+MAGIC = b"TRAJSTOR"
+VERSION = 1
+_TIMESTAMPS = 1 # the flag of the column of timestamps
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("flags", "<u4"),
+                   ("n_points", "<u8"), ("reserved", "V40")])
+COLUMN = np.dtype("<f8")
+WINDOW = 1 << 20 # points mapped at once by windows
+
+
+class StoredTrajectory:
+    """
+    A trajectory file, mapped in memory. It can be used as a list of tuples
+    (len, indexing, iteration), as a PreparedPath can.
+    Attributes :
+    path : a str, the name of the file.
+    x, y : two np.memmap of n_points floats, the coordinates of the points.
+    t : a np.memmap of n_points floats, the timestamps of the points, or None.
+
+    >>> import tempfile
+    >>> name = os.path.join(tempfile.mkdtemp(), "run.traj")
+    >>> stored = write_trajectory(name, [0, 1, 2], [0, 1, 0], timestamps=[0, 0.5, 1])
+    >>> len(stored), stored[1], stored.t.tolist()
+    (3, (1.0, 1.0), [0.0, 0.5, 1.0])
+    """
+
+    def __init__(self, path, mode="r"):
+        """
+        Constructor.
+        arg1 path : a str, the name of a trajectory file.
+        arg2 mode : a str, "r" to read the file, "r+" to also write the columns.
+        """
+        self.path = os.fspath(path)
+        self.mode = mode
+        header = np.fromfile(self.path, dtype=HEADER, count=1)
+        if len(header) < 1 or header["magic"][0] != MAGIC:
+            raise ValueError("%s is not a trajectory file" % self.path)
+        if header["version"][0] != VERSION:
+            raise ValueError("%s has version %d, only version %d is supported"
+                             % (self.path, header["version"][0], VERSION))
+        self.n_points = int(header["n_points"][0])
+        columns = 3 if header["flags"][0] & _TIMESTAMPS else 2
+        size = HEADER.itemsize + columns * self.n_points * COLUMN.itemsize
+        if os.path.getsize(self.path) < size:
+            raise ValueError("%s is truncated: %d bytes, %d expected"
+                             % (self.path, os.path.getsize(self.path), size))
+        self.x, self.y = self._column(0), self._column(1)
+        self.t = self._column(2) if columns == 3 else None
+
+    def _column(self, k, start=0, stop=None):
+        """
+        Map a column of the file, or a part of it.
+        arg1 k : an int, the rank of the column: 0 for x, 1 for y, 2 for t.
+        arg2,3 start, stop : two ints, the part of the column, from start to stop excluded.
+        return : a np.memmap of stop-start floats.
+        """
+        stop = self.n_points if stop is None else stop
+        if stop <= start:
+            return np.zeros(0, dtype=COLUMN)
+        offset = HEADER.itemsize + (k * self.n_points + start) * COLUMN.itemsize
+        return np.memmap(self.path, dtype=COLUMN, mode=self.mode, offset=offset, shape=(stop - start,))
+
+    def __len__(self):
+        return self.n_points
+
+    def __getitem__(self, i):
+        return (float(self.x[i]), float(self.y[i]))
+
+    def __iter__(self):
+        for xs, ys in self.windows():
+            # the windows share their extremities:
+            yield from zip(xs[:-1].tolist(), ys[:-1].tolist())
+        if self.n_points:
+            yield self[-1]
+
+    def __repr__(self):
+        return "StoredTrajectory(%r, %d points)" % (self.path, self.n_points)
+
+    def __reduce__(self):
+        return (StoredTrajectory, (self.path, self.mode))
+
+    def windows(self, size=WINDOW):
+        """
+        Map the coordinates by consecutive windows, which share their extremities.
+        Each window is mapped on its own: the memory it uses is released when the
+        caller drops it.
+        arg1 size : an int, the number of points of a window, at least 2.
+        return : an iterator of (xs, ys), two np.memmap of at most size floats.
+        A trajectory of less than two points has a single window.
+        """
+        step = max(size, 2) - 1
+        for start in range(0, max(self.n_points - 1, 1), step):
+            stop = min(start + step + 1, self.n_points)
+            yield self._column(0, start, stop), self._column(1, start, stop)
+
+    def write(self, start, xs, ys, timestamps=None):
+        """
+        Write points in the file, in mode "r+", through a mapping of their part only,
+        released at once: the memory used is the one of the points given.
+        arg1 start : an int, the index of the first point written.
+        arg2,3 xs, ys : two sequences of floats of the same length, the coordinates of the points.
+        arg4 timestamps : None, or a sequence of floats of the same length.
+        """
+        columns = [xs, ys] if timestamps is None else [xs, ys, timestamps]
+        if any(len(column) != len(xs) for column in columns):
+            raise ValueError("the columns of a trajectory must have the same length")
+        if start < 0 or start + len(xs) > self.n_points:
+            raise ValueError("points %d to %d are out of a trajectory of %d points"
+                             % (start, start + len(xs), self.n_points))
+        for k, column in enumerate(columns):
+            target = self._column(k, start, start + len(xs))
+            target[:] = np.asarray(column, dtype=float)
+            if isinstance(target, np.memmap):
+                target.flush()
+
+    def flush(self):
+        """
+        Write the changes of the columns to the file, in mode "r+".
+        """
+        for column in (self.x, self.y, self.t):
+            if isinstance(column, np.memmap):
+                column.flush()
+
+
+def create_trajectory(path, n_points, timestamps=False):
+    """
+    Create a trajectory file of points at (0,0), to be filled.
+    arg1 path : a str, the name of the file, replaced if it exists.
+    arg2 n_points : an int, the number of points.
+    arg3 timestamps : a boolean, add a column of timestamps.
+    return : a StoredTrajectory in mode "r+". Its columns are written to the
+    file by flush, or when they are released; write fills a part of them
+    without keeping it in memory.
+    """
+    header = np.zeros(1, dtype=HEADER)
+    header["magic"], header["version"], header["n_points"] = MAGIC, VERSION, n_points
+    header["flags"] = _TIMESTAMPS if timestamps else 0
+    columns = 3 if timestamps else 2
+    with open(path, "wb") as file:
+        file.write(header.tobytes())
+        # the columns are a hole of the file, allocated by the system as they are written:
+        file.truncate(HEADER.itemsize + columns * n_points * COLUMN.itemsize)
+    return StoredTrajectory(path, "r+")
+
+
+def write_trajectory(path, xs, ys, timestamps=None, window=WINDOW):
+    """
+    Write a trajectory file, copying the columns window by window: they can be
+    np.memmap, or the columns of another StoredTrajectory.
+    arg1 path : a str, the name of the file, replaced if it exists.
+    arg2,3 xs, ys : two sequences of floats of the same length, the coordinates of the points.
+    arg4 timestamps : None, or a sequence of floats of the same length.
+    arg5 window : an int, the number of points copied at once.
+    return : a StoredTrajectory of the file, in mode "r".
+    """
+    if len(xs) != len(ys) or (timestamps is not None and len(timestamps) != len(xs)):
+        raise ValueError("the columns of a trajectory must have the same length")
+    stored = create_trajectory(path, len(xs), timestamps is not None)
+    for start in range(0, len(xs), window):
+        stored.write(start, xs[start:start + window], ys[start:start + window],
+                     None if timestamps is None else timestamps[start:start + window])
+    return StoredTrajectory(path)
+
+
+def open_trajectory(path):
+    """
+    Open a trajectory file for reading.
+    arg1 path : a str, the name of the file.
+    return : a StoredTrajectory in mode "r".
+    """
+    return StoredTrajectory(path)